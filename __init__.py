@@ -1,5 +1,5 @@
 import bpy # type: ignore
-from . import operators, ui, garment_hue
+from . import operators, ui, garment_hue, log, adaptive_subsurf, prefs, profiling, datablock_stats, material_index, koda_presets
 
 classes = [
     ui.Auto_Koda_PT_Settings,
@@ -7,48 +7,111 @@ classes = [
     ui.Auto_Koda_PT_Material_Overrides,
     ui.Auto_Koda_Preferences,
     ui.Auto_Koda_PT_Utilities,
+    ui.Auto_Koda_PT_Log,
+    ui.Auto_Koda_PT_Diagnostics,
 
     operators.Auto_Koda_Selected,
     operators.Auto_Koda_Crunch_Selected,
+    operators.Auto_Koda_OT_ConvertChunked,
+    operators.Auto_Koda_OT_SpecialiseShaders,
+    operators.Auto_Koda_OT_UpgradeTemplates,
     operators.Auto_Koda_OT_SyncOverride,
     operators.Auto_Koda_OT_LinkOverride,
     operators.Auto_Koda_OT_SyncLinkOverride,
     operators.Auto_Koda_OT_ToggleSubsurfViewport,
+    operators.Auto_Koda_OT_PerformanceMode,
+    operators.Auto_Koda_OT_RestorePerformanceMode,
     operators.Auto_Koda_OT_PrepareMeshes,
+    operators.Auto_Koda_OT_InstanceDuplicateMeshes,
+    operators.Auto_Koda_OT_GenerateLODs,
+    operators.Auto_Koda_OT_SetLOD,
+    operators.Auto_Koda_OT_RemoveLODs,
     operators.Auto_Koda_OT_GarmentHuePrimary,
     operators.Auto_Koda_OT_GarmentHueSecondary,
+    operators.Auto_Koda_OT_SavePreset,
+    operators.Auto_Koda_OT_ApplyPreset,
+    operators.Auto_Koda_OT_DeletePreset,
+    operators.Auto_Koda_OT_RefreshResourcesIndex,
+    operators.Auto_Koda_OT_RelinkMissingImages,
+    operators.Auto_Koda_OT_BakePalette,
+    operators.Auto_Koda_OT_SwapBaked,
+    operators.Auto_Koda_OT_ExportCharacters,
+    operators.Auto_Koda_OT_ImportCharacters,
     operators.Auto_Koda_OT_RefreshGarmentHueList,
-    
-    garment_hue.Auto_Koda_GarmentHueItem,
+    operators.Auto_Koda_OT_ClearLog,
+    operators.Auto_Koda_OT_ExportProfile,
 ]
 
-def _initial_garment_hue_refresh():
-    """Runs once, shortly after the addon loads. Deferred via a timer
-    because bpy.data cannot be safely written to immediately during
-    register() either - Blender may still be mid-load at that point."""
+def _setup_logging():
     try:
-        garment_hue.refresh_garment_hue_collection(bpy.context.scene)
-    except Exception as e:
-        print(f"[Auto Koda] Initial garment hue refresh skipped: {e}")
-    return None  # don't repeat
+        prefs = bpy.context.preferences.addons[__package__].preferences
+        log.setup(prefs.logLevel, bpy.path.abspath(prefs.logFilePath) if prefs.logFilePath else "")
+    except Exception:
+        log.setup()
+
+def _setup_profiling():
+    try:
+        addon_prefs = bpy.context.preferences.addons[__package__].preferences
+        profiling.configure(addon_prefs.profilingEnabled, addon_prefs.profilingCapture)
+    except Exception:
+        profiling.configure(False)
+
+def _setup_accounting():
+    try:
+        addon_prefs = bpy.context.preferences.addons[__package__].preferences
+        datablock_stats.configure(addon_prefs.accountingEnabled)
+    except Exception:
+        datablock_stats.configure(False)
 
 def register():
     for cls in classes:
         bpy.utils.register_class(cls)
 
-    bpy.types.Scene.auto_koda_garment_hue_files = bpy.props.CollectionProperty(
-        type=garment_hue.Auto_Koda_GarmentHueItem
-    )
+    _setup_logging()
+    _setup_profiling()
+    _setup_accounting()
+
     bpy.types.Scene.auto_koda_garment_hue_selection = bpy.props.StringProperty(
         name="Garment Hue File",
         description="Type to filter, or select a file from resources/art/dynamic/garmenthue/",
+        search=garment_hue.search_garment_hue_files,
     )
 
-    bpy.app.timers.register(_initial_garment_hue_refresh, first_interval=0.1)
+    bpy.types.Scene.auto_koda_garment_hue_shared = bpy.props.BoolProperty(
+        name="Shared Palette Group",
+        description="Keep the palette values in one node group per file and palette, linked into every Koda material, so editing it recolours them all at once",
+        default=False,
+    )
+
+    bpy.types.Scene.auto_koda_preset_selection = bpy.props.StringProperty(
+        name="Koda Preset",
+        description="Preset to apply, from the Koda preset library",
+        search=koda_presets.search_presets,
+    )
+
+    bpy.types.Scene.auto_koda_adaptive_subsurf = bpy.props.BoolProperty(
+        name="Adaptive Subsurf",
+        description="Lower the viewport level of Subdivision Surface modifiers on objects that are small on screen. Render levels are not changed",
+        default=False,
+        update=adaptive_subsurf.update_enabled,
+    )
+    adaptive_subsurf.register_handlers()
+    material_index.register_handlers()
+
+    bpy.app.timers.register(prefs.path_status_timer, first_interval=0.1, persistent=True)
 
 def unregister():
+    if bpy.app.timers.is_registered(prefs.path_status_timer):
+        bpy.app.timers.unregister(prefs.path_status_timer)
+    adaptive_subsurf.stop()
+    adaptive_subsurf.unregister_handlers()
+    material_index.unregister_handlers()
+    del bpy.types.Scene.auto_koda_adaptive_subsurf
+    del bpy.types.Scene.auto_koda_preset_selection
+    del bpy.types.Scene.auto_koda_garment_hue_shared
     del bpy.types.Scene.auto_koda_garment_hue_selection
-    del bpy.types.Scene.auto_koda_garment_hue_files
 
     for cls in reversed(classes):
-        bpy.utils.unregister_class(cls)
\ No newline at end of file
+        bpy.utils.unregister_class(cls)
+
+    log.teardown()
\ No newline at end of file
@@ -0,0 +1,276 @@
+"""Adaptive viewport subdivision: a timer lowers the viewport level of
+Subdivision Surface modifiers on objects that are small on screen, so crowd
+shots don't pay full subdivision cost for characters far from the camera.
+
+Each tick re-evaluates at most config.ADAPTIVE_SUBSURF_OBJECTS_PER_TICK
+objects, continuing round-robin from where the previous tick stopped. Only
+`levels` (viewport) is changed, never `render_levels`. The level the user
+had set is kept in an object custom property; it is the upper limit while
+adaptive mode is on and is put back when it is turned off."""
+
+import math
+import bpy  # type: ignore
+from mathutils import Vector  # type: ignore
+from . import config, log
+
+LEVELS_PROPERTY = "auto_koda_subsurf_levels"
+
+# The viewport camera uses a 72mm sensor equivalent (36mm at 2x zoom)
+_VIEWPORT_HALF_SENSOR = 36.0
+
+_cursor = 0
+
+# Candidate object names, None until the next tick rebuilds them, and
+# objects updated since (re-checked on the next tick)
+_candidate_names = None
+_candidate_scene = None
+_dirty = set()
+
+
+def _subsurf_modifiers(obj):
+    return [mod for mod in obj.modifiers if mod.type == 'SUBSURF']
+
+
+def _view3d_areas(context):
+    """VIEW_3D areas of the context's screen (operators), or of every open
+    window's screen (timers run without a screen in their context)."""
+    screen = getattr(context, "screen", None)
+    if screen is not None:
+        screens = [screen]
+    else:
+        window_manager = getattr(context, "window_manager", None)
+        windows = window_manager.windows if window_manager is not None else []
+        screens = [window.screen for window in windows if window.screen is not None]
+    return [area for screen in screens for area in screen.areas if area.type == 'VIEW_3D']
+
+
+def _find_viewport(context):
+    """The largest 3D viewport, as (space, region_3d)."""
+    areas = _view3d_areas(context)
+    if not areas:
+        return None, None
+    area = max(areas, key=lambda area: area.width * area.height)
+    space = area.spaces.active
+    return space, space.region_3d
+
+
+def find_viewpoint(context, scene):
+    """Returns (origin, tan_half_fov, ortho_half_size) for the view the
+    screen size is measured against, or None if there is no view. Exactly
+    one of tan_half_fov / ortho_half_size is set."""
+    space, rv3d = _find_viewport(context)
+
+    if rv3d is not None and rv3d.view_perspective != 'CAMERA':
+        origin = rv3d.view_matrix.inverted().translation
+        if rv3d.is_perspective:
+            return origin, _VIEWPORT_HALF_SENSOR / space.lens, None
+        return origin, None, rv3d.view_distance
+
+    camera = scene.camera
+    if camera is None:
+        return None
+    origin = camera.matrix_world.translation
+    if camera.type == 'CAMERA' and camera.data.type == 'ORTHO':
+        return origin, None, camera.data.ortho_scale / 2.0
+    angle = camera.data.angle if camera.type == 'CAMERA' else math.radians(50.0)
+    return origin, math.tan(angle / 2.0), None
+
+
+def screen_fraction(obj, viewpoint):
+    """Approximate height of the object's bounding sphere as a fraction of
+    the view height (1.0 fills the view)."""
+    origin, tan_half_fov, ortho_half_size = viewpoint
+    corners = [obj.matrix_world @ Vector(corner) for corner in obj.bound_box]
+    center = sum(corners, Vector()) / len(corners)
+    radius = max((corner - center).length for corner in corners)
+
+    if ortho_half_size is not None:
+        return radius / max(ortho_half_size, 1e-6)
+    distance = (center - origin).length
+    if distance <= radius:
+        return 1.0
+    return radius / (distance * tan_half_fov)
+
+
+def level_for_fraction(fraction):
+    for min_fraction, level in config.ADAPTIVE_SUBSURF_BANDS:
+        if fraction >= min_fraction:
+            return level
+    return 0
+
+
+def _user_levels(obj, mods):
+    """The viewport levels the user set, recorded the first time adaptive
+    mode touches the object."""
+    stored = obj.get(LEVELS_PROPERTY)
+    stored = dict(stored) if stored is not None else {}
+    missing = [mod for mod in mods if mod.name not in stored]
+    if missing:
+        for mod in missing:
+            stored[mod.name] = mod.levels
+        obj[LEVELS_PROPERTY] = stored
+    return stored
+
+
+def update_object(obj, viewpoint):
+    """Sets the viewport level of every subsurf modifier on obj from its
+    screen size. Returns the number of modifiers changed."""
+    mods = _subsurf_modifiers(obj)
+    if not mods:
+        return 0
+    user_levels = _user_levels(obj, mods)
+    band_level = level_for_fraction(screen_fraction(obj, viewpoint))
+
+    changed = 0
+    for mod in mods:
+        level = min(band_level, user_levels[mod.name])
+        if mod.levels != level:
+            mod.levels = level
+            changed += 1
+    return changed
+
+
+def _is_candidate(obj):
+    return obj is not None and obj.type == 'MESH' and obj.visible_get() and bool(_subsurf_modifiers(obj))
+
+
+def _candidates(scene):
+    """Names of the visible meshes with subsurf modifiers. Kept between
+    ticks: a Scene or Collection update (objects added, removed, hidden)
+    drops the list, and updated objects are re-checked one by one, so a
+    tick only pays for what changed."""
+    global _candidate_names, _candidate_scene
+    if _candidate_names is None or _candidate_scene != scene.name:
+        _candidate_names = [obj.name for obj in scene.objects if _is_candidate(obj)]
+        _candidate_scene = scene.name
+        _dirty.clear()
+    elif _dirty:
+        names = set(_candidate_names)
+        for name in _dirty:
+            if _is_candidate(scene.objects.get(name)):
+                if name not in names:
+                    _candidate_names.append(name)
+            elif name in names:
+                _candidate_names.remove(name)
+        _dirty.clear()
+    return _candidate_names
+
+
+def invalidate():
+    global _candidate_names
+    _candidate_names = None
+    _dirty.clear()
+
+
+@bpy.app.handlers.persistent
+def on_depsgraph_update(_scene, depsgraph):
+    if _candidate_names is None:
+        return
+    for entry in depsgraph.updates:
+        id_data = entry.id
+        if isinstance(id_data, (bpy.types.Scene, bpy.types.Collection)):
+            invalidate()
+            return
+        if isinstance(id_data, bpy.types.Object):
+            _dirty.add(id_data.original.name)
+
+
+def _tick():
+    global _cursor
+    context = bpy.context
+    scene = context.scene
+    if scene is None or not scene.auto_koda_adaptive_subsurf:
+        return None
+
+    viewpoint = find_viewpoint(context, scene)
+    names = _candidates(scene)
+    if viewpoint is None or not names:
+        return config.ADAPTIVE_SUBSURF_INTERVAL
+
+    count = min(config.ADAPTIVE_SUBSURF_OBJECTS_PER_TICK, len(names))
+    _cursor %= len(names)
+    changed = 0
+    for i in range(count):
+        obj = scene.objects.get(names[(_cursor + i) % len(names)])
+        if obj is None:
+            # Renamed or gone without a Scene update
+            invalidate()
+            continue
+        changed += update_object(obj, viewpoint)
+    _cursor += count
+
+    if changed:
+        log.debug("Adaptive subsurf: changed %d modifier level(s)", changed)
+    return config.ADAPTIVE_SUBSURF_INTERVAL
+
+
+def restore_levels(scene):
+    """Puts back the levels recorded on every object in the scene and drops
+    the records. Returns the number of modifiers restored."""
+    restored = 0
+    for obj in scene.objects:
+        stored = obj.get(LEVELS_PROPERTY)
+        if stored is None:
+            continue
+        for mod in _subsurf_modifiers(obj):
+            if mod.name in stored:
+                mod.levels = stored[mod.name]
+                restored += 1
+        del obj[LEVELS_PROPERTY]
+    return restored
+
+
+def start():
+    if not bpy.app.timers.is_registered(_tick):
+        bpy.app.timers.register(_tick, first_interval=config.ADAPTIVE_SUBSURF_INTERVAL)
+
+
+def stop():
+    if bpy.app.timers.is_registered(_tick):
+        bpy.app.timers.unregister(_tick)
+    invalidate()
+
+
+def update_enabled(self, context):
+    """Update callback of Scene.auto_koda_adaptive_subsurf."""
+    if self.auto_koda_adaptive_subsurf:
+        start()
+        log.info("Adaptive subsurf on")
+    else:
+        stop()
+        restored = restore_levels(self)
+        log.info("Adaptive subsurf off, restored %d modifier level(s)", restored)
+
+
+@bpy.app.handlers.persistent
+def on_load_post(*_args):
+    invalidate()
+    scene = bpy.context.scene
+    if scene is not None and scene.auto_koda_adaptive_subsurf:
+        start()
+
+
+@bpy.app.handlers.persistent
+def on_undo(*_args):
+    invalidate()
+
+
+HANDLERS = (
+    ("depsgraph_update_post", on_depsgraph_update),
+    ("load_post", on_load_post),
+    ("undo_post", on_undo),
+    ("redo_post", on_undo),
+)
+
+
+def register_handlers():
+    for name, handler in HANDLERS:
+        getattr(bpy.app.handlers, name).append(handler)
+
+
+def unregister_handlers():
+    for name, handler in HANDLERS:
+        handlers = getattr(bpy.app.handlers, name)
+        if handler in handlers:
+            handlers.remove(handler)
+    invalidate()
@@ -0,0 +1,280 @@
+"""Material pipeline benchmark in plain CPython, on the fake_bpy stand-in.
+
+Builds N objects x M slots of Hero Gravitas and HeroEngine materials in
+fake_bpy. The Koda templates are registered as the contents of the
+default Shaders.blend. The benchmark then times the add-on's own code:
+
+    process_objects               material conversion to Koda
+    apply_garment_hue_to_objects  palette file applied to the converted materials
+    apply_preset                  Koda preset applied to the converted materials
+    run_override_sync             value sync and link on the override object
+    upgrade_materials             re-templating after the templates change
+
+It then checks that every slot ended up on a Koda material. No Blender
+needed, so scales of 100k slots are practical:
+
+    python benchmarks/bench_fake_pipeline.py [--objects 100 1000] [--slots 4] [--output results.json]
+
+Timings cover the Python side only; Blender's own cost for the same calls
+(library loads, datablock copies) isn't modelled. Use bench_suite.py for that.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import types
+from importlib import import_module
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import fake_bpy  # noqa: E402
+
+bpy = fake_bpy.install()
+
+from bench_merge import ADDON_DIR  # noqa: E402
+from synthetic_scene import OVERRIDE_GROUP, write_garment_hue_folder  # noqa: E402
+
+PACKAGE = "autokoda"
+
+MODULES = ("config", "conversion", "garment_hue_xml", "koda_presets", "overrides", "template_versions", "log")
+
+# Inputs of every stand-in Koda group besides the palette ones
+KODA_EXTRA_INPUTS = (
+    ("Specular Strength", "NodeSocketFloatFactor"),
+    ("Roughness", "NodeSocketFloat"),
+    ("Direction Map", "NodeSocketColor"),
+    ("Use Age", "NodeSocketBool"),
+)
+
+
+def _load_modules():
+    if PACKAGE not in sys.modules:
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [ADDON_DIR]
+        sys.modules[PACKAGE] = package
+    return {name: import_module(f"{PACKAGE}.{name}") for name in MODULES}
+
+
+def _socket_type(koda_input):
+    if "Specular" in koda_input and "Palette" in koda_input:
+        return "NodeSocketColor"
+    return "NodeSocketFloat"
+
+
+def koda_interface(config):
+    inputs = [(name, _socket_type(name)) for name in config.HERO_ENGINE_PROP_TO_KODA_INPUT.values()]
+    return inputs + list(KODA_EXTRA_INPUTS)
+
+
+# Bumped to change the templates, as an edited Shaders.blend would
+TEMPLATE_REVISION = {"value": 0}
+
+
+def register_koda_templates(config):
+    """Makes the default Shaders.blend offer one template material per
+    Koda group: the group node, its Image Texture nodes and an output.
+    From revision 1 on, the templates also have a Mix node."""
+    interface = koda_interface(config)
+    trees = {}
+
+    def factory(group_name):
+        def build(library):
+            tree = trees.get(group_name)
+            if tree is None or tree.library is not library:
+                tree = trees[group_name] = fake_bpy.group_tree(group_name, interface, library=library)
+            mat = fake_bpy.Material(f"{group_name} Template")
+            nodes = mat.node_tree.nodes
+            group = nodes.new("ShaderNodeGroup")
+            group.node_tree = tree
+            for koda_name in config.HERO_GRAVITAS_TEX_NAMES.values():
+                nodes.new("ShaderNodeTexImage").name = koda_name
+            output = nodes.new("ShaderNodeOutputMaterial")
+            output.inputs.new("NodeSocketShader", "Surface", node=output)
+            mat.node_tree.links.new(group.outputs["Shader"], output.inputs["Surface"])
+            if TEMPLATE_REVISION["value"]:
+                nodes.new("ShaderNodeMix").inputs.new("NodeSocketFloatFactor", "Factor", 0.5)
+            return mat
+        return build
+
+    fake_bpy.register_library(config.DEFAULT_SHADERS, {
+        f"{name} Template": factory(name) for name in config.KODA_NODE_NAMES.values()
+    })
+
+
+def _image(name):
+    image = bpy.data.images.get(name)
+    return image if image is not None else bpy.data.images.new(name)
+
+
+def build_material_scene(config, objects, slots, hero_engine_share=0.25, seed=0):
+    rng = random.Random(seed)
+    keys = sorted(config.HERO_GRAVITAS_NODE_NAMES)
+    interface = koda_interface(config)
+    hero_groups = {key: fake_bpy.group_tree(config.HERO_GRAVITAS_NODE_NAMES[key], interface) for key in keys}
+
+    created = []
+    stats = {"hero_gravitas_materials": 0, "hero_engine_materials": 0}
+    for index in range(objects):
+        materials = []
+        for slot in range(slots):
+            key = keys[(index + slot) % len(keys)]
+            mat = bpy.data.materials.new(f"bench_{index:05d}_{slot}")
+            nodes = mat.node_tree.nodes
+            if rng.random() < hero_engine_share:
+                node = nodes.new(config.HERO_ENGINE_NODE_TYPE)
+                node.derived = key
+                for prop in config.HERO_ENGINE_PROP_TO_KODA_INPUT:
+                    setattr(node, prop, [rng.random()] * 4 if "specular" in prop else rng.random())
+                for field in config.HERO_ENGINE_TEX_FIELDS:
+                    setattr(node, field, _image(f"bench_{field}_{index % 50}"))
+                stats["hero_engine_materials"] += 1
+            else:
+                group = nodes.new("ShaderNodeGroup")
+                group.node_tree = hero_groups[key]
+                for socket in group.inputs:
+                    if socket.type == 'VALUE':
+                        socket.default_value = rng.random()
+                for hero_name in config.HERO_GRAVITAS_TEX_NAMES:
+                    tex = nodes.new("ShaderNodeTexImage")
+                    tex.name = hero_name
+                    tex.image = _image(f"bench{hero_name.replace(' ', '_')}_{index % 50}")
+                stats["hero_gravitas_materials"] += 1
+            materials.append(mat)
+        created.append(fake_bpy.mesh_object(f"bench_obj_{index:05d}", materials))
+    return created, stats
+
+
+def build_override_scene(config, slots):
+    pair = config.Shader_Pairs[0]
+    master_tree = next(tree for tree in bpy.data.node_groups if tree.name == pair["master_name"])
+    outputs = [(s.name, type(s).__name__) for s in master_tree.interface_inputs]
+    override_tree = fake_bpy.group_tree(OVERRIDE_GROUP, [], outputs=outputs)
+
+    materials = []
+    for slot in range(slots):
+        mat = bpy.data.materials.new(f"bench_override_{slot}")
+        master = mat.node_tree.nodes.new("ShaderNodeGroup")
+        master.node_tree = master_tree
+        override = mat.node_tree.nodes.new("ShaderNodeGroup")
+        override.node_tree = override_tree
+        materials.append(mat)
+    obj = fake_bpy.mesh_object("bench_override", materials)
+    bpy.context.object = obj
+    return obj
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return round(time.perf_counter() - start, 4), result
+
+
+def unconverted_slots(config, objects):
+    koda_names = set(config.KODA_NODE_NAMES.values())
+    return sum(
+        1 for obj in objects for mat in obj.data.materials
+        if not any(node.type == 'GROUP' and node.node_tree and node.node_tree.name in koda_names
+                   for node in mat.node_tree.nodes)
+    )
+
+
+def _koda_values(config, mat):
+    koda_names = config.KODA_NODE_NAMES.values()
+    return [
+        socket.default_value for node in mat.node_tree.nodes
+        if node.type == 'GROUP' and node.node_tree and node.node_tree.name in koda_names
+        for socket in node.inputs if not socket.is_linked
+    ] + [node.image for node in mat.node_tree.nodes if node.type == 'TEX_IMAGE']
+
+
+def run_scale(modules, objects, slots, garment_hue_name, seed):
+    config, conversion, garment_hue_xml, koda_presets, overrides, template_versions, log = (
+        modules[name] for name in MODULES
+    )
+    TEMPLATE_REVISION["value"] = 0
+    fake_bpy.reset()
+    fake_bpy.set_addon_preferences(PACKAGE, shadersPath="", resourcesPath=RESOURCES)
+
+    scene_objects, stats = build_material_scene(config, objects, slots, seed=seed)
+    row = {"objects": objects, "slots": slots, **stats}
+
+    row["process_objects_s"], _ = _timed(conversion.process_objects, scene_objects)
+    row["unconverted_slots"] = unconverted_slots(config, scene_objects)
+    row["apply_garment_hue_s"], (_files, row["garment_hue_nodes"]) = _timed(
+        garment_hue_xml.apply_garment_hue_to_objects, scene_objects, garment_hue_name, 1
+    )
+    koda_node = next(
+        node for node in scene_objects[0].data.materials[0].node_tree.nodes
+        if node.type == 'GROUP' and node.node_tree.name in config.KODA_NODE_NAMES.values()
+    )
+    koda_presets.save_preset("bench", koda_node)
+    preset_group = koda_node.node_tree.name
+    row["apply_preset_s"], (row["preset_nodes"], _values) = _timed(
+        koda_presets.apply_preset, "bench", koda_presets.materials_of(scene_objects)
+    )
+    row["preset_nodes_expected"] = sum(
+        1 for obj in scene_objects for mat in obj.data.materials for node in mat.node_tree.nodes
+        if node.type == 'GROUP' and node.node_tree.name == preset_group
+    )
+
+    build_override_scene(config, slots * objects)
+    row["run_override_sync_s"], _ = _timed(overrides.run_override_sync, True, True)
+
+    scene_materials = koda_presets.materials_of(scene_objects)
+    values_before = [_koda_values(config, mat) for mat in scene_materials]
+    TEMPLATE_REVISION["value"] = 1
+    row["upgrade_materials_s"], (row["outdated"], row["upgraded"], _stamped) = _timed(
+        template_versions.upgrade_materials, scene_materials
+    )
+    values_after = [_koda_values(config, mat) for mat in koda_presets.materials_of(scene_objects)]
+    row["upgrade_values_kept"] = values_before == values_after
+    row["unconverted_slots_after_upgrade"] = unconverted_slots(config, scene_objects)
+
+    row["counters"] = log.flush_counters()
+    return row
+
+
+RESOURCES = tempfile.mkdtemp(prefix="autokoda_fake_bench_")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objects", type=int, nargs="+", default=[100, 1000], help="Object counts to run")
+    parser.add_argument("--slots", type=int, default=4, help="Material slots per object")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write all results to this JSON file")
+    args = parser.parse_args(argv)
+
+    modules = _load_modules()
+    modules["log"].set_level('ERROR')
+    register_koda_templates(modules["config"])
+    garment_hue_names = write_garment_hue_folder(RESOURCES, modules["config"].GARMENT_HUE_SUBPATH, 20, seed=args.seed)
+
+    rows = []
+    for objects in args.objects:
+        row = run_scale(modules, objects, args.slots, garment_hue_names[0], args.seed)
+        rows.append(row)
+        print(json.dumps(row))
+        if row["unconverted_slots"]:
+            print(f"{row['unconverted_slots']} slot(s) were not converted", file=sys.stderr)
+
+    if args.output:
+        report = {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "args": vars(args),
+            "results": rows,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    return rows
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
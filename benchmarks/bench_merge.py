@@ -0,0 +1,163 @@
+"""Merge-by-distance benchmark: spatial-hash merge vs bmesh.ops.remove_doubles.
+
+Builds a triangulated grid where every triangle has its own three vertices
+(the worst case an import can produce) and merges it back together.
+
+    python benchmarks/bench_merge.py [--sizes 100 300 1000]
+        times only the NumPy stage (mesh_arrays), no Blender needed
+
+    blender --background --factory-startup --python benchmarks/bench_merge.py -- [--sizes ...]
+        additionally times both full merge stages on a real mesh
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MERGE_DISTANCE = 0.00001
+
+try:
+    import bpy  # type: ignore
+except ImportError:
+    bpy = None
+
+
+def _load_module(name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ADDON_DIR, f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _load_addon_package():
+    """Imports the add-on as package 'autokoda' straight from the checkout."""
+    spec = importlib.util.spec_from_file_location(
+        "autokoda", os.path.join(ADDON_DIR, "__init__.py"),
+        submodule_search_locations=[ADDON_DIR],
+    )
+    package = importlib.util.module_from_spec(spec)
+    sys.modules["autokoda"] = package
+    spec.loader.exec_module(package)
+    return package
+
+
+def split_grid(size, spacing=0.01):
+    """Returns (positions, corner_verts, face_starts) of a size x size quad
+    grid split into triangles that share no vertices."""
+    xs, ys = np.meshgrid(np.arange(size + 1), np.arange(size + 1), indexing="ij")
+    grid = np.stack([xs.ravel() * spacing, ys.ravel() * spacing, np.zeros(xs.size)], axis=1)
+
+    i, j = np.meshgrid(np.arange(size), np.arange(size), indexing="ij")
+    i = i.ravel()
+    j = j.ravel()
+    index = lambda a, b: a * (size + 1) + b
+    tris = np.concatenate([
+        np.stack([index(i, j), index(i + 1, j), index(i + 1, j + 1)], axis=1),
+        np.stack([index(i, j), index(i + 1, j + 1), index(i, j + 1)], axis=1),
+    ])
+
+    positions = grid[tris.ravel()]
+    corner_verts = np.arange(len(positions), dtype=np.int32)
+    face_starts = np.arange(0, len(positions), 3, dtype=np.int32)
+    return positions, corner_verts, face_starts
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def bench_arrays(mesh_arrays, size):
+    positions, corner_verts, face_starts = split_grid(size)
+    seconds, (vert_src, vert_map) = _timed(mesh_arrays.merge_by_distance, positions, MERGE_DISTANCE)
+    remap_seconds, _faces = _timed(mesh_arrays.remap_faces, corner_verts, face_starts, vert_map)
+    return {
+        "verts_in": len(positions),
+        "verts_out": len(vert_src),
+        "hash_arrays_s": round(seconds + remap_seconds, 4),
+    }
+
+
+def _new_mesh_object(name, positions, corner_verts, face_starts):
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(positions))
+    mesh.loops.add(len(corner_verts))
+    mesh.polygons.add(len(face_starts))
+    mesh.vertices.foreach_set("co", positions.astype(np.float32).ravel())
+    mesh.loops.foreach_set("vertex_index", corner_verts)
+    mesh.polygons.foreach_set("loop_start", face_starts)
+    mesh.update(calc_edges=True)
+    uv = mesh.uv_layers.new(name="UVMap")
+    uv.data.foreach_set("uv", positions[corner_verts, :2].astype(np.float32).ravel())
+    obj = bpy.data.objects.new(name, mesh)
+    bpy.context.scene.collection.objects.link(obj)
+    return obj
+
+
+def bench_blender(mesh_utils, size):
+    import bmesh  # type: ignore
+
+    positions, corner_verts, face_starts = split_grid(size)
+    results = {}
+
+    obj = _new_mesh_object("bench_bmesh", positions, corner_verts, face_starts)
+
+    def bmesh_merge(mesh):
+        bm = bmesh.new()
+        bm.from_mesh(mesh)
+        bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=MERGE_DISTANCE)
+        bm.to_mesh(mesh)
+        bm.free()
+
+    results["bmesh_s"], _ = _timed(bmesh_merge, obj.data)
+    results["bmesh_verts_out"] = len(obj.data.vertices)
+
+    obj = _new_mesh_object("bench_hash", positions, corner_verts, face_starts)
+    results["hash_s"], _ = _timed(mesh_utils.merge_vertices_by_hash, obj.data, MERGE_DISTANCE)
+    results["hash_verts_out"] = len(obj.data.vertices)
+    results["speedup"] = round(results["bmesh_s"] / max(results["hash_s"], 1e-9), 2)
+    results["bmesh_s"] = round(results["bmesh_s"], 4)
+    results["hash_s"] = round(results["hash_s"], 4)
+    return results
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 300, 1000],
+                        help="Grid resolutions to run (size^2 * 6 input vertices each)")
+    args = parser.parse_args(argv)
+
+    if bpy is not None:
+        package = _load_addon_package()
+        from importlib import import_module
+        mesh_arrays = import_module(f"{package.__name__}.mesh_arrays")
+        mesh_utils = import_module(f"{package.__name__}.mesh_utils")
+    else:
+        mesh_arrays = _load_module("mesh_arrays")
+        mesh_utils = None
+
+    rows = []
+    for size in args.sizes:
+        row = {"size": size}
+        row.update(bench_arrays(mesh_arrays, size))
+        if mesh_utils is not None:
+            row.update(bench_blender(mesh_utils, size))
+        rows.append(row)
+        print(json.dumps(row))
+
+    return rows
+
+
+if __name__ == "__main__":
+    if "--" in sys.argv:
+        argv = sys.argv[sys.argv.index("--") + 1:]
+    else:
+        argv = [] if bpy is not None else sys.argv[1:]
+    main(argv)
@@ -0,0 +1,183 @@
+"""Throughput of the array mesh preparation stages across worker counts,
+and their parity with the BMesh method.
+
+Runs mesh_arrays.prepare (merge + tris to quads) over a batch of synthetic
+split-triangle grids, flat and displaced, serially and through
+mesh_workers with increasing process counts. It checks every parallel
+result matches the serial one. Each row reports the speedup over the
+first worker count and the machine's core count: scaling only shows
+when there are at least as many cores as workers. Needs only NumPy:
+
+    python benchmarks/bench_parallel.py [--meshes 32] [--size 150] [--workers 1 2 4 8]
+
+Under Blender it also runs prepare_meshes on the same meshes with the
+BMESH method (remove_doubles + bmesh.ops.join_triangles) and with ARRAY
+at each worker count. Vertex, edge and face counts and the topology (each
+face as its set of vertex positions) must match:
+
+    blender --background --factory-startup --python benchmarks/bench_parallel.py -- [--meshes 8] [--size 60]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import types
+from importlib import import_module
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_merge import ADDON_DIR, MERGE_DISTANCE, split_grid  # noqa: E402
+
+try:
+    import bpy  # type: ignore
+except ImportError:
+    bpy = None
+
+PACKAGE = "autokoda"
+
+
+def _load_without_bpy():
+    """Registers the add-on directory as a bare package, so its bpy-free
+    modules import without running __init__ (which needs bpy)."""
+    if PACKAGE not in sys.modules:
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [ADDON_DIR]
+        sys.modules[PACKAGE] = package
+    return import_module(f"{PACKAGE}.mesh_arrays"), import_module(f"{PACKAGE}.mesh_workers")
+
+
+def synthetic_mesh(size, displaced=False):
+    """A split-triangle grid, optionally with a height field so the
+    tris-to-quads angle limits have something to decide."""
+    positions, corner_verts, face_starts = split_grid(size)
+    if displaced:
+        x = positions[:, 0]
+        y = positions[:, 1]
+        positions = positions.copy()
+        positions[:, 2] = 0.02 * np.sin(x * 40.0) * np.cos(y * 25.0)
+    return positions, corner_verts, face_starts
+
+
+def make_payload(size, displaced=False):
+    positions, corner_verts, face_starts = synthetic_mesh(size, displaced)
+    return {
+        "positions": positions.astype(np.float32),
+        "corner_verts": corner_verts,
+        "face_starts": face_starts,
+        "edge_verts": np.empty((0, 2), dtype=np.int32),
+        "seams": np.empty(0, dtype=bool),
+        "sharp_edges": np.empty(0, dtype=bool),
+        "face_materials": np.zeros(len(face_starts), dtype=np.int32),
+        "uv_layers": [positions[corner_verts, :2].astype(np.float32)],
+        "color_layers": [],
+        "corner_normals": None,
+        "merge_distance": MERGE_DISTANCE,
+        "join": True,
+        "angle_face": np.radians(40.0),
+        "angle_shape": np.radians(40.0),
+        "uv_tolerance": 1e-5,
+        "normal_tolerance": 1e-3,
+        "mark_splits": False,
+    }
+
+
+def _topology(mesh):
+    """Counts, and the faces as a multiset of vertex position sets, which
+    doesn't depend on vertex or face order."""
+    positions = [tuple(round(c, 5) for c in vert.co) for vert in mesh.vertices]
+    faces = sorted(
+        tuple(sorted(positions[index] for index in poly.vertices)) for poly in mesh.polygons
+    )
+    return len(mesh.vertices), len(mesh.edges), len(mesh.polygons), faces
+
+
+def check_bmesh_parity(meshes, size, worker_counts):
+    """prepare_meshes with BMESH vs ARRAY at each worker count, on the
+    same synthetic meshes. Returns one row per worker count."""
+    from bench_merge import _load_addon_package, _new_mesh_object
+
+    _load_addon_package()
+    mesh_utils = import_module(f"{PACKAGE}.mesh_utils")
+    sources = [synthetic_mesh(size, displaced=index % 2 == 1) for index in range(meshes)]
+
+    def build(prefix):
+        return [_new_mesh_object(f"{prefix}_{index}", *source) for index, source in enumerate(sources)]
+
+    reference = build("parity_bmesh")
+    mesh_utils.prepare_meshes(reference, use_smooth_modifier=False, merge_method='BMESH')
+    expected = [_topology(obj.data) for obj in reference]
+
+    rows = []
+    for workers in worker_counts:
+        objects = build(f"parity_array_{workers}")
+        mesh_utils.prepare_meshes(objects, use_smooth_modifier=False, merge_method='ARRAY', workers=workers)
+        got = [_topology(obj.data) for obj in objects]
+        mismatched = [index for index, (a, b) in enumerate(zip(expected, got)) if a != b]
+        row = {
+            "workers": workers,
+            "meshes": meshes,
+            "bmesh_counts": [list(t[:3]) for t in expected],
+            "array_counts": [list(t[:3]) for t in got],
+            "matches_bmesh": not mismatched,
+            "mismatched_meshes": mismatched,
+        }
+        rows.append(row)
+        print(json.dumps(row))
+    return rows
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--meshes", type=int, default=32)
+    parser.add_argument("--size", type=int, default=150, help="Grid resolution of each mesh")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args(argv)
+
+    mesh_arrays, mesh_workers = _load_without_bpy()
+    payloads = [make_payload(args.size, displaced=index % 2 == 1) for index in range(args.meshes)]
+    total_verts = sum(len(p["positions"]) for p in payloads)
+    cores = os.cpu_count() or 1
+    if cores < max(args.workers):
+        print(f"Only {cores} core(s): worker counts above that can't show scaling", file=sys.stderr)
+
+    reference = None
+    first_seconds = None
+    rows = []
+    for workers in args.workers:
+        start = time.perf_counter()
+        results = dict(mesh_workers.run(mesh_arrays.prepare, payloads, workers=workers))
+        seconds = time.perf_counter() - start
+
+        if reference is None:
+            reference = results
+            first_seconds = seconds
+        matches = all(
+            np.array_equal(reference[i][key], results[i][key])
+            for i in reference for key in reference[i]
+        )
+
+        row = {
+            "workers": workers,
+            "cores": cores,
+            "meshes": args.meshes,
+            "verts": total_verts,
+            "seconds": round(seconds, 4),
+            "verts_per_s": int(total_verts / seconds),
+            "speedup": round(first_seconds / seconds, 2),
+            "matches_serial": matches,
+        }
+        rows.append(row)
+        print(json.dumps(row))
+
+    if bpy is not None:
+        rows += check_bmesh_parity(min(args.meshes, 8), min(args.size, 60), args.workers)
+
+    return rows
+
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    main(argv)
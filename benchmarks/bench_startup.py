@@ -0,0 +1,100 @@
+"""Add-on startup cost: importing the package and running register().
+
+Reports how long each step takes, which of the add-on's modules and which
+heavy dependencies (bmesh, NumPy, xml.etree) are loaded once registration
+is done, and what the first operator-style access through helpers costs
+afterwards. Needs Blender:
+
+    blender --background --factory-startup --python benchmarks/bench_startup.py -- [--repeat 5]
+
+Each repeat runs in a fresh Blender process for the numbers to mean
+anything, so --repeat re-launches this script and reports the median.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_merge import _load_addon_package  # noqa: E402
+
+HEAVY_MODULES = ("bmesh", "numpy", "xml.etree.ElementTree", "concurrent.futures")
+
+# A helpers lookup per implementation area, in the order an operator would
+# first need them
+FIRST_USE = ("process_objects", "prepare_meshes", "apply_garment_hue_to_objects")
+
+
+def measure_once():
+    before = set(sys.modules)
+
+    start = time.perf_counter()
+    package = _load_addon_package()
+    import_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    package.register()
+    register_s = time.perf_counter() - start
+
+    loaded = sorted(
+        name.split(".", 1)[1] for name in set(sys.modules) - before
+        if name.startswith(f"{package.__name__}.")
+    )
+    heavy = sorted(name for name in HEAVY_MODULES if name in sys.modules and name not in before)
+
+    from importlib import import_module
+    helpers = import_module(f"{package.__name__}.helpers")
+    first_use = {}
+    for name in FIRST_USE:
+        start = time.perf_counter()
+        getattr(helpers, name)
+        first_use[name] = round(time.perf_counter() - start, 4)
+
+    package.unregister()
+    return {
+        "import_s": round(import_s, 4),
+        "register_s": round(register_s, 4),
+        "startup_s": round(import_s + register_s, 4),
+        "modules_loaded": loaded,
+        "heavy_loaded_by_addon": heavy,
+        "first_use_s": first_use,
+    }
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=1, help="Fresh Blender processes to run")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.single or args.repeat <= 1:
+        row = measure_once()
+        print(json.dumps(row))
+        return row
+
+    import bpy  # type: ignore
+
+    runs = []
+    for _ in range(args.repeat):
+        output = subprocess.run(
+            [bpy.app.binary_path, "--background", "--factory-startup", "--python", os.path.abspath(__file__), "--", "--single"],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        rows = [line for line in output.splitlines() if line.startswith("{")]
+        runs.append(json.loads(rows[-1]))
+
+    row = dict(runs[-1])
+    for key in ("import_s", "register_s", "startup_s"):
+        row[key] = round(statistics.median(run[key] for run in runs), 4)
+    row["repeats"] = len(runs)
+    print(json.dumps(row))
+    return row
+
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    main(argv)
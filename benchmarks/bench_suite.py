@@ -0,0 +1,119 @@
+"""Headless benchmark suite for the add-on's main batch operations.
+
+For every scale it rebuilds a synthetic scene (synthetic_scene.py) of
+N objects x M material slots on split-triangle meshes, plus a garmenthue
+folder and an override material set. It then times:
+
+    process_objects               material conversion (Hero Gravitas / HeroEngine -> Koda)
+    apply_garment_hue_to_objects  palette file applied to the converted materials
+    prepare_meshes                merge, tris to quads, auto smooth
+    run_override_sync             value sync and link on the override object
+
+Results go to stdout as one JSON line per scale, and with --output also
+to a JSON file, for comparing runs over time:
+
+    blender --background --factory-startup --python benchmarks/bench_suite.py -- \\
+        [--objects 10 50 200] [--slots 4] [--mesh-size 40] [--merge-method BMESH] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from importlib import import_module
+
+import bpy  # type: ignore
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import synthetic_scene  # noqa: E402
+from bench_merge import _load_addon_package  # noqa: E402
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return round(time.perf_counter() - start, 4), result
+
+
+def _point_resources_at(prefs, folder):
+    """Makes the add-on resolve its resources folder to `folder`. Outside
+    an enabled install there are no add-on preferences to set it in."""
+    prefs._resolve_resources_folder = lambda: (folder, None)
+    prefs.refresh_path_status()
+
+
+def run_scale(modules, objects, slots, mesh_size, merge_method, garment_hue_name, seed):
+    config, conversion, garment_hue_xml, mesh_utils, overrides, log = modules
+    synthetic_scene.reset_scene()
+
+    scene_objects, stats = synthetic_scene.build_material_scene(config, objects, slots, mesh_size, seed=seed)
+    row = {"objects": objects, "slots": slots, "mesh_size": mesh_size, **stats}
+
+    row["process_objects_s"], _ = _timed(conversion.process_objects, scene_objects)
+    row["apply_garment_hue_s"], (_files, row["garment_hue_nodes"]) = _timed(
+        garment_hue_xml.apply_garment_hue_to_objects, scene_objects, garment_hue_name, 1
+    )
+    row["prepare_meshes_s"], _ = _timed(
+        mesh_utils.prepare_meshes, scene_objects, use_smooth_modifier=False, merge_method=merge_method
+    )
+    row["verts_after_prepare"] = sum(len(obj.data.vertices) for obj in scene_objects)
+
+    synthetic_scene.build_override_scene(config, slots * objects)
+    row["run_override_sync_s"], _ = _timed(overrides.run_override_sync, True, True)
+
+    row["counters"] = log.flush_counters()
+    return row
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objects", type=int, nargs="+", default=[10, 50, 200], help="Object counts to run")
+    parser.add_argument("--slots", type=int, default=4, help="Material slots per object")
+    parser.add_argument("--mesh-size", type=int, default=40, help="Grid resolution of each mesh")
+    parser.add_argument("--merge-method", default='BMESH', help="prepare_meshes merge method")
+    parser.add_argument("--garment-hue-files", type=int, default=200, help="Files in the synthetic garmenthue folder")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write all results to this JSON file")
+    args = parser.parse_args(argv)
+
+    package = _load_addon_package()
+    names = ("config", "conversion", "garment_hue_xml", "mesh_utils", "overrides", "log", "prefs")
+    loaded = {name: import_module(f"{package.__name__}.{name}") for name in names}
+    loaded["log"].set_level('ERROR')
+
+    resources = tempfile.mkdtemp(prefix="autokoda_bench_")
+    garment_hue_names = synthetic_scene.write_garment_hue_folder(
+        resources, loaded["config"].GARMENT_HUE_SUBPATH, args.garment_hue_files, seed=args.seed
+    )
+    _point_resources_at(loaded["prefs"], resources)
+
+    modules = tuple(loaded[name] for name in names[:-1])
+    rows = []
+    for objects in args.objects:
+        row = run_scale(modules, objects, args.slots, args.mesh_size, args.merge_method,
+                        garment_hue_names[0], args.seed)
+        rows.append(row)
+        print(json.dumps(row))
+
+    if args.output:
+        report = {
+            "blender": bpy.app.version_string,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "args": vars(args),
+            "results": rows,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    return rows
+
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    main(argv)
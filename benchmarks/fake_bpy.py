@@ -0,0 +1,690 @@
+"""A small stand-in for `bpy`, enough to run the material conversion,
+garment hue and override code in plain CPython.
+
+It models the parts of bpy those modules use and nothing more:
+- node trees, nodes, sockets and links;
+- materials, images and libraries;
+- objects with their material slots and mesh material lists.
+
+User counts are tracked the same way Blender tracks them, so removal and
+remapping logic behaves as it does in Blender. Shapes and names follow the
+real API, so the add-on code runs unmodified.
+
+    import fake_bpy
+    bpy = fake_bpy.install()          # registers bpy, bpy.types, bpy.props, ...
+    fake_bpy.register_library(path, {"Template": factory})
+
+Not a faithful Blender: no depsgraph, no evaluation, no UI. The point is
+timing and checking the add-on's own algorithms at scales (100k+ slots)
+where launching Blender per run is too slow.
+"""
+
+import itertools
+import os
+import sys
+import tempfile
+import types
+from collections import defaultdict
+
+# --------------------------------------------------------------------------
+# Sockets
+# --------------------------------------------------------------------------
+
+
+class NodeSocket:
+    type = 'VALUE'
+    _default = 0.0
+
+    def __init__(self, name, node=None, default_value=None):
+        self.name = name
+        self.identifier = name
+        self.node = node
+        self.default_value = self._default if default_value is None else default_value
+        self.is_linked = False
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name!r}>"
+
+
+class NodeSocketFloat(NodeSocket):
+    pass
+
+
+class NodeSocketFloatFactor(NodeSocketFloat):
+    pass
+
+
+class NodeSocketInt(NodeSocket):
+    type = 'INT'
+    _default = 0
+
+
+class NodeSocketBool(NodeSocket):
+    type = 'BOOLEAN'
+    _default = False
+
+
+class NodeSocketVector(NodeSocket):
+    type = 'VECTOR'
+
+    def __init__(self, name, node=None, default_value=None):
+        super().__init__(name, node, list(default_value) if default_value is not None else [0.0, 0.0, 0.0])
+
+
+class NodeSocketColor(NodeSocket):
+    type = 'RGBA'
+
+    def __init__(self, name, node=None, default_value=None):
+        super().__init__(name, node, list(default_value) if default_value is not None else [0.8, 0.8, 0.8, 1.0])
+
+
+class NodeSocketShader(NodeSocket):
+    type = 'SHADER'
+
+    def __init__(self, name, node=None, default_value=None):
+        NodeSocket.__init__(self, name, node)
+        del self.default_value  # shader sockets have no value
+
+
+SOCKET_TYPES = {
+    cls.__name__: cls for cls in (
+        NodeSocketFloat, NodeSocketFloatFactor, NodeSocketInt, NodeSocketBool,
+        NodeSocketVector, NodeSocketColor, NodeSocketShader,
+    )
+}
+
+
+class SocketCollection(list):
+    def get(self, name, default=None):
+        for socket in self:
+            if socket.name == name:
+                return socket
+        return default
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            socket = self.get(key)
+            if socket is None:
+                raise KeyError(key)
+            return socket
+        return list.__getitem__(self, key)
+
+    def new(self, socket_type, name, default_value=None, node=None):
+        socket = SOCKET_TYPES[socket_type](name, node, default_value)
+        self.append(socket)
+        return socket
+
+
+def _copy_socket(socket, node):
+    if isinstance(socket, NodeSocketShader):
+        return type(socket)(socket.name, node)
+    value = socket.default_value
+    return type(socket)(socket.name, node, list(value) if isinstance(value, list) else value)
+
+
+# --------------------------------------------------------------------------
+# ID datablocks
+# --------------------------------------------------------------------------
+
+
+_session_uids = itertools.count(1)
+
+
+class ID:
+    _collection = None
+
+    def __init__(self, name):
+        self._name = name
+        self.session_uid = next(_session_uids)
+        self._props = {}
+        self.library = None
+        self.users = 0
+        self.use_fake_user = False
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        if self._collection is not None:
+            self._collection._rename(self, value)
+        else:
+            self._name = value
+
+    # Custom properties
+    def get(self, key, default=None):
+        return self._props.get(key, default)
+
+    def __getitem__(self, key):
+        return self._props[key]
+
+    def __setitem__(self, key, value):
+        self._props[key] = value
+
+    def __contains__(self, key):
+        return key in self._props
+
+    def keys(self):
+        return list(self._props)
+
+    def user_remap(self, new_id):
+        """Material users are the only ones the add-on remaps."""
+        for obj in data.objects:
+            materials = getattr(obj.data, "materials", None)
+            if materials is None:
+                continue
+            for index, mat in enumerate(materials):
+                if mat is self:
+                    materials[index] = new_id
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self._name!r}>"
+
+
+# --------------------------------------------------------------------------
+# Nodes and trees
+# --------------------------------------------------------------------------
+
+# bl_idname -> node.type for the built-in nodes the add-on looks at
+NODE_TYPES = {
+    "ShaderNodeGroup"          : 'GROUP',
+    "ShaderNodeTexImage"       : 'TEX_IMAGE',
+    "NodeGroupInput"           : 'GROUP_INPUT',
+    "NodeGroupOutput"          : 'GROUP_OUTPUT',
+    "ShaderNodeOutputMaterial" : 'OUTPUT_MATERIAL',
+    "ShaderNodeMix"            : 'MIX',
+}
+
+
+class Node:
+    def __init__(self, bl_idname, name=None):
+        self.bl_idname = bl_idname
+        self.type = NODE_TYPES.get(bl_idname, 'CUSTOM')
+        self.name = name or bl_idname
+        self.label = ""
+        self.location = (0.0, 0.0)
+        self.node_tree = None
+        self.image = None
+        self.inputs = SocketCollection()
+        self.outputs = SocketCollection()
+
+    def _sync_group_sockets(self):
+        """Group nodes mirror their tree's interface, as in Blender."""
+        tree = self.node_tree
+        if tree is None:
+            return
+        self.inputs = SocketCollection(_copy_socket(s, self) for s in tree.interface_inputs)
+        self.outputs = SocketCollection(_copy_socket(s, self) for s in tree.interface_outputs)
+
+    def __setattr__(self, attr, value):
+        object.__setattr__(self, attr, value)
+        if attr == "node_tree" and self.type == 'GROUP':
+            self._sync_group_sockets()
+
+    def __repr__(self):
+        return f"<Node {self.bl_idname} {self.name!r}>"
+
+
+class NodeCollection(list):
+    def __init__(self, tree):
+        super().__init__()
+        self._tree = tree
+
+    def new(self, bl_idname):
+        base = bl_idname.replace("ShaderNode", "").replace("NodeGroup", "Group ")
+        name = base
+        existing = {node.name for node in self}
+        index = 1
+        while name in existing:
+            name = f"{base}.{index:03d}"
+            index += 1
+        node = Node(bl_idname, name)
+        if node.type == 'GROUP_OUTPUT' and self._tree.interface_outputs:
+            node.inputs = SocketCollection(_copy_socket(s, node) for s in self._tree.interface_outputs)
+        elif node.type == 'GROUP_INPUT' and self._tree.interface_inputs:
+            node.outputs = SocketCollection(_copy_socket(s, node) for s in self._tree.interface_inputs)
+        self.append(node)
+        return node
+
+    def get(self, name, default=None):
+        for node in self:
+            if node.name == name:
+                return node
+        return default
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            node = self.get(key)
+            if node is None:
+                raise KeyError(key)
+            return node
+        return list.__getitem__(self, key)
+
+
+class NodeLink:
+    def __init__(self, from_socket, to_socket):
+        self.from_socket = from_socket
+        self.to_socket = to_socket
+        self.from_node = from_socket.node
+        self.to_node = to_socket.node
+
+
+class LinkCollection(list):
+    def new(self, from_socket, to_socket):
+        if isinstance(from_socket, NodeSocketShader) != isinstance(to_socket, NodeSocketShader):
+            raise RuntimeError("Cannot link sockets of incompatible types")
+        for link in [link for link in self if link.to_socket is to_socket]:
+            self.remove(link)
+        link = NodeLink(from_socket, to_socket)
+        to_socket.is_linked = True
+        from_socket.is_linked = True
+        self.append(link)
+        return link
+
+
+class NodeTree(ID):
+    def __init__(self, name, bl_idname='ShaderNodeTree'):
+        super().__init__(name)
+        self.bl_idname = bl_idname
+        self.nodes = NodeCollection(self)
+        self.links = LinkCollection()
+        # Interface sockets as prototypes: group nodes and group in/out
+        # nodes copy them
+        self.interface_inputs = SocketCollection()
+        self.interface_outputs = SocketCollection()
+
+    def copy_tree(self):
+        tree = NodeTree(self.name, self.bl_idname)
+        tree.interface_inputs = SocketCollection(_copy_socket(s, None) for s in self.interface_inputs)
+        tree.interface_outputs = SocketCollection(_copy_socket(s, None) for s in self.interface_outputs)
+        mapping = {}
+        for node in self.nodes:
+            new = Node(node.bl_idname, node.name)
+            for attr, value in vars(node).items():
+                if attr not in ("inputs", "outputs", "node_tree"):
+                    object.__setattr__(new, attr, value)
+            object.__setattr__(new, "node_tree", node.node_tree)
+            new.inputs = SocketCollection(_copy_socket(s, new) for s in node.inputs)
+            new.outputs = SocketCollection(_copy_socket(s, new) for s in node.outputs)
+            mapping.update(zip(map(id, node.inputs), new.inputs))
+            mapping.update(zip(map(id, node.outputs), new.outputs))
+            tree.nodes.append(new)
+        for link in self.links:
+            tree.links.new(mapping[id(link.from_socket)], mapping[id(link.to_socket)])
+        return tree
+
+
+# --------------------------------------------------------------------------
+# Datablocks and bpy.data collections
+# --------------------------------------------------------------------------
+
+
+class Library(ID):
+    def __init__(self, filepath):
+        super().__init__(filepath.replace("\\", "/").rsplit("/", 1)[-1])
+        self.filepath = filepath
+
+    def reload(self):
+        """Rebuilds this library's linked materials from their factories,
+        which may have changed since they were linked."""
+        factories = _LIBRARIES.get(self.filepath, {})
+        for mat in data.materials:
+            if mat.library is self and mat.name in factories:
+                mat.node_tree = factories[mat.name](self).node_tree
+
+
+class Image(ID):
+    pass
+
+
+class Material(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        self.use_nodes = True
+        self.node_tree = NodeTree("Shader Nodetree")
+
+    def copy(self):
+        mat = Material(self._name)
+        mat.use_nodes = self.use_nodes
+        mat.node_tree = self.node_tree.copy_tree()
+        return data.materials._add(mat)
+
+
+class IDCollection:
+    """Name-keyed datablock collection. Like Blender, a name clash gets a
+    .001-style suffix, and linked datablocks are keyed by (name, library)."""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._items = {}
+        self._suffix = defaultdict(int)
+
+    def _key(self, name, library):
+        return (name, library.filepath if library is not None else None)
+
+    def _unique(self, name, library):
+        if self._key(name, library) not in self._items:
+            return name
+        base = name
+        while True:
+            self._suffix[base] += 1
+            candidate = f"{base}.{self._suffix[base]:03d}"
+            if self._key(candidate, library) not in self._items:
+                return candidate
+
+    def _add(self, id_data):
+        id_data._name = self._unique(id_data._name, id_data.library)
+        id_data._collection = self
+        self._items[self._key(id_data._name, id_data.library)] = id_data
+        return id_data
+
+    def _rename(self, id_data, name):
+        del self._items[self._key(id_data._name, id_data.library)]
+        id_data._name = self._unique(name, id_data.library)
+        self._items[self._key(id_data._name, id_data.library)] = id_data
+
+    def new(self, name, *args):
+        return self._add(self._factory(name, *args))
+
+    def get(self, name, default=None):
+        return self._items.get((name, None), default)
+
+    def __getitem__(self, name):
+        item = self.get(name)
+        if item is None:
+            raise KeyError(name)
+        return item
+
+    def __contains__(self, name):
+        return (name, None) in self._items
+
+    def __iter__(self):
+        return iter(list(self._items.values()))
+
+    def __len__(self):
+        return len(self._items)
+
+    def remove(self, id_data, do_unlink=True):
+        del self._items[self._key(id_data._name, id_data.library)]
+        id_data._collection = None
+
+
+class IDList:
+    """A mesh's material list: assignment keeps users counted."""
+
+    def __init__(self):
+        self._items = []
+
+    def append(self, item):
+        self._items.append(item)
+        if item is not None:
+            item.users += 1
+
+    def __setitem__(self, index, item):
+        old = self._items[index]
+        if old is not None:
+            old.users -= 1
+        self._items[index] = item
+        if item is not None:
+            item.users += 1
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class Mesh(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        self.materials = IDList()
+
+
+class MaterialSlot:
+    def __init__(self, obj, index):
+        self._obj = obj
+        self._index = index
+        self.link = 'DATA'
+
+    @property
+    def material(self):
+        return self._obj.data.materials[self._index]
+
+    @material.setter
+    def material(self, value):
+        self._obj.data.materials[self._index] = value
+
+    @property
+    def name(self):
+        mat = self.material
+        return mat.name if mat else ""
+
+
+class Object(ID):
+    def __init__(self, name, object_data=None):
+        super().__init__(name)
+        self.data = object_data
+        self.type = 'MESH' if isinstance(object_data, Mesh) else 'EMPTY'
+        if object_data is not None:
+            object_data.users += 1
+
+    @property
+    def material_slots(self):
+        if self.data is None or not hasattr(self.data, "materials"):
+            return []
+        return [MaterialSlot(self, i) for i in range(len(self.data.materials))]
+
+
+class NodeGroups(IDCollection):
+    def new(self, name, tree_type='ShaderNodeTree'):
+        return self._add(NodeTree(name, tree_type))
+
+
+# --------------------------------------------------------------------------
+# Library loading
+# --------------------------------------------------------------------------
+
+# filepath -> {material name: factory(library) -> Material}
+_LIBRARIES = {}
+
+
+def register_library(filepath, material_factories):
+    """Makes bpy.data.libraries.load(filepath) offer these materials. Each
+    factory builds the material (with library set) the first time it's
+    linked."""
+    _LIBRARIES[filepath] = dict(material_factories)
+
+
+class _LoadedNames:
+    def __init__(self, materials=()):
+        self.materials = list(materials)
+        self.node_groups = []
+        self.images = []
+
+
+class _LibraryLoad:
+    def __init__(self, libraries, filepath, link):
+        self._libraries = libraries
+        self._filepath = filepath
+        self._link = link
+
+    def __enter__(self):
+        if self._filepath not in _LIBRARIES:
+            raise OSError(f"cannot read file '{self._filepath}'")
+        self._to = _LoadedNames()
+        return _LoadedNames(_LIBRARIES[self._filepath]), self._to
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None:
+            return False
+        library = self._libraries.get_library(self._filepath)
+        factories = _LIBRARIES[self._filepath]
+        for name in self._to.materials:
+            key = data.materials._key(name, library)
+            if key in data.materials._items:
+                continue
+            mat = factories[name](library)
+            mat.library = library
+            data.materials._add(mat)
+        return False
+
+
+class Libraries(IDCollection):
+    def __init__(self):
+        super().__init__(Library)
+        self._by_path = {}
+
+    def get_library(self, filepath):
+        library = self._by_path.get(filepath)
+        if library is None:
+            library = self._by_path[filepath] = self._add(Library(filepath))
+        return library
+
+    def load(self, filepath, link=False, relative=False):
+        return _LibraryLoad(self, filepath, link)
+
+
+# --------------------------------------------------------------------------
+# Module assembly
+# --------------------------------------------------------------------------
+
+data = types.SimpleNamespace()
+
+handlers = types.SimpleNamespace(
+    persistent=lambda func: func,
+    load_post=[], depsgraph_update_post=[], undo_post=[], redo_post=[],
+)
+
+
+def reset():
+    """Empties bpy.data and the context, like loading an empty file."""
+    data.materials = IDCollection(Material)
+    data.images = IDCollection(lambda name, w=8, h=8, *args: Image(name))
+    data.meshes = IDCollection(Mesh)
+    data.objects = IDCollection(Object)
+    data.node_groups = NodeGroups(NodeTree)
+    data.libraries = Libraries()
+    data.filepath = ""
+    context.selected_objects = []
+    context.object = None
+    for handler in handlers.load_post:
+        handler(None)
+
+
+class _Addons(dict):
+    pass
+
+
+context = types.SimpleNamespace(
+    preferences=types.SimpleNamespace(addons=_Addons()),
+    scene=types.SimpleNamespace(name="Scene"),
+    window_manager=None,
+)
+
+
+def set_addon_preferences(module, **prefs):
+    """Makes bpy.context.preferences.addons[module].preferences exist."""
+    context.preferences.addons[module] = types.SimpleNamespace(preferences=types.SimpleNamespace(**prefs))
+
+
+class _Registrable:
+    """Base for the bpy.types classes the add-on subclasses."""
+
+
+def _extension_path_user(package, path="", create=False):
+    folder = os.path.join(tempfile.gettempdir(), "fake_bpy_extensions", package, path)
+    if create:
+        os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def _prop(*_args, **_kwargs):
+    return None
+
+
+def _abspath(filepath, library=None):
+    if filepath.startswith("//"):
+        base = os.path.dirname(library.filepath if library is not None else data.filepath)
+        return os.path.join(base, filepath[2:])
+    return filepath
+
+
+def install():
+    """Registers the stand-in as `bpy` (and the submodules the add-on
+    imports from) in sys.modules. Returns the bpy module."""
+    bpy = types.ModuleType("bpy")
+    bpy.__path__ = []
+
+    bpy_types = types.ModuleType("bpy.types")
+    for name, cls in SOCKET_TYPES.items():
+        setattr(bpy_types, name, cls)
+    bpy_types.NodeSocket = NodeSocket
+    for name in ("Operator", "Panel", "PropertyGroup", "AddonPreferences", "UIList", "Menu"):
+        setattr(bpy_types, name, type(name, (_Registrable,), {}))
+    for cls in (Node, NodeTree, Material, Image, Mesh, Object, Library, ID):
+        setattr(bpy_types, cls.__name__, cls)
+
+    bpy_props = types.ModuleType("bpy.props")
+    for name in ("StringProperty", "BoolProperty", "EnumProperty", "IntProperty", "FloatProperty",
+                 "FloatVectorProperty", "CollectionProperty", "PointerProperty"):
+        setattr(bpy_props, name, _prop)
+
+    bpy_path = types.ModuleType("bpy.path")
+    bpy_path.abspath = _abspath
+    bpy_path.display_name_from_filepath = lambda path: path.rsplit("/", 1)[-1].rsplit(".", 1)[0]
+    bpy_path.ensure_ext = lambda path, ext: path if path.endswith(ext) else path + ext
+
+    bpy_utils = types.ModuleType("bpy.utils")
+    bpy_utils.register_class = bpy_utils.unregister_class = lambda cls: None
+    bpy_utils.extension_path_user = _extension_path_user
+
+    bpy_app = types.ModuleType("bpy.app")
+    bpy_app.version = (5, 2, 0)
+    bpy_app.version_string = "5.2.0 (fake_bpy)"
+    bpy_app.timers = types.SimpleNamespace(
+        register=lambda *a, **k: None, unregister=lambda *a: None, is_registered=lambda *a: False,
+    )
+    bpy_app.handlers = handlers
+
+    bpy.types, bpy.props, bpy.path, bpy.utils, bpy.app = bpy_types, bpy_props, bpy_path, bpy_utils, bpy_app
+    bpy.data = data
+    bpy.context = context
+
+    for module in (bpy, bpy_types, bpy_props, bpy_path, bpy_utils, bpy_app):
+        sys.modules[module.__name__] = module
+
+    reset()
+    return bpy
+
+
+# --------------------------------------------------------------------------
+# Scene building helpers
+# --------------------------------------------------------------------------
+
+
+def group_tree(name, inputs, outputs=(("Shader", "NodeSocketShader"),), library=None):
+    """Node group with the given (name, socket type) interface, linked from
+    `library` if one is given."""
+    tree = NodeTree(name)
+    tree.library = library
+    data.node_groups._add(tree)
+    for socket_name, socket_type in inputs:
+        tree.interface_inputs.new(socket_type, socket_name)
+    for socket_name, socket_type in outputs:
+        tree.interface_outputs.new(socket_type, socket_name)
+    tree.nodes.new("NodeGroupInput")
+    tree.nodes.new("NodeGroupOutput")
+    return tree
+
+
+def mesh_object(name, materials):
+    mesh = data.meshes.new(name)
+    for mat in materials:
+        mesh.materials.append(mat)
+    obj = data.objects.new(name, mesh)
+    return obj
@@ -0,0 +1,209 @@
+"""Synthetic SWTOR-style scenes for the benchmark suite (bench_suite.py).
+
+Everything is generated from a seed, so two runs with the same arguments
+build the same scene. Needs Blender; the Koda groups are read from the
+add-on's own res/Shaders.blend so the Hero Gravitas stand-ins expose the
+same sockets the conversion copies.
+"""
+
+import os
+import random
+
+import bpy  # type: ignore
+
+from bench_merge import ADDON_DIR, split_grid
+
+SHADERS_BLEND = os.path.join(ADDON_DIR, "res", "Shaders.blend")
+
+GARMENT_HUE_XML = """<?xml version="1.0" encoding="utf-8"?>
+<garmentHue>
+  <Hue>{hue}</Hue>
+  <Saturation>{saturation}</Saturation>
+  <Brightness>{brightness}</Brightness>
+  <Contrast>{contrast}</Contrast>
+  <Specular>{specular}</Specular>
+  <Metallicspecular>{metallic}</Metallicspecular>
+</garmentHue>
+"""
+
+OVERRIDE_GROUP = "Bench Skin Override"
+
+
+def reset_scene():
+    bpy.ops.wm.read_homefile(use_empty=True, use_factory_startup=True)
+
+
+def _input_items(tree):
+    return [
+        item for item in tree.interface.items_tree
+        if item.item_type == 'SOCKET' and item.in_out == 'INPUT'
+    ]
+
+
+def load_koda_groups(names):
+    """Links the named Koda node groups from Shaders.blend. Returns {name: tree}."""
+    with bpy.data.libraries.load(SHADERS_BLEND, link=True) as (data_from, data_to):
+        data_to.node_groups = [name for name in data_from.node_groups if name in names]
+    return {tree.name: tree for tree in bpy.data.node_groups if tree.name in names and tree.library}
+
+
+def mirror_group(name, source, in_out='INPUT'):
+    """A local shader group called `name` whose inputs (or outputs, with
+    in_out='OUTPUT') copy the input sockets of `source`, plus a shader
+    output so it can drive a Material Output."""
+    tree = bpy.data.node_groups.new(name, 'ShaderNodeTree')
+    for item in _input_items(source):
+        socket = tree.interface.new_socket(item.name, in_out=in_out, socket_type=item.socket_type)
+        if hasattr(item, "default_value") and hasattr(socket, "default_value"):
+            try:
+                socket.default_value = item.default_value
+            except (TypeError, AttributeError):
+                pass
+    if in_out == 'INPUT':
+        tree.interface.new_socket("Shader", in_out='OUTPUT', socket_type='NodeSocketShader')
+    tree.nodes.new('NodeGroupInput')
+    tree.nodes.new('NodeGroupOutput')
+    return tree
+
+
+def _image(name, size=8):
+    image = bpy.data.images.get(name)
+    if image is None:
+        image = bpy.data.images.new(name, size, size)
+    return image
+
+
+def hero_gravitas_material(name, group_tree, tex_names, rng):
+    mat = bpy.data.materials.new(name)
+    mat.use_nodes = True
+    nodes = mat.node_tree.nodes
+    nodes.clear()
+
+    group = nodes.new('ShaderNodeGroup')
+    group.node_tree = group_tree
+    for socket in group.inputs:
+        if getattr(socket, "type", None) == 'VALUE':
+            socket.default_value = rng.random()
+
+    for hero_name in tex_names:
+        tex = nodes.new('ShaderNodeTexImage')
+        tex.name = hero_name
+        tex.image = _image(f"bench{hero_name.replace(' ', '_')}")
+
+    output = nodes.new('ShaderNodeOutputMaterial')
+    mat.node_tree.links.new(group.outputs["Shader"], output.inputs["Surface"])
+    return mat
+
+
+def hero_engine_material(name, node_type, derived, rng):
+    """Material with a ShaderNodeHeroEngine node, or None when the add-on
+    that defines that node isn't installed."""
+    if not hasattr(bpy.types, node_type):
+        return None
+    mat = bpy.data.materials.new(name)
+    mat.use_nodes = True
+    node = mat.node_tree.nodes.new(node_type)
+    try:
+        node.derived = derived
+    except (TypeError, AttributeError):
+        pass
+    for prop in ("palette1_hue", "palette1_saturation", "palette2_hue", "palette2_saturation"):
+        if hasattr(node, prop):
+            setattr(node, prop, rng.random())
+    return mat
+
+
+def mesh_object(name, size, slots):
+    positions, corner_verts, face_starts = split_grid(size)
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(positions))
+    mesh.loops.add(len(corner_verts))
+    mesh.polygons.add(len(face_starts))
+    mesh.vertices.foreach_set("co", positions.astype("float32").ravel())
+    mesh.loops.foreach_set("vertex_index", corner_verts)
+    mesh.polygons.foreach_set("loop_start", face_starts)
+    if slots > 1:
+        mesh.polygons.foreach_set("material_index", (face_starts // 3 % slots).astype("int32"))
+    mesh.update(calc_edges=True)
+    uv = mesh.uv_layers.new(name="UVMap")
+    uv.data.foreach_set("uv", positions[corner_verts, :2].astype("float32").ravel())
+
+    obj = bpy.data.objects.new(name, mesh)
+    bpy.context.scene.collection.objects.link(obj)
+    return obj
+
+
+def build_material_scene(config, objects, slots, mesh_size, hero_engine_share=0.25, seed=0):
+    """N objects x M slots. Slots alternate between Hero Gravitas group
+    materials (one per config.HERO_GRAVITAS_NODE_NAMES type) and, if the
+    HeroEngine add-on is installed, HeroEngine node materials. Every
+    material is unique to its slot. Returns (objects, stats)."""
+    rng = random.Random(seed)
+    keys = sorted(config.HERO_GRAVITAS_NODE_NAMES)
+    koda = load_koda_groups({config.KODA_NODE_NAMES[key] for key in keys})
+    hero_groups = {
+        key: mirror_group(config.HERO_GRAVITAS_NODE_NAMES[key], koda[config.KODA_NODE_NAMES[key]])
+        for key in keys if config.KODA_NODE_NAMES[key] in koda
+    }
+
+    created = []
+    stats = {"hero_gravitas_materials": 0, "hero_engine_materials": 0}
+    for index in range(objects):
+        obj = mesh_object(f"bench_obj_{index:04d}", mesh_size, slots)
+        for slot in range(slots):
+            key = keys[(index + slot) % len(keys)]
+            mat = None
+            if rng.random() < hero_engine_share:
+                mat = hero_engine_material(f"bench_he_{index:04d}_{slot}", config.HERO_ENGINE_NODE_TYPE, key, rng)
+                stats["hero_engine_materials"] += mat is not None
+            if mat is None and key in hero_groups:
+                mat = hero_gravitas_material(
+                    f"bench_hg_{index:04d}_{slot}", hero_groups[key], config.HERO_GRAVITAS_TEX_NAMES, rng
+                )
+                stats["hero_gravitas_materials"] += 1
+            obj.data.materials.append(mat)
+        created.append(obj)
+
+    stats["verts"] = sum(len(obj.data.vertices) for obj in created)
+    return created, stats
+
+
+def build_override_scene(config, slots):
+    """One active object whose slots each hold a Koda master group and a
+    matching override group, as the override sync expects."""
+    pair = config.Shader_Pairs[0]
+    koda = load_koda_groups({pair["master_name"]})
+    master_tree = koda[pair["master_name"]]
+    override_tree = mirror_group(OVERRIDE_GROUP, master_tree, in_out='OUTPUT')
+
+    obj = mesh_object("bench_override", 4, slots)
+    for slot in range(slots):
+        mat = bpy.data.materials.new(f"bench_override_{slot}")
+        mat.use_nodes = True
+        master = mat.node_tree.nodes.new('ShaderNodeGroup')
+        master.node_tree = master_tree
+        override = mat.node_tree.nodes.new('ShaderNodeGroup')
+        override.node_tree = override_tree
+        obj.data.materials.append(mat)
+
+    bpy.context.view_layer.objects.active = obj
+    return obj
+
+
+def write_garment_hue_folder(root, subpath, count, seed=0):
+    """Writes `count` garmenthue XML files under root/subpath. Returns
+    their file names."""
+    rng = random.Random(seed)
+    folder = os.path.join(root, subpath)
+    os.makedirs(folder, exist_ok=True)
+    names = []
+    for index in range(count):
+        name = f"bench_{index:04d}.xml"
+        color = lambda: ", ".join(f"{rng.random():.6f}" for _ in range(3)) + ", 1"
+        with open(os.path.join(folder, name), "w", encoding="utf-8") as f:
+            f.write(GARMENT_HUE_XML.format(
+                hue=rng.random(), saturation=rng.random(), brightness=rng.uniform(-0.5, 0.5),
+                contrast=rng.random(), specular=color(), metallic=color(),
+            ))
+        names.append(name)
+    return names
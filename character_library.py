@@ -0,0 +1,338 @@
+"""Converted characters packaged into a library .blend for shot files to
+link.
+
+A character is a collection. export_characters() writes the given
+collections to a standalone .blend with bpy.data.libraries.write(), which
+takes their objects, meshes, materials, node groups and images along.
+Before writing, it merges duplicate datablocks used by the characters:
+- images with the same file, colour space and alpha mode;
+- node groups with the same nodes, node settings, links, values and
+  interface;
+- materials with the same node tree and settings.
+Node settings are every RNA property a node type adds (Math operation,
+Mix blend type, Image interpolation, color ramp and curve data...).
+Trees with a node whose data can't be fully described are never merged.
+Groups are merged before the materials that use them, so copies differing
+only in a duplicate group's name merge too. Datablocks linked from other
+libraries (Shaders.blend's Koda groups) are left as they are.
+
+Next to the .blend goes an index, '<library>.autokoda.json':
+{"version": 1, "library": ..., "blender": ..., "characters": {name:
+{"objects": [...], "materials": [...], "images": [...], "node_groups":
+[...]}}}.
+
+import_characters() links characters from a library into the scene as
+collection instances. With override, it creates library overrides of
+their hierarchy instead, so they can be posed and edited in the shot file
+while their data stays in the library. Either way conversion runs once
+per character, in the file that exported it.
+"""
+
+import hashlib
+import json
+import os
+
+import bpy # type: ignore
+from . import log, material_index
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".autokoda.json"
+
+MATERIAL_SETTINGS = ("surface_render_method", "blend_method", "use_backface_culling", "pass_index")
+
+
+def index_path(filepath):
+    return f"{os.path.splitext(filepath)[0]}{INDEX_SUFFIX}"
+
+
+def read_index(filepath):
+    """The library's index, or None if it's missing or unreadable."""
+    path = index_path(filepath)
+    try:
+        with open(path, encoding="utf-8") as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        log.error("Could not read character index '%s': %s", path, e)
+        return None
+    if index.get("version") != INDEX_VERSION or not isinstance(index.get("characters"), dict):
+        log.warning("Ignoring character index '%s' with unknown format", path)
+        return None
+    return index
+
+
+def character_collections(objects, scene):
+    """The collections holding the objects, each once, other than the
+    scene's own master collection."""
+    seen = set()
+    collections = []
+    for obj in objects:
+        for collection in obj.users_collection:
+            if collection == scene.collection or collection.session_uid in seen:
+                continue
+            seen.add(collection.session_uid)
+            collections.append(collection)
+    return collections
+
+
+def _walk_tree(tree, node_groups, images):
+    for node in tree.nodes:
+        if node.type == 'GROUP' and node.node_tree and node.node_tree.session_uid not in node_groups:
+            node_groups[node.node_tree.session_uid] = node.node_tree
+            _walk_tree(node.node_tree, node_groups, images)
+        elif node.type == 'TEX_IMAGE' and node.image:
+            images[node.image.session_uid] = node.image
+
+
+def _contents(collection):
+    """(objects, materials, node groups, images) used by the collection."""
+    objects = list(collection.all_objects)
+    materials = {}
+    for obj in objects:
+        for slot in obj.material_slots:
+            if slot.material is not None:
+                materials[slot.material.session_uid] = slot.material
+
+    node_groups = {}
+    images = {}
+    for mat in materials.values():
+        if mat.use_nodes and mat.node_tree:
+            _walk_tree(mat.node_tree, node_groups, images)
+    return objects, list(materials.values()), list(node_groups.values()), list(images.values())
+
+
+def _image_key(image):
+    if image.source != 'FILE' or image.packed_file is not None or not image.filepath:
+        return None
+    path = os.path.normcase(os.path.normpath(bpy.path.abspath(image.filepath, library=image.library)))
+    return path, image.colorspace_settings.name, image.alpha_mode
+
+
+def _value(socket):
+    value = getattr(socket, "default_value", None)
+    if value is None or isinstance(value, (int, float, bool, str)):
+        return value
+    return tuple(value)
+
+
+class _Undescribable(Exception):
+    """A node holds data the dedupe key can't capture."""
+
+
+# Properties every node has. Only `mute` among them changes shading
+_BASE_NODE_PROPERTIES = None
+
+_MAX_DEPTH = 4
+
+
+def _rna_value(owner, prop, depth):
+    value = getattr(owner, prop.identifier)
+    if prop.type == 'POINTER':
+        if value is None:
+            return None
+        if isinstance(value, bpy.types.ID):
+            return value.name_full
+        return _rna_struct(value, depth + 1)
+    if prop.type == 'COLLECTION':
+        return tuple(_rna_struct(item, depth + 1) for item in value)
+    if prop.type == 'ENUM' and prop.is_enum_flag:
+        return tuple(sorted(value))
+    if prop.type in {'FLOAT', 'INT', 'BOOLEAN'} and getattr(prop, "array_length", 0):
+        return tuple(value)
+    return value
+
+
+def _rna_struct(struct, depth):
+    """Every RNA property of a nested struct (color ramp, curve mapping,
+    image user...), recursively."""
+    if depth > _MAX_DEPTH:
+        raise _Undescribable(struct.bl_rna.identifier)
+    return tuple(
+        (prop.identifier, _rna_value(struct, prop, depth))
+        for prop in struct.bl_rna.properties if prop.identifier != "rna_type"
+    )
+
+
+def _node_properties(node):
+    """The node's own settings: its RNA properties that aren't on every
+    node (operation, blend_type, interpolation, space, ramp and curve
+    data...), plus mute."""
+    global _BASE_NODE_PROPERTIES
+    if _BASE_NODE_PROPERTIES is None:
+        _BASE_NODE_PROPERTIES = {prop.identifier for prop in bpy.types.Node.bl_rna.properties}
+    return tuple(
+        (prop.identifier, _rna_value(node, prop, 0))
+        for prop in node.bl_rna.properties
+        if prop.identifier == "mute" or prop.identifier not in _BASE_NODE_PROPERTIES
+    )
+
+
+def _tree_key(tree):
+    """Hash of everything that decides how the tree shades, or None when
+    some node holds data it can't describe (such trees are never merged)."""
+    entries = []
+    try:
+        for node in tree.nodes:
+            values = tuple(_value(socket) for socket in node.inputs if not socket.is_linked)
+            entries.append((node.name, node.bl_idname, _node_properties(node), values))
+    except _Undescribable as e:
+        log.debug("Not deduplicating '%s': can't describe %s", tree.name, e)
+        return None
+    for link in tree.links:
+        entries.append((
+            link.from_node.name, link.from_socket.identifier,
+            link.to_node.name, link.to_socket.identifier,
+        ))
+    interface = getattr(tree, "interface", None)
+    if interface is not None:
+        for item in interface.items_tree:
+            if item.item_type == 'SOCKET':
+                entries.append((item.in_out, item.socket_type, item.name, _value(item)))
+    entries.sort(key=repr)
+    return hashlib.blake2b(repr(entries).encode(), digest_size=16).hexdigest()
+
+
+def _group_key(tree):
+    key = _tree_key(tree)
+    return (tree.bl_idname, key) if key is not None else None
+
+
+def _material_key(mat):
+    if not mat.use_nodes or mat.node_tree is None:
+        return None
+    key = _tree_key(mat.node_tree)
+    if key is None:
+        return None
+    settings = tuple(getattr(mat, name, None) for name in MATERIAL_SETTINGS)
+    return settings, key
+
+
+def _merge(ids, key_func, counter):
+    """Remaps every local datablock in `ids` onto the first of the same
+    key, in name order so 'Name' is kept over 'Name.001'. Returns the
+    merged-away datablocks."""
+    kept = {}
+    merged = []
+    for id_data in sorted(ids, key=lambda id_data: id_data.name):
+        if id_data.library is not None:
+            continue
+        key = key_func(id_data)
+        if key is None:
+            continue
+        keeper = kept.setdefault(key, id_data)
+        if keeper is id_data:
+            continue
+        id_data.user_remap(keeper)
+        merged.append(id_data)
+        log.count(counter)
+    return merged
+
+
+def deduplicate(collections):
+    """Merges duplicate images, node groups and materials used by the
+    collections. Returns the number of datablocks merged away."""
+    contents = [_contents(collection) for collection in collections]
+    images = {image.session_uid: image for _o, _m, _g, found in contents for image in found}
+    merged = _merge(images.values(), _image_key, "Images deduplicated")
+
+    # A group merge can make the groups using it identical too
+    while True:
+        contents = [_contents(collection) for collection in collections]
+        groups = {tree.session_uid: tree for _o, _m, found, _i in contents for tree in found}
+        round_merged = _merge(groups.values(), _group_key, "Node groups deduplicated")
+        merged += round_merged
+        if not round_merged:
+            break
+
+    materials = {mat.session_uid: mat for _o, found, _g, _i in contents for mat in found}
+    merged += _merge(materials.values(), _material_key, "Materials deduplicated")
+
+    if merged:
+        bpy.data.batch_remove(merged)
+    return len(merged)
+
+
+def _index_entry(collection):
+    objects, materials, node_groups, images = _contents(collection)
+    return {
+        "objects": sorted(obj.name for obj in objects),
+        "materials": sorted(mat.name for mat in materials),
+        "images": sorted(image.name for image in images),
+        "node_groups": sorted(tree.name for tree in node_groups),
+    }
+
+
+def export_characters(collections, filepath, dedupe=True):
+    """Writes the collections to the library `filepath` and its index.
+    Returns (characters, datablocks merged)."""
+    merged = deduplicate(collections) if dedupe else 0
+
+    for collection in collections:
+        unconverted = sum(
+            1 for mat in _contents(collection)[1]
+            if material_index.category(mat) in (material_index.HERO_GRAVITAS, material_index.HERO_ENGINE)
+        )
+        if unconverted:
+            log.warning("Character '%s' has %d unconverted material(s)", collection.name, unconverted)
+            log.count("Unconverted materials exported", unconverted)
+
+    bpy.data.libraries.write(filepath, set(collections), path_remap='RELATIVE_ALL', fake_user=True, compress=True)
+
+    index = {
+        "version": INDEX_VERSION,
+        "library": os.path.basename(filepath),
+        "blender": bpy.app.version_string,
+        "characters": {collection.name: _index_entry(collection) for collection in collections},
+    }
+    path = index_path(filepath)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp_path, path)
+
+    log.info("Exported %d character(s) to %s", len(collections), filepath)
+    log.count("Characters exported", len(collections))
+    return len(collections), merged
+
+
+def _instance(context, collection):
+    instance = bpy.data.objects.new(collection.name, None)
+    instance.instance_type = 'COLLECTION'
+    instance.instance_collection = collection
+    context.collection.objects.link(instance)
+    return instance
+
+
+def import_characters(context, filepath, names=None, override=False):
+    """Links the named characters (all in the index if None) from the
+    library into the active collection, as instances or as library
+    overrides. Returns the number imported."""
+    index = read_index(filepath)
+    if names is None:
+        if index is None:
+            log.error("No character index next to '%s'", filepath)
+            return 0
+        names = list(index["characters"])
+
+    with bpy.data.libraries.load(filepath, link=True, relative=True) as (data_from, data_to):
+        available = set(data_from.collections)
+        missing = [name for name in names if name not in available]
+        data_to.collections = [name for name in names if name in available]
+    for name in missing:
+        log.warning("No character '%s' in '%s'", name, filepath)
+
+    imported = 0
+    for collection in data_to.collections:
+        if collection is None:
+            continue
+        if override:
+            instance = _instance(context, collection)
+            collection.override_hierarchy_create(context.scene, context.view_layer, reference=instance)
+            bpy.data.objects.remove(instance)
+            log.count("Characters overridden")
+        else:
+            _instance(context, collection)
+            log.count("Characters linked")
+        imported += 1
+    return imported
@@ -0,0 +1,164 @@
+"""Material conversion in bounded chunks, for scenes too large to convert
+in one go.
+
+process_objects() keeps everything a batch creates alive until the end:
+- the '_OLD' materials;
+- the linked template materials;
+- the Shaders.blend library itself;
+- an undo step holding all of it.
+
+convert_in_chunks() instead converts one collection, or one fixed-size
+batch of objects, at a time. bpy.data is diffed around each chunk, and
+what the chunk left unused is freed before the next one starts: the
+'_OLD' materials, newly linked templates with their dependencies, and
+libraries the chunk linked that nothing uses any more. Datablocks that
+were already unused before the chunk (the user's own spare materials,
+groups, images) are never touched. Global undo is off for the run.
+Optionally a copy of the file is saved every few chunks as a checkpoint;
+save_as_mainfile(copy=True) leaves the open file and its path alone.
+
+Linked templates are freed with the rest, so each chunk links
+Shaders.blend again. That costs a library load per chunk, traded for a
+peak memory set by the chunk size rather than the scene size.
+"""
+
+import os
+
+import bpy # type: ignore
+from . import config, log, profiling
+from .conversion import process_objects
+
+
+def collection_chunks(scene, objects):
+    """The objects grouped by the first collection each is found in, in
+    scene order. Objects in no scene collection come last."""
+    wanted = {obj.name: obj for obj in objects if obj.type == 'MESH'}
+    chunks = []
+    for collection in [scene.collection, *scene.collection.children_recursive]:
+        chunk = [wanted.pop(obj.name) for obj in collection.objects if obj.name in wanted]
+        if chunk:
+            chunks.append((collection.name, chunk))
+    if wanted:
+        chunks.append(("(other)", list(wanted.values())))
+    return chunks
+
+
+def batch_chunks(objects, size):
+    meshes = [obj for obj in objects if obj.type == 'MESH']
+    return [
+        (f"batch {start // size + 1}", meshes[start:start + size])
+        for start in range(0, len(meshes), size)
+    ]
+
+
+def checkpoint_path(path=""):
+    """Where checkpoints go: `path`, or '<file>_autokoda_checkpoint.blend'
+    next to the open file. None if neither is available."""
+    if path:
+        return bpy.path.abspath(path)
+    if not bpy.data.filepath:
+        return None
+    stem, _ext = os.path.splitext(bpy.data.filepath)
+    return f"{stem}_autokoda_checkpoint.blend"
+
+
+_TRACKED = ("materials", "node_groups", "images", "libraries")
+
+
+def _snapshot():
+    """{session_uid: name} of the datablocks a chunk can leave behind."""
+    return {
+        id_data.session_uid: id_data.name
+        for attr in _TRACKED for id_data in getattr(bpy.data, attr)
+    }
+
+
+def _leftovers(before):
+    """Unused datablocks the chunk created (linked templates and their
+    dependencies) or turned into '_OLD' materials."""
+    found = []
+    for attr in ("materials", "node_groups", "images"):
+        for id_data in getattr(bpy.data, attr):
+            if id_data.users or id_data.use_fake_user:
+                continue
+            name = before.get(id_data.session_uid)
+            if name is None or (attr == "materials" and name != id_data.name and id_data.name.endswith("_OLD")):
+                found.append(id_data)
+    return found
+
+
+def _free_chunk(before):
+    """Frees what the chunk left behind, and nothing else in the file.
+    Repeats while freeing makes more of the chunk's datablocks unused."""
+    freed = 0
+    while True:
+        leftovers = _leftovers(before)
+        if not leftovers:
+            break
+        bpy.data.batch_remove(leftovers)
+        freed += len(leftovers)
+
+    # Libraries the chunk linked, once nothing linked from them is left
+    in_use = {
+        id_data.library.session_uid
+        for attr in ("materials", "node_groups", "images")
+        for id_data in getattr(bpy.data, attr)
+        if id_data.library is not None
+    }
+    libraries = [
+        library for library in bpy.data.libraries
+        if library.session_uid not in before and library.session_uid not in in_use
+    ]
+    if libraries:
+        bpy.data.batch_remove(libraries)
+        freed += len(libraries)
+    log.count("Datablocks freed", freed)
+
+
+def _save_checkpoint(path):
+    try:
+        bpy.ops.wm.save_as_mainfile(filepath=path, copy=True, check_existing=False)
+    except RuntimeError as e:
+        log.warning("Checkpoint save to '%s' failed: %s", path, e)
+        return False
+    log.info("Checkpoint saved: %s", path)
+    log.count("Checkpoints saved")
+    return True
+
+
+def convert_in_chunks(context, objects, mode='COLLECTION', batch_size=None, checkpoint=None, checkpoint_every=None):
+    """Converts the objects' materials chunk by chunk (mode 'COLLECTION'
+    or 'BATCH'), freeing each chunk's leftovers after it. With a `checkpoint`
+    path, saves a copy of the file there every `checkpoint_every` chunks
+    and after the last one. Returns (chunks, objects, unique meshes)."""
+    batch_size = batch_size or config.CHUNK_BATCH_SIZE
+    checkpoint_every = checkpoint_every or config.CHUNK_CHECKPOINT_EVERY
+    if mode == 'BATCH':
+        chunks = batch_chunks(objects, max(1, batch_size))
+    else:
+        chunks = collection_chunks(context.scene, objects)
+
+    edit_prefs = context.preferences.edit
+    use_global_undo = edit_prefs.use_global_undo
+    edit_prefs.use_global_undo = False
+
+    object_total = 0
+    mesh_total = 0
+    try:
+        for index, (label, chunk) in enumerate(chunks, start=1):
+            before = _snapshot()
+            with profiling.phase("chunk conversion"):
+                object_count, mesh_count = process_objects(chunk)
+            with profiling.phase("free"):
+                _free_chunk(before)
+            object_total += object_count
+            mesh_total += mesh_count
+            log.info("Chunk %d/%d (%s): %d object(s)", index, len(chunks), label, object_count)
+
+            if checkpoint and (index % max(1, checkpoint_every) == 0 or index == len(chunks)):
+                with profiling.phase("checkpoint"):
+                    _save_checkpoint(checkpoint)
+    finally:
+        edit_prefs.use_global_undo = use_global_undo
+
+    return len(chunks), object_total, mesh_total
@@ -6,6 +6,9 @@ addon_dir = os.path.dirname(__file__)
 DEFAULT_SHADERS = os.path.join(addon_dir, "res", "Shaders.blend")
 GARMENT_HUE_SUBPATH = os.path.join("art", "dynamic", "garmenthue")
 
+# Seconds between background checks of the shaders / resources paths
+PATH_STATUS_REFRESH_INTERVAL = 5.0
+
 KODA_NODE_NAMES = {
     "EYE"       : "CaptnKoda SWTOR - Eye Shader",
     "GARMENT"   : "CaptnKoda SWTOR - Garment Shader",
@@ -99,4 +102,78 @@ Allowed_Socket_Types = (
     bpy.types.NodeSocketBool,
     bpy.types.NodeSocketVector,
     bpy.types.NodeSocketColor,
-)
\ No newline at end of file
+)
+
+
+# Performance mode (see performance_mode.py). Values applied while it is on;
+# everything changed is snapshotted first and restored afterwards.
+PERFORMANCE_SCENE_SETTINGS = {
+    "use_simplify"             : True,
+    "simplify_subdivision"     : 0,
+    "simplify_child_particles" : 0.1,
+    "simplify_volumes"         : 0.25,
+}
+
+PERFORMANCE_TEXTURE_LIMIT = 'CLAMP_1024'
+
+# Applied to materials that use one of the Koda shader groups
+PERFORMANCE_MATERIAL_SETTINGS = {
+    "displacement_method"     : 'BUMP',
+    "use_raytrace_refraction" : False,
+}
+
+# Adaptive subsurf (see adaptive_subsurf.py). Bands are (minimum screen
+# fraction, viewport level), checked in order; the user's own level is the cap.
+ADAPTIVE_SUBSURF_BANDS = [
+    (0.35, 3),
+    (0.15, 2),
+    (0.05, 1),
+    (0.0,  0),
+]
+ADAPTIVE_SUBSURF_INTERVAL = 0.5
+ADAPTIVE_SUBSURF_OBJECTS_PER_TICK = 25
+
+# LOD generation (see mesh_lod.py). Ratios are the Decimate ratio of level
+# 1, 2, ...; screen bands are (minimum screen fraction, level) in order.
+LOD_RATIOS = (0.5, 0.25, 0.1)
+LOD_SCREEN_BANDS = [
+    (0.25, 0),
+    (0.1,  1),
+    (0.04, 2),
+    (0.0,  3),
+]
+# Decimate vertex group factor for the seam / material border weights
+LOD_BORDER_PROTECTION = 4.0
+
+# Geometry stages of Mesh Preparation (see mesh_utils.prepare_meshes). Kept here
+# so the operator can be defined without importing mesh_utils.
+MERGE_METHODS = [
+    ('BMESH', "BMesh", "Merge with bmesh.ops.remove_doubles"),
+    ('HASH', "Spatial Hash", "Vectorised NumPy merge, much faster on very large meshes. Merging is transitive: "
+                             "a chain of vertices each within the distance of the next becomes one vertex, "
+                             "where BMesh can keep several. Meshes with vertex groups or shape keys still use BMesh"),
+    ('ARRAY', "Arrays", "NumPy merge (transitive, as Spatial Hash) and tris to quads, can run across worker processes. "
+                        "Meshes with vertex groups or shape keys still use BMesh"),
+]
+
+# Resources index (see resources_index.py): threads scanning directories,
+# and the extensions tried when a missing image's exact file name isn't found
+RESOURCES_INDEX_WORKERS = 8
+RESOURCES_IMAGE_EXTENSIONS = (".dds", ".png", ".tga", ".jpg")
+
+# Palette bake (see palette_bake.py). Each pass is (Cycles bake type, pass
+# filter); the size falls back to PALETTE_BAKE_RESOLUTION when a material
+# has no PaletteMap or DiffuseMap to take it from
+PALETTE_BAKE_PASSES = {
+    "diffuse"  : ('DIFFUSE', {'COLOR'}),
+    "specular" : ('GLOSSY', {'COLOR'}),
+}
+PALETTE_BAKE_RESOLUTION = 1024
+PALETTE_BAKE_SAMPLES = 1
+PALETTE_BAKE_MARGIN = 4
+PALETTE_BAKE_ROUGHNESS = 0.5
+
+# Chunked conversion (see chunked_conversion.py): objects per chunk in
+# batch mode, and how many chunks between checkpoint saves
+CHUNK_BATCH_SIZE = 200
+CHUNK_CHECKPOINT_EVERY = 4
\ No newline at end of file
@@ -1,10 +1,12 @@
-from . import config
+from . import config, log, material_index
+from .profiling import timed
 from .material_io import link_material_with_koda_group, assign_linked_material, finalize_material_swap
 from .node_utils import find_koda_group_node
 from .hero_gravitas import copy_node_inputs, transfer_textures
 from .hero_engine import find_hero_engine_node, transfer_hero_engine_textures, transfer_hero_engine_properties
 
 
+@timed("hero gravitas material")
 def _process_hero_gravitas_material(obj, mat, slot_index, hero_nodes):
     for hero_node in hero_nodes:
         hero_key = next(
@@ -34,6 +36,7 @@ def _process_hero_gravitas_material(obj, mat, slot_index, hero_nodes):
         finalize_material_swap(obj, mat, new_mat, slot_index, koda_shader_name, log_label="material")
 
 
+@timed("heroengine material")
 def _process_hero_engine_material(obj, mat, slot_index):
     hero_engine_node = find_hero_engine_node(mat.node_tree)
     if not hero_engine_node:
@@ -43,7 +46,7 @@ def _process_hero_engine_material(obj, mat, slot_index):
     koda_shader_name = config.KODA_NODE_NAMES.get(key) if key else None
 
     if not koda_shader_name:
-        print(f"[Auto Koda] No Koda mapping for derived='{hero_engine_node.derived}' on '{mat.name}'")
+        log.warning("No Koda mapping for derived='%s' on '%s'", hero_engine_node.derived, mat.name)
         return True
 
     new_mat = link_material_with_koda_group(koda_shader_name)
@@ -60,31 +63,64 @@ def _process_hero_engine_material(obj, mat, slot_index):
     return True
 
 
-def process_object(obj):
+def process_object(obj, handled_data_slots=None, examined=None):
+    """Converts every convertible material in obj's slots.
+    `handled_data_slots` is an optional set of (mesh session_uid, slot
+    index) pairs for slots linked to the mesh that another user of the
+    same mesh has already handled; those are skipped and new ones added.
+    `examined` is an optional set of material names already looked at in
+    this batch; those are skipped and new ones added."""
     if not obj or obj.type != 'MESH':
         return
 
     for slot_index, slot in enumerate(obj.material_slots):
+        if slot.link == 'DATA' and handled_data_slots is not None:
+            key = (obj.data.session_uid, slot_index)
+            if key in handled_data_slots:
+                continue
+            handled_data_slots.add(key)
+
         mat = slot.material
         if not mat or not mat.use_nodes:
             continue
 
-        if any(
-            node.type == 'GROUP'
-            and node.node_tree
-            and node.node_tree.name in config.KODA_NODE_NAMES.values()
-            for node in mat.node_tree.nodes
-        ):
+        if examined is not None:
+            if mat.name in examined:
+                continue
+            examined.add(mat.name)
+
+        kind = material_index.category(mat)
+        if kind == material_index.HERO_GRAVITAS:
+            hero_nodes = [
+                node for node in mat.node_tree.nodes
+                if node.type == 'GROUP'
+                and node.node_tree
+                and node.node_tree.name in config.HERO_GRAVITAS_NODE_NAMES.values()
+            ]
+            _process_hero_gravitas_material(obj, mat, slot_index, hero_nodes)
+        elif kind == material_index.HERO_ENGINE:
+            _process_hero_engine_material(obj, mat, slot_index)
+
+
+def process_objects(objects):
+    """Runs process_object over a batch, visiting each mesh-linked slot of a
+    mesh datablock once however many objects share it, and each material
+    once however many slots use it. A mesh slot that one user overrides
+    with an object-linked slot is still visited through the next user that
+    doesn't. Returns (objects, unique_meshes)."""
+    seen_meshes = set()
+    handled_data_slots = set()
+    examined = set()
+    object_count = 0
+
+    for obj in objects:
+        if not obj or obj.type != 'MESH':
             continue
+        object_count += 1
 
-        hero_nodes = [
-            node for node in mat.node_tree.nodes
-            if node.type == 'GROUP'
-            and node.node_tree
-            and node.node_tree.name in config.HERO_GRAVITAS_NODE_NAMES.values()
-        ]
+        seen_meshes.add(obj.data)
+        process_object(obj, handled_data_slots=handled_data_slots, examined=examined)
 
-        if hero_nodes:
-            _process_hero_gravitas_material(obj, mat, slot_index, hero_nodes)
-        else:
-            _process_hero_engine_material(obj, mat, slot_index)
\ No newline at end of file
+    log.count("Objects processed", object_count)
+    log.count("Unique meshes processed", len(seen_meshes))
+    return object_count, len(seen_meshes)
@@ -0,0 +1,118 @@
+"""Opt-in datablock and memory accounting for batch operators.
+
+Operators wrap their work in measure(label). When accounting is on, it
+counts the blend data's datablocks before and after the run and estimates
+what they hold in memory. The difference is logged and kept in
+`last_delta` for the Diagnostics panel. While accounting is off, measure()
+hands back a shared no-op context manager.
+
+Memory figures are estimates from sizes Blender exposes, not allocator
+numbers:
+- images count only when their pixels are loaded: width x height x
+  channels, at 4 bytes per channel for float buffers;
+- packed images add their packed file size;
+- meshes count their vertex, edge, corner and face arrays at the sizes
+  Blender stores them.
+"""
+
+from contextlib import contextmanager, nullcontext
+
+import bpy # type: ignore
+from . import log
+
+_enabled = False
+
+_NULL = nullcontext()
+
+# Bytes per element of a mesh's core arrays: vertex positions (3 floats),
+# edge vertex pairs (2 ints), corner vertex and edge (2 ints), face offsets
+# (1 int)
+_VERTEX_BYTES = 12
+_EDGE_BYTES = 8
+_CORNER_BYTES = 8
+_FACE_BYTES = 4
+
+COUNTED = ("materials", "images", "node_groups", "meshes", "libraries")
+
+last_delta = None
+
+
+def configure(enabled):
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled():
+    return _enabled
+
+
+def image_bytes(image):
+    size = 0
+    if image.has_data:
+        width, height = image.size
+        size += width * height * image.channels * (4 if image.is_float else 1)
+    packed = image.packed_file
+    if packed is not None:
+        size += packed.size
+    return size
+
+
+def mesh_bytes(mesh):
+    return (
+        len(mesh.vertices) * _VERTEX_BYTES
+        + len(mesh.edges) * _EDGE_BYTES
+        + len(mesh.loops) * _CORNER_BYTES
+        + len(mesh.polygons) * _FACE_BYTES
+    )
+
+
+def snapshot():
+    """Datablock counts and estimated memory of the current blend data."""
+    data = bpy.data
+    stats = {name: len(getattr(data, name)) for name in COUNTED}
+    stats["image_bytes"] = sum(image_bytes(image) for image in data.images)
+    stats["mesh_bytes"] = sum(mesh_bytes(mesh) for mesh in data.meshes)
+    return stats
+
+
+def diff(before, after):
+    return {key: after[key] - before[key] for key in after}
+
+
+def format_bytes(size):
+    value = abs(size)
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024 or unit == "GB":
+            break
+        value /= 1024
+    return f"{'-' if size < 0 else '+'}{value:.1f} {unit}"
+
+
+def describe(delta):
+    """One-line summary of a delta, for logs and reports."""
+    parts = [f"{name.replace('_', ' ')} {delta[name]:+d}" for name in COUNTED if delta[name]]
+    for key, label in (("image_bytes", "image memory"), ("mesh_bytes", "mesh memory")):
+        if delta[key]:
+            parts.append(f"{label} {format_bytes(delta[key])}")
+    return ", ".join(parts) or "no change"
+
+
+@contextmanager
+def _measure(label):
+    global last_delta
+    before = snapshot()
+    try:
+        yield
+    finally:
+        after = snapshot()
+        delta = diff(before, after)
+        last_delta = {"label": label, "before": before, "after": after, "delta": delta}
+        log.info("%s datablocks: %s", label, describe(delta))
+
+
+def measure(label):
+    """Snapshots blend data around one operator run. A no-op unless
+    accounting is enabled."""
+    if not _enabled:
+        return _NULL
+    return _measure(label)
@@ -1,15 +1,20 @@
-"""Garment Hue file listing, and the collection-backed searchable field used
-by the Utilities panel. Uses prop_search rather than a plain EnumProperty so
-the user can type to filter file names."""
+"""Garment Hue file catalogue, and the search callback of the searchable
+field used by the Utilities panel.
+
+The catalogue is a module-level list shared by every scene and never
+saved into the .blend. It is filled the first time the field's search
+list opens. After that, the garmenthue folder is re-listed only when its
+mtime changes, and the list is replaced only when the names in it
+differ."""
 
 import os
-import bpy # type: ignore
-from . import config
+from . import config, log
 from .prefs import get_resources_folder_path
 
 
-class Auto_Koda_GarmentHueItem(bpy.types.PropertyGroup):
-    name: bpy.props.StringProperty()  #type: ignore
+# Sorted file names, and the folder and folder mtime they were listed from
+_catalogue = []
+_catalogue_key = None
 
 
 def list_garment_hue_files():
@@ -23,7 +28,7 @@ def list_garment_hue_files():
     garment_hue_path = os.path.join(resources_path, config.GARMENT_HUE_SUBPATH)
 
     if not os.path.isdir(garment_hue_path):
-        print(f"[Auto Koda] Garment hue folder not found: {garment_hue_path}")
+        log.warning("Garment hue folder not found: %s", garment_hue_path)
         return []
 
     try:
@@ -32,23 +37,54 @@ def list_garment_hue_files():
             if os.path.isfile(os.path.join(garment_hue_path, f))
         )
     except Exception as e:
-        print(f"[Auto Koda] Failed to list garment hue folder: {e}")
+        log.error("Failed to list garment hue folder: %s", e)
         return []
 
     return files
 
 
-def refresh_garment_hue_collection(scene):
-    """Rebuilds scene.auto_koda_garment_hue_files from the current contents
-    of the garmenthue folder. Cheap enough to call on every panel draw -
-    just a directory listing, no file reads."""
+def _folder_key():
+    resources_path = get_resources_folder_path()
+    if not resources_path:
+        return None
+    folder = os.path.join(resources_path, config.GARMENT_HUE_SUBPATH)
+    try:
+        return folder, os.stat(folder).st_mtime_ns
+    except OSError:
+        return folder, None
+
+
+def refresh_catalogue(force=False):
+    """Brings the catalogue in line with the garmenthue folder. Without
+    `force` this is one stat when the folder hasn't changed. Returns
+    whether the catalogue changed."""
+    global _catalogue, _catalogue_key
+    key = _folder_key()
+    if not force and key == _catalogue_key:
+        return False
+    _catalogue_key = key
+
     files = list_garment_hue_files()
-    current_names = {item.name for item in scene.auto_koda_garment_hue_files}
+    current = set(_catalogue)
+    listed = set(files)
+    if current == listed:
+        return False
+
+    added = len(listed - current)
+    removed = len(current - listed)
+    _catalogue = files
+    log.debug("Garment hue catalogue: %d file(s), %d added, %d removed", len(files), added, removed)
+    return True
+
+
+def get_catalogue():
+    return _catalogue
 
-    if current_names == set(files):
-        return  # already in sync, avoid needless collection churn
 
-    scene.auto_koda_garment_hue_files.clear()
-    for f in files:
-        item = scene.auto_koda_garment_hue_files.add()
-        item.name = f
\ No newline at end of file
+def search_garment_hue_files(_self, _context, edit_text):
+    """search= callback of the garment hue file field."""
+    refresh_catalogue()
+    text = edit_text.lower()
+    if not text:
+        return _catalogue
+    return [name for name in _catalogue if text in name.lower()]
@@ -3,7 +3,8 @@ Koda group node inputs (palette1_* for Primary, palette2_* for Secondary)."""
 
 import os
 import xml.etree.ElementTree as ET
-from . import config
+from . import config, log, material_index
+from .node_utils import group_base_name
 
 
 def _parse_float_list(text):
@@ -29,7 +30,7 @@ def parse_garment_hue_file(filepath):
         tree = ET.parse(filepath)
         root = tree.getroot()
     except Exception as e:
-        print(f"[Auto Koda] Failed to parse garment hue file '{filepath}': {e}")
+        log.error("Failed to parse garment hue file '%s': %s", filepath, e)
         return None
 
     def get_text(tag):
@@ -49,7 +50,7 @@ def parse_garment_hue_file(filepath):
             try:
                 values[key] = float(text)
             except ValueError:
-                print(f"[Auto Koda] Could not parse float for <{tag}> in '{filepath}'")
+                log.warning("Could not parse float for <%s> in '%s'", tag, filepath)
 
     for tag, key in (
         ("Specular", "specular"),
@@ -60,24 +61,20 @@ def parse_garment_hue_file(filepath):
             try:
                 values[key] = _parse_float_list(text)
             except ValueError:
-                print(f"[Auto Koda] Could not parse color for <{tag}> in '{filepath}'")
+                log.warning("Could not parse color for <%s> in '%s'", tag, filepath)
 
     return values
 
 
-def apply_palette_to_koda_node(values, koda_node, slot):
-    """Writes parsed palette `values` onto a Koda group node's palette1_* or
-    palette2_* inputs (slot=1 or slot=2). For each field, tries the mapped
-    Koda input name from HERO_ENGINE_PROP_TO_KODA_INPUT first; if that socket
-    doesn't exist on this node, falls back to the raw property key itself
-    (e.g. 'palette1_hue') in case the group's socket wasn't renamed."""
-    if not koda_node or not values:
-        return 0
-
-    from .socket_utils import coerce_value_for_socket
-
+def resolve_palette_inputs(values, koda_node, slot):
+    """Pairs each parsed palette value with the Koda input it goes to on
+    palette1_* or palette2_* (slot=1 or slot=2), as [(koda_input, value)].
+    For each field, tries the mapped Koda input name from
+    HERO_ENGINE_PROP_TO_KODA_INPUT first; if that socket doesn't exist on
+    this node, falls back to the raw property key itself (e.g.
+    'palette1_hue') in case the group's socket wasn't renamed."""
     koda_inputs = {inp.name: inp for inp in koda_node.inputs}
-    copied = 0
+    resolved = []
 
     for field_key, value in values.items():
         hero_prop = f"palette{slot}_{field_key}"
@@ -91,32 +88,49 @@ def apply_palette_to_koda_node(values, koda_node, slot):
             # Fallback: try the raw property key directly
             koda_input = koda_inputs.get(hero_prop)
 
-        if not koda_input:
-            continue
+        if koda_input:
+            resolved.append((koda_input, value))
+
+    return resolved
 
+
+def apply_palette_to_koda_node(values, koda_node, slot):
+    """Writes parsed palette `values` onto a Koda group node's palette
+    inputs (see resolve_palette_inputs). Returns the number written."""
+    if not koda_node or not values:
+        return 0
+
+    from .socket_utils import coerce_value_for_socket
+
+    copied = 0
+    for koda_input, value in resolve_palette_inputs(values, koda_node, slot):
         if coerce_value_for_socket(value, koda_input):
             copied += 1
         else:
-            attempted_name = mapped_name or hero_prop
-            print(f"[Auto Koda] Failed to apply '{hero_prop}' -> '{attempted_name}'")
+            log.debug("Failed to apply palette value to '%s'", koda_input.name)
+            log.count("Palette values skipped")
 
     return copied
 
 
-def apply_garment_hue_to_objects(objects, filename, slot):
+def apply_garment_hue_to_objects(objects, filename, slot, shared=False):
     """For each selected mesh object, finds every Koda group node in its
     materials and applies the parsed palette file onto palette{slot}_*
-    inputs. Returns (files_applied_count, nodes_updated_count)."""
+    inputs. With `shared`, the values go into one palette node group for
+    this file and slot, linked into each Koda node instead (see
+    palette_groups.py), and only nodes newly linked to it count as updated.
+    Returns (files_applied_count, nodes_updated_count)."""
     from .prefs import get_resources_folder_path
+    from . import palette_groups
 
     resources_path = get_resources_folder_path()
     if not resources_path:
-        print("[Auto Koda] Resources folder not configured.")
+        log.error("Resources folder not configured.")
         return 0, 0
 
     filepath = os.path.join(resources_path, config.GARMENT_HUE_SUBPATH, filename)
     if not os.path.isfile(filepath):
-        print(f"[Auto Koda] Garment hue file not found: {filepath}")
+        log.error("Garment hue file not found: %s", filepath)
         return 0, 0
 
     values = parse_garment_hue_file(filepath)
@@ -124,6 +138,10 @@ def apply_garment_hue_to_objects(objects, filename, slot):
         return 0, 0
 
     nodes_updated = 0
+    shared_group = None
+    shared_name = palette_groups.group_name(filename, slot)
+    # Koda group types whose palette sockets the shared group already has
+    shared_types = set()
 
     for obj in objects:
         if obj.type != 'MESH':
@@ -131,15 +149,27 @@ def apply_garment_hue_to_objects(objects, filename, slot):
 
         for slot_ref in obj.material_slots:
             mat = slot_ref.material
-            if not mat or not mat.use_nodes:
+            if not mat or material_index.category(mat) != material_index.KODA:
                 continue
 
-            for node in mat.node_tree.nodes:
+            # Listed first: linking and unlinking add and remove nodes
+            for node in list(mat.node_tree.nodes):
                 if (
                     node.type == 'GROUP'
                     and node.node_tree
-                    and node.node_tree.name in config.KODA_NODE_NAMES.values()
+                    and group_base_name(node.node_tree) in config.KODA_NODE_NAMES.values()
                 ):
+                    if shared:
+                        if node.node_tree.name not in shared_types:
+                            shared_types.add(node.node_tree.name)
+                            shared_group = palette_groups.ensure_palette_group(
+                                shared_name, resolve_palette_inputs(values, node, slot)
+                            )
+                        if palette_groups.link_palette_group(mat, node, shared_group, slot):
+                            nodes_updated += 1
+                        continue
+
+                    palette_groups.unlink_palette_group(mat, slot)
                     copied = apply_palette_to_koda_node(values, node, slot)
                     if copied:
                         nodes_updated += 1
@@ -1,16 +1,56 @@
-from .prefs import get_shaders_blend_path
-from .material_io import (
-    link_material_with_koda_group,
-    assign_linked_material,
-    remap_old_material_references,
-    finalize_material_swap,
-)
-from .node_utils import find_group_node, get_group_output_node, find_koda_group_node
-from .hero_gravitas import transfer_textures, copy_node_inputs
-from .hero_engine import find_hero_engine_node, transfer_hero_engine_textures, transfer_hero_engine_properties
-from .conversion import process_object
-from .overrides import sync_master_inputs_to_override, link_override_to_master, run_override_sync
-from .mesh_utils import toggle_subsurf_viewport_display, prepare_meshes
-from .prefs import get_shaders_blend_path, get_resources_folder_path
-from .garment_hue import list_garment_hue_files, refresh_garment_hue_collection
-from .garment_hue_xml import parse_garment_hue_file, apply_palette_to_koda_node, apply_garment_hue_to_objects
\ No newline at end of file
+"""Single import point for the implementation modules used by operators.
+
+Names are resolved on first access (module __getattr__), so importing
+helpers at registration costs nothing: mesh_utils (bmesh, NumPy),
+garment_hue_xml (xml.etree) and the rest load when an operator first uses
+them."""
+
+from importlib import import_module
+
+_EXPORTS = {
+    "prefs": (
+        "get_shaders_blend_path", "get_resources_folder_path",
+        "get_path_status", "refresh_path_status", "path_status_timer",
+    ),
+    "material_io": (
+        "link_material_with_koda_group", "assign_linked_material",
+        "remap_old_material_references", "finalize_material_swap",
+    ),
+    "node_utils": ("find_group_node", "get_group_output_node", "find_koda_group_node"),
+    "hero_gravitas": ("transfer_textures", "copy_node_inputs"),
+    "hero_engine": ("find_hero_engine_node", "transfer_hero_engine_textures", "transfer_hero_engine_properties"),
+    "conversion": ("process_object", "process_objects"),
+    "chunked_conversion": ("convert_in_chunks", "checkpoint_path"),
+    "overrides": ("sync_master_inputs_to_override", "link_override_to_master", "run_override_sync"),
+    "mesh_utils": (
+        "toggle_subsurf_viewport_display", "prepare_meshes", "merge_vertices_by_hash",
+        "instance_duplicate_meshes",
+    ),
+    "config": ("MERGE_METHODS",),
+    "mesh_lod": ("generate_lods", "remove_lods", "set_lods", "set_lods_by_distance"),
+    "adaptive_subsurf": ("find_viewpoint",),
+    "performance_mode": ("enable_performance_mode", "disable_performance_mode", "performance_mode_active"),
+    "garment_hue": ("list_garment_hue_files", "refresh_catalogue", "get_catalogue"),
+    "garment_hue_xml": ("parse_garment_hue_file", "apply_palette_to_koda_node", "apply_garment_hue_to_objects"),
+    "resources_index": ("refresh_resources_index", "relink_missing_images"),
+    "palette_bake": ("bake_objects", "swap_baked"),
+    "shader_variants": ("specialise_materials", "restore_base_groups"),
+    "template_versions": ("upgrade_materials",),
+    "character_library": ("character_collections", "export_characters", "import_characters"),
+    "koda_presets": ("save_preset", "delete_preset", "apply_preset", "materials_of", "active_koda_node"),
+}
+
+_SOURCES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+
+def __getattr__(name):
+    module = _SOURCES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{module}", __package__), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SOURCES))
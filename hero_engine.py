@@ -1,4 +1,5 @@
-from . import config
+from . import config, log
+from .profiling import timed
 from .socket_utils import coerce_value_for_socket
 
 
@@ -10,6 +11,7 @@ def find_hero_engine_node(node_tree):
     return None
 
 
+@timed("texture assignment")
 def transfer_hero_engine_textures(hero_node, target_tree):
     """Reads images directly off the HeroEngine node's custom pointer
     properties and assigns them to matching Image Texture nodes by name."""
@@ -31,9 +33,10 @@ def transfer_hero_engine_textures(hero_node, target_tree):
         try:
             target_node.image = image
         except Exception as e:
-            print(f"[Auto Koda] Failed to transfer '{hero_field}' -> '{koda_node_name}': {e}")
+            log.warning("Failed to transfer '%s' -> '%s': %s", hero_field, koda_node_name, e)
 
 
+@timed("socket transfer")
 def transfer_hero_engine_properties(hero_node, koda_node):
     """Copies HeroEngine's custom scalar/color properties onto matching
     input sockets of a Koda group node, using HERO_ENGINE_PROP_TO_KODA_INPUT."""
@@ -56,6 +59,7 @@ def transfer_hero_engine_properties(hero_node, koda_node):
         if coerce_value_for_socket(value, koda_input):
             copied += 1
         else:
-            print(f"[Auto Koda] Failed to copy '{hero_prop}' -> '{koda_input_name}'")
+            log.debug("Failed to copy '%s' -> '%s'", hero_prop, koda_input_name)
+            log.count("HeroEngine properties skipped")
 
     return copied
\ No newline at end of file
@@ -3,10 +3,12 @@
 as opposed to the custom properties used by ShaderNodeHeroEngine — see
 hero_engine.py for that counterpart."""
 
-from . import config
+from . import config, log
+from .profiling import timed
 from .socket_utils import copy_socket_to_socket
 
 
+@timed("texture assignment")
 def transfer_textures(source_tree, target_tree):
     if not source_tree or not target_tree:
         return
@@ -28,12 +30,10 @@ def transfer_textures(source_tree, target_tree):
                     try:
                         target_node.image = source_node.image
                     except Exception as e:
-                        print(
-                            f"[Auto Koda] Failed to transfer image '{hero_name}' "
-                            f"to '{koda_name}': {e}"
-                        )
+                        log.warning("Failed to transfer image '%s' to '%s': %s", hero_name, koda_name, e)
 
 
+@timed("socket transfer")
 def copy_node_inputs(source_node, target_node):
     if not source_node or not target_node:
         return
@@ -46,4 +46,5 @@ def copy_node_inputs(source_node, target_node):
             continue
 
         if not copy_socket_to_socket(source_input, target_input):
-            print(f"[Auto Koda] Failed to copy socket '{target_input.name}'")
\ No newline at end of file
+            log.debug("Failed to copy socket '%s'", target_input.name)
+            log.count("Sockets skipped")
\ No newline at end of file
@@ -0,0 +1,218 @@
+"""Named presets of Koda group node input values, kept in a JSON library.
+
+A preset records the Koda group it was captured from and the value of
+every input that has one, by socket name. Applying a preset first
+compiles it against the group's sockets: names are resolved once to input
+indices, and sockets that are missing or of another shape are dropped.
+The compiled form is cached per group tree (session_uid) and interface
+signature, so a file load or a re-templated group with another input
+layout under the same name compiles afresh. Every group node of a tree
+has the same inputs, so applying to each node is then plain index
+assignments.
+
+The library file is {"version": 1, "presets": {name: {"group": ...,
+"values": {...}}}}, written without whitespace.
+"""
+
+import json
+import os
+
+import bpy # type: ignore
+from . import config, log, material_index
+from .node_utils import group_base_name
+
+LIBRARY_VERSION = 1
+LIBRARY_FILENAME = "koda_presets.json"
+
+# Loaded library, and the path and mtime it was read with
+_library = None
+_library_key = None
+
+# (group tree session_uid, interface signature, preset name) ->
+# [(input index, value)]
+_compiled = {}
+
+
+def library_path():
+    return os.path.join(bpy.utils.extension_path_user(__package__, create=True), LIBRARY_FILENAME)
+
+
+def _read_library(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            library = json.load(f)
+    except FileNotFoundError:
+        return {"version": LIBRARY_VERSION, "presets": {}}
+    except (OSError, ValueError) as e:
+        log.error("Could not read preset library '%s': %s", path, e)
+        return {"version": LIBRARY_VERSION, "presets": {}}
+
+    if library.get("version") != LIBRARY_VERSION or not isinstance(library.get("presets"), dict):
+        log.warning("Ignoring preset library '%s' with unknown format", path)
+        return {"version": LIBRARY_VERSION, "presets": {}}
+    return library
+
+
+def load_library():
+    """The preset library, re-read only when the file has changed."""
+    global _library, _library_key
+    path = library_path()
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+    if _library is None or _library_key != (path, mtime):
+        _library = _read_library(path)
+        _library_key = (path, mtime)
+        _compiled.clear()
+    return _library
+
+
+def _write_library(library):
+    global _library_key
+    path = library_path()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(library, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    _library_key = (path, os.stat(path).st_mtime_ns)
+    _compiled.clear()
+
+
+def preset_names():
+    return sorted(load_library()["presets"])
+
+
+def search_presets(_self, _context, edit_text):
+    """search= callback for the preset name property."""
+    text = edit_text.lower()
+    return [name for name in preset_names() if text in name.lower()]
+
+
+def _socket_value(socket):
+    value = socket.default_value
+    if isinstance(value, (int, float, bool)):
+        return value
+    return list(value)
+
+
+def capture(koda_node):
+    """{socket name: value} of every input with a value of its own."""
+    return {
+        socket.name: _socket_value(socket)
+        for socket in koda_node.inputs
+        if isinstance(socket, config.Allowed_Socket_Types) and not socket.is_linked
+    }
+
+
+def save_preset(name, koda_node):
+    library = load_library()
+    values = capture(koda_node)
+    group_name = group_base_name(koda_node.node_tree)
+    library["presets"][name] = {"group": group_name, "values": values}
+    _write_library(library)
+    log.info("Saved preset '%s' (%d value(s) from '%s')", name, len(values), group_name)
+    return len(values)
+
+
+def delete_preset(name):
+    library = load_library()
+    if library["presets"].pop(name, None) is None:
+        return False
+    _write_library(library)
+    return True
+
+
+def _shape(value):
+    return len(value) if isinstance(value, list) else None
+
+
+def _compile(preset_name, preset, koda_node):
+    """Resolves the preset's socket names against koda_node's inputs."""
+    inputs = {socket.name: (index, socket) for index, socket in enumerate(koda_node.inputs)}
+    resolved = []
+    for socket_name, value in preset["values"].items():
+        entry = inputs.get(socket_name)
+        if entry is None:
+            log.debug("Preset '%s': no input '%s' on '%s'", preset_name, socket_name, preset["group"])
+            continue
+        index, socket = entry
+        if not isinstance(socket, config.Allowed_Socket_Types):
+            continue
+        if _shape(value) != _shape(_socket_value(socket)):
+            log.debug("Preset '%s': '%s' has another shape on '%s'", preset_name, socket_name, preset["group"])
+            continue
+        resolved.append((index, value))
+    return resolved
+
+
+def _interface_signature(node):
+    return tuple((socket.name, type(socket).__name__) for socket in node.inputs)
+
+
+def apply_preset(name, materials):
+    """Applies the preset to every group node of its Koda group in the
+    given materials. Returns (nodes_updated, values_set)."""
+    preset = load_library()["presets"].get(name)
+    if preset is None:
+        log.error("No preset named '%s'", name)
+        return 0, 0
+
+    group_name = preset["group"]
+    # Group tree session_uid -> compiled preset, for this call
+    resolved_by_tree = {}
+    nodes_updated = 0
+    values_set = 0
+
+    for mat in materials:
+        if material_index.category(mat) != material_index.KODA:
+            continue
+        for node in mat.node_tree.nodes:
+            if node.type != 'GROUP' or not node.node_tree or group_base_name(node.node_tree) != group_name:
+                continue
+            uid = node.node_tree.session_uid
+            resolved = resolved_by_tree.get(uid)
+            if resolved is None:
+                key = (uid, _interface_signature(node), name)
+                resolved = _compiled.get(key)
+                if resolved is None:
+                    resolved = _compiled[key] = _compile(name, preset, node)
+                resolved_by_tree[uid] = resolved
+            inputs = node.inputs
+            for index, value in resolved:
+                socket = inputs[index]
+                if socket.is_linked:
+                    continue
+                socket.default_value = value
+                values_set += 1
+            nodes_updated += 1
+            log.count("Preset nodes updated")
+
+    return nodes_updated, values_set
+
+
+def materials_of(objects):
+    """Materials in the objects' slots, each once."""
+    seen = set()
+    materials = []
+    for obj in objects:
+        if obj.type != 'MESH':
+            continue
+        for slot in obj.material_slots:
+            mat = slot.material
+            if mat is not None and mat.session_uid not in seen:
+                seen.add(mat.session_uid)
+                materials.append(mat)
+    return materials
+
+
+def active_koda_node(obj):
+    """The first Koda group node of the object's active material."""
+    mat = obj.active_material if obj is not None else None
+    if mat is None or material_index.category(mat) != material_index.KODA:
+        return None
+    koda_names = config.KODA_NODE_NAMES.values()
+    for node in mat.node_tree.nodes:
+        if node.type == 'GROUP' and node.node_tree and group_base_name(node.node_tree) in koda_names:
+            return node
+    return None
@@ -0,0 +1,133 @@
+"""Add-on wide logging. Wraps a stdlib logger with a console handler, an
+in-memory ring buffer (shown by the Log panel) and an optional log file.
+
+Hot loops should not log one line per item - call count() instead and let
+the operator flush_counters() once when it finishes. Messages use lazy
+%-style arguments, so debug() calls cost a level check when debug output is
+disabled."""
+
+import logging
+from collections import Counter, deque
+
+LOGGER_NAME = "autokoda"
+RING_BUFFER_SIZE = 500
+CONSOLE_FORMAT = "[Auto Koda] %(levelname)s: %(message)s"
+FILE_FORMAT = "%(asctime)s %(levelname)s %(message)s"
+
+LEVELS = {
+    "DEBUG"   : logging.DEBUG,
+    "INFO"    : logging.INFO,
+    "WARNING" : logging.WARNING,
+    "ERROR"   : logging.ERROR,
+}
+
+logger = logging.getLogger(LOGGER_NAME)
+logger.propagate = False
+
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the last `capacity` formatted records in memory."""
+
+    def __init__(self, capacity=RING_BUFFER_SIZE):
+        super().__init__()
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record):
+        try:
+            self.records.append((record.levelname, self.format(record)))
+        except Exception:
+            self.handleError(record)
+
+
+_ring_handler = RingBufferHandler()
+_ring_handler.setFormatter(logging.Formatter("%(message)s"))
+_console_handler = logging.StreamHandler()
+_console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+_file_handler = None
+_counters = Counter()
+
+debug = logger.debug
+info = logger.info
+warning = logger.warning
+error = logger.error
+
+
+def setup(level="INFO", log_file=""):
+    """Attaches the console and ring buffer handlers. Safe to call more than
+    once (e.g. on add-on reload)."""
+    for handler in (_console_handler, _ring_handler):
+        if handler not in logger.handlers:
+            logger.addHandler(handler)
+    set_level(level)
+    set_log_file(log_file)
+
+
+def teardown():
+    set_log_file("")
+    for handler in (_console_handler, _ring_handler):
+        logger.removeHandler(handler)
+
+
+def set_level(level):
+    logger.setLevel(LEVELS.get(level, logging.INFO))
+
+
+def is_debug():
+    return logger.isEnabledFor(logging.DEBUG)
+
+
+def set_log_file(path):
+    """Mirrors log output into `path`. An empty path disables the file."""
+    global _file_handler
+
+    path = (path or "").strip()
+    if _file_handler is not None:
+        if path and _file_handler.baseFilename == path:
+            return
+        logger.removeHandler(_file_handler)
+        _file_handler.close()
+        _file_handler = None
+
+    if not path:
+        return
+
+    try:
+        _file_handler = logging.FileHandler(path, encoding="utf-8")
+    except OSError as e:
+        logger.error("Could not open log file '%s': %s", path, e)
+        return
+    _file_handler.setFormatter(logging.Formatter(FILE_FORMAT))
+    logger.addHandler(_file_handler)
+
+
+def count(key, amount=1):
+    """Aggregates a hot-loop event instead of logging it line by line."""
+    _counters[key] += amount
+
+
+def flush_counters(label=None):
+    """Logs one summary line per counter accumulated since the last flush,
+    then resets them. Operators call this once at the end of execute().
+    Returns the flushed counts."""
+    counts = dict(_counters)
+    if not counts:
+        return counts
+    summary = ", ".join(f"{key}: {value}" for key, value in sorted(counts.items()))
+    _counters.clear()
+    if label:
+        logger.info("%s - %s", label, summary)
+    else:
+        logger.info("%s", summary)
+    return counts
+
+
+def recent(limit=None):
+    """Returns (levelname, message) tuples from the ring buffer, oldest first."""
+    records = list(_ring_handler.records)
+    if limit is not None:
+        records = records[-limit:]
+    return records
+
+
+def clear():
+    _ring_handler.records.clear()
@@ -0,0 +1,155 @@
+"""Which kind of shader each material uses, kept in one index.
+
+Classifying a material means scanning its nodes, so the result is cached
+per material, keyed by session_uid (stable across renames within a
+session). The first query builds the index in a single pass over
+bpy.data.materials. After that, on_depsgraph_update reclassifies only the
+materials the depsgraph reports as changed.
+
+A few events drop the whole index, which is rebuilt lazily on the next
+query:
+- a node group update, since renaming a group can change what its users
+  classify as;
+- loading a file;
+- undo and redo.
+
+Materials missing from the index (created since the last update) are
+classified on first query.
+"""
+
+import bpy # type: ignore
+from . import config
+from .node_utils import group_base_name
+
+KODA = 'KODA'
+HERO_GRAVITAS = 'HERO_GRAVITAS'
+HERO_ENGINE = 'HERO_ENGINE'
+OTHER = 'OTHER'
+
+CATEGORIES = (KODA, HERO_GRAVITAS, HERO_ENGINE, OTHER)
+
+# session_uid -> category. None until the first query builds it
+_index = None
+
+# Counts for the current selection, for the Process Materials panel.
+# Dropped on every depsgraph update (selection changes included)
+_selection_counts = None
+
+
+def classify(mat):
+    """Category of a material from its nodes. Koda wins over the source
+    shaders, so a material that was already converted is never converted
+    again. Materials without nodes are OTHER."""
+    if not mat.use_nodes or mat.node_tree is None:
+        return OTHER
+
+    koda_names = config.KODA_NODE_NAMES.values()
+    hero_names = config.HERO_GRAVITAS_NODE_NAMES.values()
+    found = OTHER
+    for node in mat.node_tree.nodes:
+        if node.type == 'GROUP' and node.node_tree:
+            name = group_base_name(node.node_tree)
+            if name in koda_names:
+                return KODA
+            if name in hero_names:
+                found = HERO_GRAVITAS
+        elif found == OTHER and node.bl_idname == config.HERO_ENGINE_NODE_TYPE:
+            found = HERO_ENGINE
+    return found
+
+
+def _build():
+    global _index
+    _index = {mat.session_uid: classify(mat) for mat in bpy.data.materials}
+    return _index
+
+
+def category(mat):
+    index = _index if _index is not None else _build()
+    uid = mat.session_uid
+    found = index.get(uid)
+    if found is None:
+        found = index[uid] = classify(mat)
+    return found
+
+
+def update(mat):
+    """Reclassifies one material, for code that just changed its nodes."""
+    global _selection_counts
+    if _index is not None:
+        _index[mat.session_uid] = classify(mat)
+    _selection_counts = None
+
+
+def invalidate():
+    global _index, _selection_counts
+    _index = None
+    _selection_counts = None
+
+
+def counts(objects):
+    """{category: materials} over the objects' slots, each material
+    counted once."""
+    result = dict.fromkeys(CATEGORIES, 0)
+    seen = set()
+    for obj in objects:
+        if obj.type != 'MESH':
+            continue
+        for slot in obj.material_slots:
+            mat = slot.material
+            if mat is None or mat.session_uid in seen:
+                continue
+            seen.add(mat.session_uid)
+            result[category(mat)] += 1
+    return result
+
+
+def selection_counts(context):
+    """counts() for the selected objects, cached until the next depsgraph
+    update so panels can draw it every redraw."""
+    global _selection_counts
+    if _selection_counts is None:
+        _selection_counts = counts(context.selected_objects)
+    return _selection_counts
+
+
+@bpy.app.handlers.persistent
+def on_depsgraph_update(_scene, depsgraph):
+    global _selection_counts
+    _selection_counts = None
+    if _index is None:
+        return
+    for entry in depsgraph.updates:
+        id_data = entry.id
+        if isinstance(id_data, bpy.types.Material):
+            mat = id_data.original
+            _index[mat.session_uid] = classify(mat)
+        elif isinstance(id_data, bpy.types.NodeTree) and not id_data.is_embedded_data:
+            invalidate()
+            return
+
+
+@bpy.app.handlers.persistent
+def on_file_change(*_args):
+    invalidate()
+
+
+HANDLERS = (
+    ("depsgraph_update_post", on_depsgraph_update),
+    ("load_post", on_file_change),
+    ("undo_post", on_file_change),
+    ("redo_post", on_file_change),
+)
+
+
+def register_handlers():
+    for name, handler in HANDLERS:
+        getattr(bpy.app.handlers, name).append(handler)
+
+
+def unregister_handlers():
+    for name, handler in HANDLERS:
+        handlers = getattr(bpy.app.handlers, name)
+        if handler in handlers:
+            handlers.remove(handler)
+    invalidate()
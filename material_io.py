@@ -1,21 +1,23 @@
 import bpy # type: ignore
+from . import log
+from .profiling import phase, timed
 from .prefs import get_shaders_blend_path
 from .socket_utils import copy_socket_to_socket
+from .template_versions import is_library_at, stamp
 
 
 def link_material_with_koda_group(koda_group_name):
     shaders_blend_path = get_shaders_blend_path()
     if not shaders_blend_path:
-        print("[Auto Koda] Shaders.blend path invalid or not set.")
+        log.error("Shaders.blend path invalid or not set.")
         return None
 
-    with bpy.data.libraries.load(shaders_blend_path, link=True) as (data_from, data_to):
-        data_to.materials = data_from.materials
+    with phase("library load"):
+        with bpy.data.libraries.load(shaders_blend_path, link=True) as (data_from, data_to):
+            data_to.materials = data_from.materials
 
     for mat in bpy.data.materials:
-        if mat.library is None:
-            continue
-        if mat.library.filepath != shaders_blend_path:
+        if not is_library_at(mat.library, shaders_blend_path):
             continue
         if not mat.use_nodes:
             continue
@@ -27,15 +29,19 @@ def link_material_with_koda_group(koda_group_name):
                 and node.node_tree.name == koda_group_name
             ):
                 try:
-                    return mat.copy()
+                    with phase("material copy"):
+                        new_mat = mat.copy()
+                    stamp(new_mat, mat)
+                    return new_mat
                 except Exception as e:
-                    print(f"[Auto Koda] Failed to copy material for '{koda_group_name}': {e}")
+                    log.error("Failed to copy material for '%s': %s", koda_group_name, e)
                     return None
 
-    print(f"[Auto Koda] No linked template material found for '{koda_group_name}'")
+    log.error("No linked template material found for '%s'", koda_group_name)
     return None
 
 
+@timed("slot assignment")
 def assign_linked_material(obj, new_material, target_slot_index=None, preserve_inputs=False):
     if not obj or obj.type != 'MESH' or not new_material:
         return
@@ -70,11 +76,13 @@ def assign_linked_material(obj, new_material, target_slot_index=None, preserve_i
                 old_input = old_inputs_by_name.get(new_input.name)
                 if old_input:
                     if not copy_socket_to_socket(old_input, new_input):
-                        print(f"[Auto Koda] Skipping socket '{new_input.name}'")
+                        log.debug("Skipping socket '%s'", new_input.name)
+                        log.count("Sockets skipped")
 
     obj.data.materials[target_slot_index] = new_material
 
 
+@timed("remapping")
 def remap_old_material_references(old_mat, new_mat):
     if not old_mat or not new_mat:
         return
@@ -89,14 +97,16 @@ def remap_old_material_references(old_mat, new_mat):
         for i, slot_mat in enumerate(obj.data.materials):
             if slot_mat == old_mat_ptr:
                 obj.data.materials[i] = new_mat
-                print(f"[Auto Koda] Remapped material on '{obj.name}' slot {i}")
+                log.debug("Remapped material on '%s' slot %d", obj.name, i)
+                log.count("Material slots remapped")
 
     if old_mat_ptr.users <= 1:
         try:
             bpy.data.materials.remove(old_mat_ptr)
-            print(f"[Auto Koda] Removed unused material '{old_name}'")
+            log.debug("Removed unused material '%s'", old_name)
+            log.count("Old materials removed")
         except Exception as e:
-            print(f"[Auto Koda] Failed to remove '{old_name}': {e}")
+            log.warning("Failed to remove '%s': %s", old_name, e)
 
 
 def finalize_material_swap(obj, mat, new_mat, slot_index, koda_shader_name, log_label="material"):
@@ -109,7 +119,8 @@ def finalize_material_swap(obj, mat, new_mat, slot_index, koda_shader_name, log_
     old_mat = bpy.data.materials.get(f"{old_name}_OLD")
     remap_old_material_references(old_mat, new_mat)
 
-    print(
-        f"[Auto Koda] Replaced {log_label} '{old_name}' "
-        f"with Koda shader '{koda_shader_name}' in slot {slot_index}"
-    )
\ No newline at end of file
+    log.debug(
+        "Replaced %s '%s' with Koda shader '%s' in slot %d",
+        log_label, old_name, koda_shader_name, slot_index
+    )
+    log.count("Materials converted")
\ No newline at end of file
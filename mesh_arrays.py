@@ -0,0 +1,467 @@
+"""Vectorised mesh cleanup on plain NumPy arrays, as an alternative to the
+BMesh round-trip in mesh_utils. Nothing in here touches bpy: mesh_utils
+reads the arrays out with foreach_get and writes the result back in bulk.
+
+Faces are described the same way Blender stores them: a flat array of
+corner (loop) vertex indices plus the start offset of each face."""
+
+import numpy as np
+
+# Hash multipliers for the spatial grid (Teschner et al.). Cells whose keys
+# collide share a bucket, which only adds candidate pairs - every pair is
+# distance-checked afterwards.
+_HASH_PRIMES = np.array([73856093, 19349663, 83492791], dtype=np.int64)
+
+# The cell itself plus the 13 neighbours in the positive half-space. With
+# cells as wide as the merge distance, every pair closer than that distance
+# lies in one of these 14 cell pairings.
+_HALF_NEIGHBOURHOOD = np.array(
+    [(0, 0, 0)]
+    + [
+        (dx, dy, dz)
+        for dx in (-1, 0, 1)
+        for dy in (-1, 0, 1)
+        for dz in (-1, 0, 1)
+        if (dx, dy, dz) > (0, 0, 0)
+    ],
+    dtype=np.int64,
+)
+
+
+def _cell_keys(cells):
+    return np.bitwise_xor.reduce(cells * _HASH_PRIMES, axis=1)
+
+
+def _expand_pairs(starts_a, sizes_a, starts_b, sizes_b, order):
+    """Every (a, b) vertex combination between runs of the sorted vertex
+    order, for each paired run."""
+    pair_counts = sizes_a * sizes_b
+    total = int(pair_counts.sum())
+    owner = np.repeat(np.arange(len(pair_counts)), pair_counts)
+    within = np.arange(total) - np.repeat(np.cumsum(pair_counts) - pair_counts, pair_counts)
+    sizes_b = sizes_b[owner]
+    verts_a = order[starts_a[owner] + within // sizes_b]
+    verts_b = order[starts_b[owner] + within % sizes_b]
+    return verts_a, verts_b
+
+
+def close_vertex_pairs(positions, dist):
+    """Returns (a, b) index arrays of every vertex pair closer than `dist`,
+    found by bucketing positions into a hash grid of cell size `dist`. Each
+    occupied cell looks up the buckets of its half-neighbourhood, so every
+    close pair is reported at least once."""
+    count = len(positions)
+    if count < 2:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+
+    cells = np.floor(positions / dist).astype(np.int64)
+    keys = _cell_keys(cells)
+
+    # Sorted by hash key, then by exact cell within colliding keys
+    order = np.lexsort((cells[:, 2], cells[:, 1], cells[:, 0], keys))
+    sorted_cells = cells[order]
+    sorted_keys = keys[order]
+
+    new_cell = np.empty(count, dtype=bool)
+    new_cell[0] = True
+    new_cell[1:] = (sorted_keys[1:] != sorted_keys[:-1]) | (sorted_cells[1:] != sorted_cells[:-1]).any(axis=1)
+    cell_starts = np.nonzero(new_cell)[0]
+    cell_sizes = np.diff(np.append(cell_starts, count))
+    cell_coords = sorted_cells[cell_starts]
+
+    unique_keys, key_starts, key_sizes = np.unique(sorted_keys, return_index=True, return_counts=True)
+
+    pairs_a = []
+    pairs_b = []
+    dist_sq = dist * dist
+
+    for offset in _HALF_NEIGHBOURHOOD:
+        if not offset.any():
+            # Pairs within a bucket; only buckets holding several vertices
+            multi = np.nonzero(key_sizes > 1)[0]
+            verts_a, verts_b = _expand_pairs(
+                key_starts[multi], key_sizes[multi], key_starts[multi], key_sizes[multi], order
+            )
+            keep = verts_a < verts_b
+        else:
+            neighbour_keys = _cell_keys(cell_coords + offset)
+            found = np.searchsorted(unique_keys, neighbour_keys)
+            found[found == len(unique_keys)] = 0
+            hit = np.nonzero(unique_keys[found] == neighbour_keys)[0]
+            if not len(hit):
+                continue
+            bucket = found[hit]
+            verts_a, verts_b = _expand_pairs(
+                cell_starts[hit], cell_sizes[hit], key_starts[bucket], key_sizes[bucket], order
+            )
+            keep = verts_a != verts_b
+
+        verts_a = verts_a[keep]
+        verts_b = verts_b[keep]
+
+        delta = positions[verts_a] - positions[verts_b]
+        close = np.einsum("ij,ij->i", delta, delta) <= dist_sq
+        pairs_a.append(verts_a[close])
+        pairs_b.append(verts_b[close])
+
+    return np.concatenate(pairs_a), np.concatenate(pairs_b)
+
+
+def merge_labels(count, pairs_a, pairs_b):
+    """Connected components over the given pairs. Every vertex is labelled
+    with the lowest index in its group, which becomes the merge target."""
+    labels = np.arange(count, dtype=np.int64)
+    if not len(pairs_a):
+        return labels
+
+    while True:
+        lowest = np.minimum(labels[pairs_a], labels[pairs_b])
+        previous = labels.copy()
+        np.minimum.at(labels, pairs_a, lowest)
+        np.minimum.at(labels, pairs_b, lowest)
+        # Pointer jumping, so long chains collapse in a few passes
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+        if np.array_equal(labels, previous):
+            return labels
+
+
+def merge_by_distance(positions, dist):
+    """Returns (vert_src, vert_map): the old indices of the vertices that
+    survive the merge, and the new index of every old vertex. Close pairs
+    chain, so a whole connected group merges into its lowest vertex."""
+    pairs_a, pairs_b = close_vertex_pairs(positions, dist)
+    labels = merge_labels(len(positions), pairs_a, pairs_b)
+
+    kept = labels == np.arange(len(positions))
+    new_index = np.cumsum(kept) - 1
+    return np.nonzero(kept)[0], new_index[labels]
+
+
+def face_sizes(face_starts, corner_count):
+    return np.diff(np.append(face_starts, corner_count))
+
+
+def next_corners(face_starts, corner_count):
+    """Index of the following corner within the same face, for every corner."""
+    sizes = face_sizes(face_starts, corner_count)
+    face_of_corner = np.repeat(np.arange(len(face_starts)), sizes)
+    local = np.arange(corner_count) - face_starts[face_of_corner]
+    return face_starts[face_of_corner] + (local + 1) % sizes[face_of_corner]
+
+
+def remap_faces(corner_verts, face_starts, vert_map):
+    """Rewrites corner vertex indices through vert_map in bulk. Corners that
+    now repeat the previous vertex are dropped, as are faces left with fewer
+    than three corners. Returns (corner_verts, corner_src, face_starts,
+    face_src), where the *_src arrays index the input corners/faces."""
+    corner_count = len(corner_verts)
+    new_verts = vert_map[corner_verts]
+
+    following = next_corners(face_starts, corner_count)
+    keep_corner = new_verts != new_verts[following]
+
+    sizes = face_sizes(face_starts, corner_count)
+    face_of_corner = np.repeat(np.arange(len(face_starts)), sizes)
+    kept_sizes = np.bincount(face_of_corner, weights=keep_corner, minlength=len(face_starts)).astype(np.int64)
+
+    keep_face = kept_sizes >= 3
+    keep_corner &= keep_face[face_of_corner]
+
+    corner_src = np.nonzero(keep_corner)[0]
+    face_src = np.nonzero(keep_face)[0]
+    new_sizes = kept_sizes[face_src]
+    new_starts = np.cumsum(new_sizes) - new_sizes
+
+    return new_verts[corner_src], corner_src, new_starts, face_src
+
+
+def edge_keys(edge_verts, vert_count):
+    """Order-independent integer key for each (v1, v2) edge row."""
+    low = np.minimum(edge_verts[:, 0], edge_verts[:, 1]).astype(np.int64)
+    high = np.maximum(edge_verts[:, 0], edge_verts[:, 1]).astype(np.int64)
+    return low * vert_count + high
+
+
+def corner_edge_keys(corner_verts, face_starts, vert_count):
+    """Edge key (see edge_keys) of the edge each corner starts."""
+    following = next_corners(face_starts, len(corner_verts))
+    return edge_keys(np.stack([corner_verts, corner_verts[following]], axis=1), vert_count)
+
+
+def discontinuous_edge_keys(corner_verts, face_starts, values, vert_count, tolerance):
+    """Keys of edges across which a per-corner value (a UV map, corner
+    normals...) changes: the faces on either side disagree by more than
+    `tolerance` at one of the edge's vertices."""
+    corner_count = len(corner_verts)
+    values = values.reshape(corner_count, -1)
+    following = next_corners(face_starts, corner_count)
+    keys = edge_keys(np.stack([corner_verts, corner_verts[following]], axis=1), vert_count)
+
+    # Each corner contributes its value at both ends of the edge it starts
+    edges = np.concatenate([keys, keys])
+    verts = np.concatenate([corner_verts, corner_verts[following]]).astype(np.int64)
+    samples = np.concatenate([values, values[following]])
+
+    order = np.lexsort((verts, edges))
+    edges = edges[order]
+    verts = verts[order]
+    samples = samples[order]
+
+    group_start = np.empty(len(edges), dtype=bool)
+    group_start[:1] = True
+    group_start[1:] = (edges[1:] != edges[:-1]) | (verts[1:] != verts[:-1])
+    first = np.maximum.accumulate(np.where(group_start, np.arange(len(edges)), 0))
+
+    differs = np.abs(samples - samples[first]).max(axis=1, initial=0.0) > tolerance
+    return np.unique(edges[differs])
+
+
+def _normalized(vectors):
+    lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return vectors / lengths
+
+
+def _angle_between(a, b):
+    """Angle between rows of two sets of unit vectors."""
+    return np.arccos(np.clip(np.einsum("ij,ij->i", a, b), -1.0, 1.0))
+
+
+def _tri_normal(a, b, c):
+    return _normalized(np.cross(b - a, c - a))
+
+
+def _tri_area(a, b, c):
+    return np.linalg.norm(np.cross(b - a, c - a), axis=1) * 0.5
+
+
+def _quad_shape(q0, q1, q2, q3, angle_face, angle_shape):
+    """Checks and scores candidate quads the way bmesh.ops.join_triangles
+    does: the two triangles' normals must be within angle_face, the quad must
+    be convex with every corner within angle_shape of 90 degrees. Returns
+    (acceptable, error) where lower error means a better quad."""
+    quad = (q0, q1, q2, q3)
+    corner_errors = []
+    for i in range(4):
+        to_prev = _normalized(quad[i - 1] - quad[i])
+        to_next = _normalized(quad[(i + 1) % 4] - quad[i])
+        corner_errors.append(np.abs(_angle_between(to_prev, to_next) - np.pi / 2))
+    corner_errors = np.stack(corner_errors, axis=1)
+
+    # Split along the joined edge (q0-q2) and along the other diagonal
+    normal_a1 = _tri_normal(q0, q1, q2)
+    normal_a2 = _tri_normal(q0, q2, q3)
+    normal_b1 = _tri_normal(q0, q1, q3)
+    normal_b2 = _tri_normal(q1, q2, q3)
+
+    convex = (
+        (np.einsum("ij,ij->i", np.cross(q1 - q0, q2 - q0), np.cross(q2 - q0, q3 - q0)) > 0)
+        & (np.einsum("ij,ij->i", np.cross(q2 - q1, q3 - q1), np.cross(q3 - q1, q0 - q1)) > 0)
+    )
+
+    face_angle = _angle_between(normal_a1, normal_a2)
+    acceptable = (
+        convex
+        & (face_angle <= angle_face)
+        & (corner_errors <= angle_shape).all(axis=1)
+    )
+
+    area_a = _tri_area(q0, q1, q2) + _tri_area(q0, q2, q3)
+    area_b = _tri_area(q0, q1, q3) + _tri_area(q1, q2, q3)
+    area_max = np.maximum(area_a, area_b)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        concavity = np.where(area_max > 0, 1.0 - np.minimum(area_a, area_b) / area_max, 1.0)
+
+    error = (
+        (face_angle + _angle_between(normal_b1, normal_b2)) / (2 * np.pi)
+        + corner_errors.sum(axis=1) / (2 * np.pi)
+        + concavity
+    )
+    acceptable &= np.isfinite(error)
+    return acceptable, error
+
+
+def join_triangles(positions, corner_verts, face_starts, face_materials=None, corner_layers=(),
+                   delimit_keys=None, angle_face=np.radians(40.0), angle_shape=np.radians(40.0),
+                   tolerance=1e-5):
+    """Array version of bmesh.ops.join_triangles: pairs of triangles sharing
+    a manifold edge become quads, best-shaped pairs first. Pairs are not
+    joined across a different material, a key in `delimit_keys` (seams and
+    sharp edges), or a change in any of `corner_layers` (UVs, colours).
+
+    Returns (corner_src, face_starts, face_src); a quad takes the place and
+    attributes of its first triangle."""
+    corner_count = len(corner_verts)
+    face_count = len(face_starts)
+    sizes = face_sizes(face_starts, corner_count)
+    following = next_corners(face_starts, corner_count)
+    face_of_corner = np.repeat(np.arange(face_count), sizes)
+    unchanged = (np.arange(corner_count), face_starts, np.arange(face_count))
+
+    keys = corner_edge_keys(corner_verts, face_starts, len(positions))
+    _unique, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+
+    # Manifold edges whose two faces are both triangles
+    candidates = np.nonzero((sizes[face_of_corner] == 3) & (counts[inverse] == 2))[0]
+    candidates = candidates[np.argsort(keys[candidates], kind="stable")]
+    paired = np.nonzero(keys[candidates][:-1] == keys[candidates][1:])[0]
+    c1 = candidates[paired]
+    c2 = candidates[paired + 1]
+
+    n1 = following[c1]
+    p1 = following[n1]
+    n2 = following[c2]
+    p2 = following[n2]
+
+    keep = (
+        (face_of_corner[c1] != face_of_corner[c2])
+        # Consistent winding, so the quad keeps the triangles' facing
+        & (corner_verts[c1] == corner_verts[n2])
+        & (corner_verts[n1] == corner_verts[c2])
+    )
+    if face_materials is not None:
+        keep &= face_materials[face_of_corner[c1]] == face_materials[face_of_corner[c2]]
+    if delimit_keys is not None and len(delimit_keys):
+        keep &= ~np.isin(keys[c1], delimit_keys)
+    for layer in corner_layers:
+        layer = layer.reshape(corner_count, -1)
+        keep &= np.abs(layer[c1] - layer[n2]).max(axis=1) <= tolerance
+        keep &= np.abs(layer[n1] - layer[c2]).max(axis=1) <= tolerance
+
+    c1, n1, p1, c2, p2 = (a[keep] for a in (c1, n1, p1, c2, p2))
+    if not len(c1):
+        return unchanged
+
+    # Quad a, y, b, x from triangles (a, b, x) and (b, a, y)
+    quad_corners = np.stack([c1, p2, n1, p1], axis=1)
+    q = positions[corner_verts[quad_corners]].astype(np.float64)
+    acceptable, error = _quad_shape(q[:, 0], q[:, 1], q[:, 2], q[:, 3], angle_face, angle_shape)
+
+    quad_corners = quad_corners[acceptable]
+    error = error[acceptable]
+    tri_a = face_of_corner[quad_corners[:, 0]]
+    tri_b = face_of_corner[quad_corners[:, 1]]
+    if not len(quad_corners):
+        return unchanged
+
+    # Greedy by error, ties broken by edge key. Taking every candidate that
+    # ranks best for both of its triangles, round after round, gives the
+    # same result as walking the sorted list one candidate at a time.
+    rank = np.empty(len(error), dtype=np.int64)
+    rank[np.lexsort((keys[quad_corners[:, 0]], error))] = np.arange(len(error))
+    alive = np.ones(len(error), dtype=bool)
+    chosen = []
+    while alive.any():
+        live = np.nonzero(alive)[0]
+        best = np.full(face_count, len(error), dtype=np.int64)
+        np.minimum.at(best, tri_a[live], rank[live])
+        np.minimum.at(best, tri_b[live], rank[live])
+        won = live[(best[tri_a[live]] == rank[live]) & (best[tri_b[live]] == rank[live])]
+        chosen.append(won)
+
+        used = np.zeros(face_count, dtype=bool)
+        used[tri_a[won]] = True
+        used[tri_b[won]] = True
+        alive[live[used[tri_a[live]] | used[tri_b[live]]]] = False
+
+    chosen = np.concatenate(chosen)
+    quad_corners = quad_corners[chosen]
+
+    keep_face = np.ones(face_count, dtype=bool)
+    keep_face[tri_b[chosen]] = False
+    new_sizes = sizes.copy()
+    new_sizes[tri_a[chosen]] = 4
+
+    face_src = np.nonzero(keep_face)[0]
+    new_sizes = new_sizes[face_src]
+    new_starts = np.cumsum(new_sizes) - new_sizes
+
+    face_of_new_corner = np.repeat(np.arange(len(face_src)), new_sizes)
+    local = np.arange(int(new_sizes.sum())) - new_starts[face_of_new_corner]
+    corner_src = face_starts[face_src][face_of_new_corner] + local
+
+    new_face_of = np.full(face_count, -1, dtype=np.int64)
+    new_face_of[face_src] = np.arange(len(face_src))
+    quad_slots = new_starts[new_face_of[tri_a[chosen]]][:, None] + np.arange(4)
+    corner_src[quad_slots] = quad_corners
+
+    return corner_src, new_starts, face_src
+
+
+def prepare(payload):
+    """Runs the array cleanup stages on one mesh's arrays. This is what
+    worker processes execute, so `payload` and the result hold only plain
+    values and NumPy arrays.
+
+    payload keys: positions, corner_verts, face_starts, edge_verts, seams,
+    sharp_edges, face_materials (or None), uv_layers and color_layers
+    (lists of per-corner arrays), corner_normals (or None), merge_distance,
+    join, angle_face, angle_shape, uv_tolerance, normal_tolerance,
+    mark_splits.
+
+    The result maps new vertices, corners and faces back to the input
+    (vert_src, vert_map, corner_src, face_src), gives the new corner_verts
+    and face_starts, and lists the seam_keys and sharp_keys of edges that
+    must be flagged on the rebuilt mesh."""
+    positions = payload["positions"].astype(np.float64)
+    vert_src, vert_map = merge_by_distance(positions, payload["merge_distance"])
+    vert_count = len(vert_src)
+
+    corner_verts, corner_src, face_starts, face_src = remap_faces(
+        payload["corner_verts"], payload["face_starts"], vert_map
+    )
+
+    old_edges = vert_map[payload["edge_verts"]].reshape(-1, 2)
+    old_keys = edge_keys(old_edges, vert_count)
+    seam_keys = [old_keys[payload["seams"]]]
+    sharp_keys = [old_keys[payload["sharp_edges"]]]
+
+    # Welding split vertices back together turns UV and normal splits into
+    # ordinary edges. remove_doubles leaves them that way; with mark_splits
+    # they are kept as seams / sharp edges instead
+    if payload["mark_splits"] and len(vert_src) < len(positions) and len(corner_verts):
+        for layer in payload["uv_layers"]:
+            seam_keys.append(discontinuous_edge_keys(
+                corner_verts, face_starts, layer[corner_src], vert_count, payload["uv_tolerance"]
+            ))
+        if payload["corner_normals"] is not None:
+            sharp_keys.append(discontinuous_edge_keys(
+                corner_verts, face_starts, payload["corner_normals"][corner_src],
+                vert_count, payload["normal_tolerance"]
+            ))
+
+    seam_keys = np.unique(np.concatenate(seam_keys))
+    sharp_keys = np.unique(np.concatenate(sharp_keys))
+
+    if payload["join"] and len(corner_verts):
+        face_materials = payload["face_materials"]
+        joined_corners, face_starts, joined_faces = join_triangles(
+            positions[vert_src],
+            corner_verts,
+            face_starts,
+            face_materials=face_materials[face_src] if face_materials is not None else None,
+            corner_layers=[layer[corner_src] for layer in payload["uv_layers"] + payload["color_layers"]],
+            delimit_keys=np.union1d(seam_keys, sharp_keys),
+            angle_face=payload["angle_face"],
+            angle_shape=payload["angle_shape"],
+            tolerance=payload["uv_tolerance"],
+        )
+        corner_verts = corner_verts[joined_corners]
+        corner_src = corner_src[joined_corners]
+        face_src = face_src[joined_faces]
+
+    return {
+        "vert_src": vert_src,
+        "vert_map": vert_map,
+        "corner_verts": corner_verts,
+        "corner_src": corner_src,
+        "face_starts": face_starts,
+        "face_src": face_src,
+        "seam_keys": seam_keys,
+        "sharp_keys": sharp_keys,
+    }
@@ -0,0 +1,215 @@
+"""Bulk transfer of mesh geometry between bpy meshes and NumPy arrays via
+foreach_get/foreach_set, used by the array-based stages in mesh_utils.
+
+A rebuild replaces the mesh's topology in place and carries every generic
+attribute across through source-index arrays. Vertex groups and shape keys
+are not attributes, so meshes using them must stay on the BMesh path - see
+supports_rebuild()."""
+
+import numpy as np
+from . import mesh_arrays
+
+CUSTOM_NORMAL_ATTRIBUTE = "custom_normal"
+SHARP_EDGE_ATTRIBUTE = "sharp_edge"
+
+# Attribute data_type -> (foreach property, components, dtype)
+_ATTRIBUTE_LAYOUT = {
+    'FLOAT'        : ("value", 1, np.float32),
+    'INT'          : ("value", 1, np.int32),
+    'INT8'         : ("value", 1, np.int32),
+    'BOOLEAN'      : ("value", 1, bool),
+    'FLOAT2'       : ("vector", 2, np.float32),
+    'INT32_2D'     : ("value", 2, np.int32),
+    'FLOAT_VECTOR' : ("vector", 3, np.float32),
+    'FLOAT_COLOR'  : ("color", 4, np.float32),
+    'BYTE_COLOR'   : ("color", 4, np.float32),
+    'QUATERNION'   : ("value", 4, np.float32),
+    'FLOAT4X4'     : ("value", 16, np.float32),
+}
+
+
+def supports_rebuild(obj):
+    """Whether the object's mesh can go through read_mesh()/write_mesh()
+    without losing data."""
+    mesh = obj.data
+    return not obj.vertex_groups and mesh.shape_keys is None
+
+
+def _domain_size(mesh, domain):
+    return {
+        'POINT'  : len(mesh.vertices),
+        'EDGE'   : len(mesh.edges),
+        'FACE'   : len(mesh.polygons),
+        'CORNER' : len(mesh.loops),
+    }.get(domain)
+
+
+def read_collection(collection, prop, components, dtype):
+    values = np.empty(len(collection) * components, dtype=dtype)
+    collection.foreach_get(prop, values)
+    return values.reshape(-1, components) if components > 1 else values
+
+
+def read_attribute(attr, size):
+    prop, components, dtype = _ATTRIBUTE_LAYOUT[attr.data_type]
+    values = np.empty(size * components, dtype=dtype)
+    attr.data.foreach_get(prop, values)
+    return values.reshape(size, components) if components > 1 else values
+
+
+def read_mesh(mesh, skip=()):
+    """Reads topology and every generic attribute of `mesh` into a dict of
+    arrays. Attribute names in `skip` are left out."""
+    data = {
+        "positions"    : read_collection(mesh.vertices, "co", 3, np.float32),
+        "corner_verts" : read_collection(mesh.loops, "vertex_index", 1, np.int32),
+        "face_starts"  : read_collection(mesh.polygons, "loop_start", 1, np.int32),
+        "edge_verts"   : read_collection(mesh.edges, "vertices", 2, np.int32),
+        "seams"        : read_collection(mesh.edges, "use_seam", 1, bool),
+        "attributes"   : [],
+        "uv_active"    : mesh.uv_layers.active_index,
+        "uv_render"    : next((uv.name for uv in mesh.uv_layers if uv.active_render), None),
+        "color_active" : mesh.color_attributes.active_color_name,
+        "color_render" : mesh.color_attributes.default_color_name,
+    }
+
+    for attr in mesh.attributes:
+        name = attr.name
+        if name.startswith(".") or name == "position" or name in skip:
+            continue
+        if attr.data_type not in _ATTRIBUTE_LAYOUT:
+            continue
+        size = _domain_size(mesh, attr.domain)
+        if size is None:
+            continue
+        data["attributes"].append((name, attr.data_type, attr.domain, read_attribute(attr, size)))
+
+    return data
+
+
+def uv_layer_names(data):
+    return [
+        name for name, data_type, domain, _values in data["attributes"]
+        if data_type == 'FLOAT2' and domain == 'CORNER'
+    ]
+
+
+def write_mesh(mesh, data, vert_src, vert_map, corner_verts, corner_src, face_starts, face_src):
+    """Replaces the topology of `mesh` with the given arrays. Point, corner
+    and face attributes from `data` are carried over through the *_src index
+    arrays (vert_map gives the new index of every old vertex). Edges are
+    rebuilt from the faces, loose edges are re-added, and edge attributes
+    and seams are matched back onto them by their remapped vertex pair.
+
+    Returns the new corner -> edge index array."""
+    vert_count = len(vert_src)
+    old_edges = vert_map[data["edge_verts"]].reshape(-1, 2)
+    old_edge_keys = mesh_arrays.edge_keys(old_edges, vert_count)
+
+    mesh.clear_geometry()
+    mesh.vertices.add(vert_count)
+    mesh.loops.add(len(corner_verts))
+    mesh.polygons.add(len(face_starts))
+
+    mesh.vertices.foreach_set("co", data["positions"][vert_src].ravel())
+    mesh.loops.foreach_set("vertex_index", corner_verts.astype(np.int32))
+    mesh.polygons.foreach_set("loop_start", face_starts.astype(np.int32))
+    mesh.update(calc_edges=True)
+
+    edge_verts = read_collection(mesh.edges, "vertices", 2, np.int32)
+    new_keys = mesh_arrays.edge_keys(edge_verts, vert_count)
+
+    # calc_edges only creates edges used by faces, so add back the old loose
+    # edges. Edges that faces used before but not now (e.g. the diagonal of
+    # two joined triangles) are meant to disappear.
+    old_face_keys = mesh_arrays.corner_edge_keys(
+        vert_map[data["corner_verts"]], data["face_starts"], vert_count
+    )
+    loose = (
+        ~np.isin(old_edge_keys, old_face_keys)
+        & ~np.isin(old_edge_keys, new_keys)
+        & (old_edges[:, 0] != old_edges[:, 1])
+    )
+    if loose.any():
+        _keys, first = np.unique(old_edge_keys[loose], return_index=True)
+        missing = old_edges[loose][first]
+        mesh.edges.add(len(missing))
+        all_edges = np.concatenate([edge_verts, missing]).astype(np.int32)
+        mesh.edges.foreach_set("vertices", all_edges.ravel())
+        mesh.update()
+        new_keys = mesh_arrays.edge_keys(all_edges, vert_count)
+
+    edge_match = None
+    if len(old_edge_keys) and len(new_keys):
+        order = np.argsort(old_edge_keys, kind="stable")
+        found = np.searchsorted(old_edge_keys[order], new_keys)
+        found[found == len(order)] = 0
+        matched = old_edge_keys[order][found] == new_keys
+        edge_match = (order[found], matched)
+
+    source_index = {'POINT': vert_src, 'CORNER': corner_src, 'FACE': face_src}
+
+    for name, data_type, domain, values in data["attributes"]:
+        if domain == 'EDGE':
+            if edge_match is None:
+                continue
+            src, matched = edge_match
+            new_values = values[src]
+            new_values[~matched] = 0
+        else:
+            new_values = values[source_index[domain]]
+
+        attr = mesh.attributes.get(name)
+        if attr is None or attr.data_type != data_type or attr.domain != domain:
+            if attr is not None:
+                mesh.attributes.remove(attr)
+            attr = mesh.attributes.new(name, data_type, domain)
+        prop, _components, dtype = _ATTRIBUTE_LAYOUT[data_type]
+        attr.data.foreach_set(prop, np.ascontiguousarray(new_values, dtype=dtype).ravel())
+
+    if edge_match is not None:
+        src, matched = edge_match
+        seams = data["seams"][src] & matched
+        mesh.edges.foreach_set("use_seam", seams)
+
+    if 0 <= data["uv_active"] < len(mesh.uv_layers):
+        mesh.uv_layers.active_index = data["uv_active"]
+    if data["uv_render"] and data["uv_render"] in mesh.uv_layers:
+        mesh.uv_layers[data["uv_render"]].active_render = True
+    if data["color_active"] and data["color_active"] in mesh.color_attributes:
+        mesh.color_attributes.active_color_name = data["color_active"]
+    if data["color_render"] and data["color_render"] in mesh.color_attributes:
+        mesh.color_attributes.default_color_name = data["color_render"]
+
+    mesh.update()
+    return read_collection(mesh.loops, "edge_index", 1, np.int32)
+
+
+def flag_edges_by_key(mesh, seam_keys, sharp_keys):
+    """Marks the edges whose key (see mesh_arrays.edge_keys) is listed as
+    seams / sharp edges, on top of whatever is already marked."""
+    edge_verts = read_collection(mesh.edges, "vertices", 2, np.int32)
+    keys = mesh_arrays.edge_keys(edge_verts, len(mesh.vertices))
+
+    if len(seam_keys):
+        seams = read_collection(mesh.edges, "use_seam", 1, bool)
+        mesh.edges.foreach_set("use_seam", seams | np.isin(keys, seam_keys))
+    if len(sharp_keys):
+        sharp = read_edge_flags(mesh, SHARP_EDGE_ATTRIBUTE)
+        write_edge_flags(mesh, SHARP_EDGE_ATTRIBUTE, sharp | np.isin(keys, sharp_keys))
+
+
+def read_edge_flags(mesh, name):
+    attr = mesh.attributes.get(name)
+    if attr is None or attr.domain != 'EDGE' or attr.data_type != 'BOOLEAN':
+        return np.zeros(len(mesh.edges), dtype=bool)
+    return read_attribute(attr, len(mesh.edges))
+
+
+def write_edge_flags(mesh, name, flags):
+    attr = mesh.attributes.get(name)
+    if attr is None:
+        if not flags.any():
+            return
+        attr = mesh.attributes.new(name, 'BOOLEAN', 'EDGE')
+    attr.data.foreach_set("value", flags)
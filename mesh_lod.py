@@ -0,0 +1,261 @@
+"""Level-of-detail variants for prepared meshes.
+
+generate_lods() decimates each object's mesh at each of config.LOD_RATIOS
+into new mesh datablocks, once per mesh: objects sharing a mesh share its
+levels. The full-resolution mesh is level 0. All levels are
+kept in the object custom property LODS_PROPERTY, as ID references that
+also keep the unused levels alive. set_lod() and set_lods_by_distance() swap
+obj.data between them.
+
+Decimation runs through a temporary Decimate modifier evaluated with
+Mesh.new_from_object, so no operator or edit mode is needed:
+- UV seam and material border vertices are weighted so Collapse removes
+  them last.
+- Vertex weights come through interpolated.
+- Shape keys are rebuilt on each level by taking the offset of the nearest
+  full-resolution vertex."""
+
+import bpy  # type: ignore
+import numpy as np
+from mathutils.kdtree import KDTree  # type: ignore
+from . import config, log, mesh_io
+from .adaptive_subsurf import screen_fraction
+
+LODS_PROPERTY = "auto_koda_lods"
+LEVEL_PROPERTY = "auto_koda_lod_level"
+
+_PROTECT_GROUP = "_auto_koda_lod_protect"
+
+
+def get_lods(obj):
+    """{level: mesh} of the variants stored on obj, level 0 included."""
+    stored = obj.get(LODS_PROPERTY)
+    if not stored:
+        return {}
+    return {int(level): mesh for level, mesh in stored.items() if mesh is not None}
+
+
+def border_vertices(mesh):
+    """Indices of vertices on UV seams or on edges between faces with
+    different materials."""
+    edge_verts = mesh_io.read_collection(mesh.edges, "vertices", 2, np.int32)
+    seams = mesh_io.read_collection(mesh.edges, "use_seam", 1, bool)
+    border = seams.copy()
+
+    if len(mesh.materials) > 1 and len(mesh.polygons):
+        corner_edges = mesh_io.read_collection(mesh.loops, "edge_index", 1, np.int32)
+        face_starts = mesh_io.read_collection(mesh.polygons, "loop_start", 1, np.int32)
+        materials = mesh_io.read_collection(mesh.polygons, "material_index", 1, np.int32)
+        corner_faces = np.repeat(np.arange(len(face_starts)), np.diff(np.append(face_starts, len(corner_edges))))
+        corner_materials = materials[corner_faces]
+
+        lowest = np.full(len(edge_verts), np.iinfo(np.int32).max, dtype=np.int32)
+        highest = np.full(len(edge_verts), -1, dtype=np.int32)
+        np.minimum.at(lowest, corner_edges, corner_materials)
+        np.maximum.at(highest, corner_edges, corner_materials)
+        border |= (highest >= 0) & (lowest != highest)
+
+    return np.unique(edge_verts[border])
+
+
+def _shape_key_source(mesh):
+    """(basis positions, [(block, positions)]) of the mesh's shape keys,
+    or None without shape keys."""
+    if mesh.shape_keys is None:
+        return None
+    blocks = []
+    for block in mesh.shape_keys.key_blocks:
+        co = np.empty(len(block.data) * 3, dtype=np.float32)
+        block.data.foreach_get("co", co)
+        blocks.append((block, co.reshape(-1, 3)))
+    basis = next(co for block, co in blocks if block == mesh.shape_keys.reference_key)
+    return basis, blocks
+
+
+def _transfer_shape_keys(holder, source):
+    """Adds the source shape keys to the mesh of the temporary `holder`
+    object, moving each vertex by the offset of its nearest source vertex."""
+    basis, blocks = source
+    tree = KDTree(len(basis))
+    for index, co in enumerate(basis):
+        tree.insert(co, index)
+    tree.balance()
+
+    mesh = holder.data
+    positions = mesh_io.read_collection(mesh.vertices, "co", 3, np.float32)
+    nearest = np.array([tree.find(co)[1] for co in positions], dtype=np.int64)
+
+    for block, co in blocks:
+        key = holder.shape_key_add(name=block.name, from_mix=False)
+        key.data.foreach_set("co", (positions + (co - basis)[nearest]).ravel())
+        key.value = block.value
+        key.slider_min = block.slider_min
+        key.slider_max = block.slider_max
+        key.vertex_group = block.vertex_group
+        key.mute = block.mute
+        key.interpolation = block.interpolation
+
+    for block, _co in blocks:
+        key = mesh.shape_keys.key_blocks[block.name]
+        key.relative_key = mesh.shape_keys.key_blocks[block.relative_key.name]
+
+
+def _decimated_mesh(obj, ratio, level, protect, shape_source):
+    """Evaluates obj with only a temporary Decimate modifier enabled and
+    returns the result as a new mesh."""
+    base = obj.data
+    hidden = [mod for mod in obj.modifiers if mod.show_viewport]
+    for mod in hidden:
+        mod.show_viewport = False
+    show_only_shape_key = obj.show_only_shape_key
+    obj.show_only_shape_key = shape_source is not None
+    active_shape_key = obj.active_shape_key_index
+    obj.active_shape_key_index = 0
+
+    decimate = obj.modifiers.new(name="_auto_koda_lod", type='DECIMATE')
+    decimate.decimate_type = 'COLLAPSE'
+    decimate.ratio = ratio
+    if protect is not None:
+        decimate.vertex_group = protect.name
+        decimate.vertex_group_factor = config.LOD_BORDER_PROTECTION
+
+    try:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        evaluated = obj.evaluated_get(depsgraph)
+        mesh = bpy.data.meshes.new_from_object(evaluated, preserve_all_data_layers=True, depsgraph=depsgraph)
+    finally:
+        obj.modifiers.remove(decimate)
+        for mod in hidden:
+            mod.show_viewport = True
+        obj.show_only_shape_key = show_only_shape_key
+        obj.active_shape_key_index = active_shape_key
+
+    mesh.name = f"{base.name}_LOD{level}"
+
+    # A throwaway object with the same vertex group names lets the protect
+    # group's weights be dropped and shape keys be added to the new mesh
+    holder = bpy.data.objects.new(mesh.name, mesh)
+    try:
+        for group in obj.vertex_groups:
+            holder.vertex_groups.new(name=group.name)
+        if protect is not None:
+            holder.vertex_groups.remove(holder.vertex_groups[protect.name])
+        if shape_source is not None:
+            _transfer_shape_keys(holder, shape_source)
+    finally:
+        bpy.data.objects.remove(holder)
+    return mesh
+
+
+def _add_protect_group(obj):
+    """Vertex group that is 1 everywhere except on seam and material
+    border vertices, so Decimate collapses the interior first."""
+    borders = border_vertices(obj.data)
+    if not len(borders):
+        return None
+    group = obj.vertex_groups.new(name=_PROTECT_GROUP)
+    group.add(range(len(obj.data.vertices)), 1.0, 'REPLACE')
+    group.add(borders.tolist(), 0.0, 'REPLACE')
+    return group
+
+
+def remove_lods(obj):
+    """Switches obj back to level 0 and deletes its other levels, unless
+    something else still uses them."""
+    lods = get_lods(obj)
+    if 0 in lods:
+        obj.data = lods[0]
+    if LODS_PROPERTY in obj:
+        del obj[LODS_PROPERTY]
+    if LEVEL_PROPERTY in obj:
+        del obj[LEVEL_PROPERTY]
+    for level, mesh in lods.items():
+        if level != 0 and mesh.users == 0:
+            bpy.data.meshes.remove(mesh)
+
+
+def _build_levels(obj, ratios):
+    """{level: mesh} for obj's full resolution mesh and one decimated mesh
+    per ratio (level 1, 2, ...)."""
+    base = obj.data
+    shape_source = _shape_key_source(base)
+    protect = _add_protect_group(obj)
+
+    lods = {"0": base}
+    try:
+        for level, ratio in enumerate(ratios, start=1):
+            mesh = _decimated_mesh(obj, ratio, level, protect, shape_source)
+            lods[str(level)] = mesh
+            log.debug("'%s' LOD%d: %d -> %d faces", base.name, level, len(base.polygons), len(mesh.polygons))
+            log.count("LOD meshes generated")
+    finally:
+        if protect is not None:
+            obj.vertex_groups.remove(protect)
+    return lods
+
+
+def generate_lods(objects, ratios=config.LOD_RATIOS):
+    """Builds one decimated mesh per ratio from each object's full
+    resolution mesh and stores them on the object. Existing variants are
+    replaced. Objects sharing a mesh share its levels, built once from the
+    first of them. Returns the number of LOD meshes created."""
+    users = {}
+    for obj in objects:
+        remove_lods(obj)
+        users.setdefault(obj.data.session_uid, []).append(obj)
+
+    created = 0
+    for group in users.values():
+        try:
+            lods = _build_levels(group[0], ratios)
+        except RuntimeError as e:
+            log.warning("Failed to generate LODs for '%s': %s", group[0].data.name, e)
+            continue
+        for obj in group:
+            obj[LODS_PROPERTY] = lods
+            obj[LEVEL_PROPERTY] = 0
+        log.count("Objects sharing generated LODs", len(group) - 1)
+        created += len(lods) - 1
+    return created
+
+
+def set_lod(obj, level):
+    """Points obj at its variant for `level`, or the closest coarser or
+    finer one that exists. Returns True if obj.data changed."""
+    lods = get_lods(obj)
+    if not lods:
+        return False
+    level = min(lods, key=lambda existing: abs(existing - level))
+    if obj.data == lods[level]:
+        return False
+    obj.data = lods[level]
+    obj[LEVEL_PROPERTY] = level
+    return True
+
+
+def set_lods(objects, level):
+    """Switches every object that has variants to `level`. Returns the
+    number of objects switched."""
+    switched = sum(set_lod(obj, level) for obj in objects)
+    log.count("LOD switches", switched)
+    return switched
+
+
+def level_for_fraction(fraction):
+    for min_fraction, level in config.LOD_SCREEN_BANDS:
+        if fraction >= min_fraction:
+            return level
+    return config.LOD_SCREEN_BANDS[-1][1]
+
+
+def set_lods_by_distance(objects, viewpoint):
+    """Picks each object's level from its screen size as seen from
+    `viewpoint` (see adaptive_subsurf.find_viewpoint). Returns the number of
+    objects switched."""
+    switched = 0
+    for obj in objects:
+        if LODS_PROPERTY not in obj:
+            continue
+        switched += set_lod(obj, level_for_fraction(screen_fraction(obj, viewpoint)))
+    log.count("LOD switches", switched)
+    return switched
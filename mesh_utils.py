@@ -1,6 +1,28 @@
+import os
+import hashlib
 import bpy  # type: ignore
 import bmesh # type: ignore
 import math
+import numpy as np
+from . import config, log, mesh_arrays, mesh_io, mesh_workers
+
+MERGE_DISTANCE = 0.00001
+JOIN_ANGLE_THRESHOLD = math.radians(40.0)
+AUTO_SMOOTH_ANGLE = math.radians(30.0)
+SMOOTH_BY_ANGLE_GROUP = "Smooth by Angle"
+
+# How far apart two corners' UVs / normals at a merged vertex may be before
+# the edge between them is treated as a seam / sharp edge.
+UV_SEAM_TOLERANCE = 1e-5
+NORMAL_SHARP_TOLERANCE = 1e-3
+
+MERGE_METHODS = config.MERGE_METHODS
+
+# The bundled asset file holding the "Smooth by Angle" group, "" if the
+# search found none, None before the first search. Cached as a path rather
+# than a flag, so a file opened later can append the group again without a
+# rescan for every mesh.
+_smooth_by_angle_path = None
 
 
 def toggle_subsurf_viewport_display(objects):
@@ -16,7 +38,7 @@ def toggle_subsurf_viewport_display(objects):
     ]
 
     if not subsurf_mods:
-        print("[Auto Koda] No Subdivision Surface modifiers found on selected objects.")
+        log.warning("No Subdivision Surface modifiers found on selected objects.")
         return 0
 
     any_visible = any(mod.show_viewport for mod in subsurf_mods)
@@ -25,59 +47,397 @@ def toggle_subsurf_viewport_display(objects):
     for mod in subsurf_mods:
         mod.show_viewport = new_state
 
-    print(f"[Auto Koda] Set {len(subsurf_mods)} Subdivision Surface modifier(s) viewport display to {new_state}")
+    log.info("Set %d Subdivision Surface modifier(s) viewport display to %s", len(subsurf_mods), new_state)
     return len(subsurf_mods)
 
 
-def prepare_meshes(objects):
-    """For each selected mesh object: merge vertices by distance, convert
-    triangles to quads, clear custom split normals data, and enable Shade
-    Auto Smooth."""
-    processed = 0
+def clear_custom_normals(mesh):
+    """Removes custom split normals by deleting the custom normal attribute,
+    the data-API equivalent of mesh.customdata_custom_splitnormals_clear."""
+    attr = mesh.attributes.get(mesh_io.CUSTOM_NORMAL_ATTRIBUTE)
+    if attr is None:
+        return False
+    mesh.attributes.remove(attr)
+    return True
+
+
+def read_mesh_payload(mesh, join, dist=MERGE_DISTANCE, mark_splits=False):
+    """Reads `mesh` for the array stages. Returns (data, payload): the full
+    attribute snapshot that stays here for the write-back, and the slim set
+    of arrays mesh_arrays.prepare() needs (see there), safe to send to a
+    worker process."""
+    data = mesh_io.read_mesh(mesh, skip=(mesh_io.CUSTOM_NORMAL_ATTRIBUTE,))
+    attributes = {name: (data_type, domain, values) for name, data_type, domain, values in data["attributes"]}
+
+    def attribute(name, data_type, domain):
+        found = attributes.get(name)
+        if found and found[0] == data_type and found[1] == domain:
+            return found[2]
+        return None
+
+    corner_normals = None
+    if mesh.attributes.get(mesh_io.CUSTOM_NORMAL_ATTRIBUTE) is not None:
+        corner_normals = np.empty(len(mesh.loops) * 3, dtype=np.float32)
+        mesh.corner_normals.foreach_get("vector", corner_normals)
+        corner_normals = corner_normals.reshape(-1, 3)
+
+    sharp_edges = attribute(mesh_io.SHARP_EDGE_ATTRIBUTE, 'BOOLEAN', 'EDGE')
+
+    payload = {
+        "positions"        : data["positions"],
+        "corner_verts"     : data["corner_verts"],
+        "face_starts"      : data["face_starts"],
+        "edge_verts"       : data["edge_verts"],
+        "seams"            : data["seams"],
+        "sharp_edges"      : sharp_edges if sharp_edges is not None else np.zeros(len(data["edge_verts"]), dtype=bool),
+        "face_materials"   : attribute("material_index", 'INT', 'FACE'),
+        "uv_layers"        : [values for _name, (t, d, values) in attributes.items() if t == 'FLOAT2' and d == 'CORNER'],
+        "color_layers"     : [values for _name, (t, d, values) in attributes.items()
+                              if t in {'FLOAT_COLOR', 'BYTE_COLOR'} and d == 'CORNER'],
+        "corner_normals"   : corner_normals,
+        "merge_distance"   : dist,
+        "join"             : join,
+        "angle_face"       : JOIN_ANGLE_THRESHOLD,
+        "angle_shape"      : JOIN_ANGLE_THRESHOLD,
+        "uv_tolerance"     : UV_SEAM_TOLERANCE,
+        "normal_tolerance" : NORMAL_SHARP_TOLERANCE,
+        "mark_splits"      : mark_splits,
+    }
+    return data, payload
+
+
+def write_mesh_result(mesh, data, result):
+    """Writes a mesh_arrays.prepare() result back onto `mesh` in bulk.
+    Returns the number of vertices removed."""
+    removed = len(data["positions"]) - len(result["vert_src"])
+    unchanged = (
+        not removed
+        and len(result["corner_src"]) == len(data["corner_verts"])
+        and len(result["face_src"]) == len(data["face_starts"])
+    )
+    if unchanged:
+        return 0
+
+    mesh_io.write_mesh(
+        mesh, data,
+        result["vert_src"], result["vert_map"],
+        result["corner_verts"], result["corner_src"],
+        result["face_starts"], result["face_src"],
+    )
+    mesh_io.flag_edges_by_key(mesh, result["seam_keys"], result["sharp_keys"])
+    return removed
+
+
+def merge_vertices_by_hash(mesh, dist=MERGE_DISTANCE, mark_splits=False):
+    """Merge by distance without a BMesh round-trip: positions are read with
+    foreach_get, duplicates found on a spatial hash grid, and corner vertex
+    indices rewritten in bulk (see mesh_arrays). Unlike
+    bmesh.ops.remove_doubles, merging is transitive: every group of
+    vertices connected by pairs closer than `dist` becomes one vertex, even
+    where its ends are further apart than that.
+
+    Vertices that imports split along UV or normal seams are welded back
+    together. With mark_splits, the resulting edges are flagged: UV
+    discontinuities become seams, and if the mesh carried custom normals,
+    normal discontinuities become sharp edges. Returns the number of
+    vertices removed."""
+    data, payload = read_mesh_payload(mesh, join=False, dist=dist, mark_splits=mark_splits)
+    return write_mesh_result(mesh, data, mesh_arrays.prepare(payload))
+
+
+def _prepare_geometry_arrays(meshes, workers, mark_splits=False):
+    """Merge and tris to quads for every mesh through mesh_arrays, spread
+    over worker processes (see mesh_workers) when workers != 1. Results are
+    written back here, on the main thread, as they arrive."""
+    jobs = [(mesh, *read_mesh_payload(mesh, join=True, mark_splits=mark_splits)) for mesh in meshes]
+
+    results = mesh_workers.run(mesh_arrays.prepare, [payload for _mesh, _data, payload in jobs], workers=workers)
+    for index, result in results:
+        mesh, data, _payload = jobs[index]
+        removed = write_mesh_result(mesh, data, result)
+        log.count("Vertices merged (array)", removed)
+
+
+def cleanup_geometry(mesh, merge=True):
+    """Merge by distance (unless `merge` is False, when it has already been
+    done by merge_vertices_by_hash) and tris to quads, in a single BMesh
+    round-trip."""
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+
+    if merge:
+        bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=MERGE_DISTANCE)
+
+    bmesh.ops.join_triangles(
+        bm,
+        faces=bm.faces,
+        cmp_uvs=True,
+        cmp_vcols=True,
+        cmp_seam=True,
+        cmp_sharp=True,
+        cmp_materials=True,
+        angle_face_threshold=JOIN_ANGLE_THRESHOLD,
+        angle_shape_threshold=JOIN_ANGLE_THRESHOLD,
+    )
+
+    bm.to_mesh(mesh)
+    bm.free()
+
+
+def _append_smooth_by_angle_group(filepath):
+    try:
+        with bpy.data.libraries.load(filepath, link=False) as (data_from, data_to):
+            if SMOOTH_BY_ANGLE_GROUP in data_from.node_groups:
+                data_to.node_groups = [SMOOTH_BY_ANGLE_GROUP]
+    except OSError as e:
+        log.debug("Could not read asset file '%s': %s", filepath, e)
+    return bpy.data.node_groups.get(SMOOTH_BY_ANGLE_GROUP)
+
+
+def _find_smooth_by_angle_group():
+    """Returns the "Smooth by Angle" geometry node group that Shade Auto
+    Smooth uses, appending it from Blender's bundled essentials assets if
+    this file doesn't have it yet. Returns None if it can't be found."""
+    global _smooth_by_angle_path
+
+    group = bpy.data.node_groups.get(SMOOTH_BY_ANGLE_GROUP)
+    if group:
+        return group
+    if _smooth_by_angle_path:
+        group = _append_smooth_by_angle_group(_smooth_by_angle_path)
+        if group:
+            return group
+    elif _smooth_by_angle_path is not None:
+        return None
+    _smooth_by_angle_path = ""
+
+    assets_dir = bpy.utils.system_resource('DATAFILES', path="assets")
+    if not assets_dir or not os.path.isdir(assets_dir):
+        return None
+
+    for root, _dirs, files in os.walk(assets_dir):
+        for filename in files:
+            if not filename.endswith(".blend"):
+                continue
+            filepath = os.path.join(root, filename)
+            group = _append_smooth_by_angle_group(filepath)
+            if group:
+                _smooth_by_angle_path = filepath
+                return group
+
+    log.warning("'%s' node group not found, falling back to sharp edges by angle", SMOOTH_BY_ANGLE_GROUP)
+    return None
+
+
+def smooth_mesh(mesh, sharp_by_angle=True):
+    """Shades every face smooth. With sharp_by_angle, edges sharper than
+    AUTO_SMOOTH_ANGLE are also marked sharp. Edges already marked sharp
+    stay sharp either way."""
+    # Removing sharp_face smooths every face without clearing sharp_edge,
+    # which Mesh.shade_smooth() would also do
+    sharp_face = mesh.attributes.get("sharp_face")
+    if sharp_face is not None:
+        mesh.attributes.remove(sharp_face)
+
+    if not sharp_by_angle:
+        return
+
+    marked = mesh_io.read_edge_flags(mesh, mesh_io.SHARP_EDGE_ATTRIBUTE)
+    mesh.set_sharp_from_angle(angle=AUTO_SMOOTH_ANGLE)
+    if marked.any():
+        by_angle = mesh_io.read_edge_flags(mesh, mesh_io.SHARP_EDGE_ATTRIBUTE)
+        mesh_io.write_edge_flags(mesh, mesh_io.SHARP_EDGE_ATTRIBUTE, marked | by_angle)
 
+
+def add_smooth_by_angle_modifier(obj, group):
+    if any(mod.type == 'NODES' and mod.node_group == group for mod in obj.modifiers):
+        return
+    mod = obj.modifiers.new(name=SMOOTH_BY_ANGLE_GROUP, type='NODES')
+    mod.node_group = group
+
+
+def apply_auto_smooth(obj, use_modifier=True):
+    """Auto smooth for a single object. With use_modifier, this adds the
+    same "Smooth by Angle" modifier that Shade Auto Smooth does; otherwise
+    (or if the group is unavailable) the sharp_edge attribute is written
+    directly."""
+    group = _find_smooth_by_angle_group() if use_modifier else None
+    smooth_mesh(obj.data, sharp_by_angle=group is None)
+    if group is not None:
+        add_smooth_by_angle_modifier(obj, group)
+
+
+def prepare_meshes(objects, use_smooth_modifier=True, merge_method='BMESH', workers=1, mark_splits=False):
+    """For each selected mesh object: clear custom split normals data, merge
+    vertices by distance, convert triangles to quads, and enable auto smooth.
+    Works purely through the data API (no bpy.ops), so it runs without a
+    window context, e.g. under `blender --background`.
+
+    Geometry lives on the mesh datablock, so objects sharing a mesh are
+    grouped and each unique mesh is cleaned once; only the per-object
+    Smooth by Angle modifier is added to every user.
+
+    merge_method picks the geometry stages, see MERGE_METHODS. With 'ARRAY',
+    `workers` sets how many processes share the geometry work (0 = one per
+    spare core, 1 = this process only); the result is the same either way.
+    With 'HASH' or 'ARRAY', mark_splits flags the UV and normal splits that
+    merging welds as seams and sharp edges (see merge_vertices_by_hash);
+    without it they are left unmarked, as with 'BMESH'.
+
+    Returns (objects, unique_meshes)."""
+    users_by_mesh = {}
     for obj in objects:
-        if obj.type != 'MESH':
-            continue
+        if obj.type == 'MESH':
+            users_by_mesh.setdefault(obj.data, []).append(obj)
 
-        mesh = obj.data
+    array_meshes = set()
+    if merge_method in {'HASH', 'ARRAY'}:
+        array_meshes = {
+            mesh for mesh, users in users_by_mesh.items()
+            if all(mesh_io.supports_rebuild(obj) for obj in users)
+        }
+        fallbacks = len(users_by_mesh) - len(array_meshes)
+        if fallbacks:
+            log.count("Array stage fallbacks (vertex groups / shape keys)", fallbacks)
 
-        try:
-            with bpy.context.temp_override(object=obj, active_object=obj):
-                bpy.ops.mesh.customdata_custom_splitnormals_clear()
-        except RuntimeError as e:
-            print(f"[Auto Koda] Failed to clear custom normals on '{obj.name}': {e}")
-
-        bm = bmesh.new()
-        bm.from_mesh(mesh)
-
-        bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=0.00001)
-
-        bmesh.ops.join_triangles(
-            bm,
-            faces=bm.faces,
-            cmp_uvs=True,
-            cmp_vcols=True,
-            cmp_seam=True,
-            cmp_sharp=True,
-            cmp_materials=True,
-            angle_face_threshold=math.radians(40.0),
-            angle_shape_threshold=math.radians(40.0),
-        )
-
-        bm.to_mesh(mesh)
-        bm.free()
-        mesh.update()
+    if merge_method == 'ARRAY' and array_meshes:
+        _prepare_geometry_arrays([mesh for mesh in users_by_mesh if mesh in array_meshes], workers, mark_splits)
+
+    group = _find_smooth_by_angle_group() if use_smooth_modifier else None
+    object_count = 0
+
+    for mesh, users in users_by_mesh.items():
+        use_arrays = mesh in array_meshes
+        if use_arrays and merge_method == 'HASH':
+            removed = merge_vertices_by_hash(mesh, mark_splits=mark_splits)
+            log.count("Vertices merged (hash)", removed)
+
+        if clear_custom_normals(mesh):
+            log.count("Custom normals cleared")
+
+        if not (use_arrays and merge_method == 'ARRAY'):
+            cleanup_geometry(mesh, merge=not use_arrays)
 
         try:
-            with bpy.context.temp_override(object=obj, active_object=obj, selected_editable_objects=[obj]):
-                if hasattr(bpy.ops.object, "shade_auto_smooth"):
-                    bpy.ops.object.shade_auto_smooth()
-                else:
-                    bpy.ops.object.shade_smooth(use_auto_smooth=True)
-        except RuntimeError as e:
-            print(f"[Auto Koda] Failed to enable auto smooth on '{obj.name}': {e}")
-
-        processed += 1
-        print(f"[Auto Koda] Prepared mesh on '{obj.name}'")
-
-    return processed
\ No newline at end of file
+            smooth_mesh(mesh, sharp_by_angle=group is None)
+            if group is not None:
+                for obj in users:
+                    add_smooth_by_angle_modifier(obj, group)
+        except (RuntimeError, AttributeError) as e:
+            log.warning("Failed to enable auto smooth on '%s': %s", mesh.name, e)
+
+        object_count += len(users)
+        log.debug("Prepared mesh '%s' (%d user(s))", mesh.name, len(users))
+        log.count("Meshes prepared")
+
+    log.count("Objects prepared", object_count)
+    return object_count, len(users_by_mesh)
+
+
+def _vertex_weights(obj):
+    """(vertex, group, weight) rows of the deform weights an object reads
+    from its mesh. Only called for objects with vertex groups."""
+    rows = [
+        (vert.index, elem.group, elem.weight)
+        for vert in obj.data.vertices for elem in vert.groups
+    ]
+    return np.array(rows, dtype=np.float64).reshape(-1, 3)
+
+
+def geometry_digest(obj):
+    """Hash of everything the object gets from its mesh: topology,
+    positions, every generic attribute (UVs, material indices, colours,
+    sharp flags...), seams and material slots, plus shape keys and the
+    vertex group names and weights the object binds to. Two objects with
+    the same digest can share one mesh datablock without changing how
+    either of them deforms or renders.
+
+    Returns (digest, bytes) where bytes is the size of the hashed arrays,
+    a rough measure of the memory one copy of the mesh takes."""
+    mesh = obj.data
+    data = mesh_io.read_mesh(mesh)
+    hasher = hashlib.blake2b(digest_size=20)
+    size = 0
+
+    def feed(label, values):
+        nonlocal size
+        values = np.ascontiguousarray(values)
+        hasher.update(f"{label}:{values.dtype.str}:{values.shape}".encode())
+        hasher.update(values.tobytes())
+        size += values.nbytes
+
+    for key in ("positions", "corner_verts", "face_starts", "edge_verts", "seams"):
+        feed(key, data[key])
+    for name, data_type, domain, values in sorted(data["attributes"], key=lambda a: a[0]):
+        feed(f"{name}/{data_type}/{domain}", values)
+
+    hasher.update(repr([mat.name if mat else None for mat in mesh.materials]).encode())
+    hasher.update(repr((data["uv_active"], data["uv_render"], data["color_active"], data["color_render"])).encode())
+
+    if mesh.shape_keys is not None:
+        key = mesh.shape_keys
+        hasher.update(repr((key.use_relative, key.reference_key.name)).encode())
+        for block in key.key_blocks:
+            hasher.update(repr((block.name, block.relative_key.name, block.vertex_group,
+                                block.value, block.slider_min, block.slider_max, block.mute)).encode())
+            co = np.empty(len(block.data) * 3, dtype=np.float32)
+            block.data.foreach_get("co", co)
+            feed(f"shape/{block.name}", co)
+
+    if obj.vertex_groups:
+        hasher.update(repr([group.name for group in obj.vertex_groups]).encode())
+        feed("weights", _vertex_weights(obj))
+
+    return hasher.hexdigest(), size
+
+
+def instance_duplicate_meshes(objects):
+    """Finds objects whose separate mesh datablocks are identical (see
+    geometry_digest), points every object of a group at one shared mesh,
+    and removes the copies nothing uses any more. Modifiers and
+    object-linked material slots live on the object, so they are unaffected.
+
+    Returns (objects_relinked, meshes_removed, bytes_saved)."""
+    groups = {}
+    digests = {}
+    sizes = {}
+    for obj in objects:
+        if obj.type != 'MESH' or obj.library is not None or obj.data.library is not None:
+            continue
+        # Vertex group names live on the object, so objects already sharing
+        # a mesh can still bind it differently
+        key = (obj.data, tuple(group.name for group in obj.vertex_groups))
+        if key not in digests:
+            digests[key] = geometry_digest(obj)
+            log.count("Meshes hashed")
+        digest, size = digests[key]
+        sizes[obj.data] = size
+        groups.setdefault(digest, []).append(obj)
+
+    relinked = 0
+    orphans = set()
+
+    for members in groups.values():
+        shared = members[0].data
+        for obj in members[1:]:
+            if obj.data is shared:
+                continue
+            old = obj.data
+            obj.data = shared
+            relinked += 1
+            orphans.add(old)
+            log.debug("'%s' now uses mesh '%s' instead of '%s'", obj.name, shared.name, old.name)
+
+    removed = 0
+    bytes_saved = 0
+    for mesh in orphans:
+        if mesh.users == 0:
+            bytes_saved += sizes[mesh]
+            bpy.data.meshes.remove(mesh)
+            removed += 1
+        else:
+            log.debug("Kept mesh '%s', still used outside the selection", mesh.name)
+
+    log.count("Objects relinked to shared meshes", relinked)
+    log.count("Duplicate meshes removed", removed)
+    return relinked, removed, bytes_saved
@@ -0,0 +1,100 @@
+"""Process pool for the array-based mesh stages. Workers run plain CPython
+without bpy, so they can only execute functions from bpy-free modules such
+as mesh_arrays.
+
+The add-on package's __init__ imports bpy, which a worker can't do. Before
+running any job, each worker therefore registers a bare stand-in for the
+package (and its parents) in sys.modules. Pickled references like
+`<package>.mesh_arrays.prepare` then import just that one module file.
+
+Spawned workers also re-run the parent's __main__ script if it has one,
+which under `blender --python script.py` imports bpy and kills the worker.
+The main module is hidden from multiprocessing while workers start."""
+
+import os
+import sys
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from . import log
+
+# Below this many vertices in total, spawning workers costs more than it saves
+MIN_PARALLEL_VERTS = 50000
+
+_BOOTSTRAP = """
+import sys, types
+for _name, _path in PACKAGES:
+    if _name not in sys.modules:
+        _module = types.ModuleType(_name)
+        _module.__path__ = [_path] if _path else []
+        sys.modules[_name] = _module
+"""
+
+
+def default_workers():
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def _package_chain():
+    """(name, path) for the add-on package and each of its parent packages."""
+    parts = __package__.split(".")
+    addon_dir = os.path.dirname(os.path.abspath(__file__))
+    return [
+        (".".join(parts[:i + 1]), addon_dir if i == len(parts) - 1 else "")
+        for i in range(len(parts))
+    ]
+
+
+@contextmanager
+def _main_module_hidden():
+    main = sys.modules.get("__main__")
+    saved = {}
+    for attr in ("__file__", "__spec__"):
+        if main is not None and hasattr(main, attr):
+            saved[attr] = getattr(main, attr)
+            if attr == "__spec__":
+                main.__spec__ = None
+            else:
+                del main.__file__
+    try:
+        yield
+    finally:
+        for attr, value in saved.items():
+            setattr(main, attr, value)
+
+
+def _run_serial(func, payloads):
+    for index, payload in enumerate(payloads):
+        yield index, func(payload)
+
+
+def run(func, payloads, workers=0, total_verts=None):
+    """Runs func(payload) for each payload and yields (index, result) as
+    results arrive. Uses a process pool when more than one worker is
+    requested (0 means one per spare core) and the batch is big enough;
+    otherwise runs in this process.
+
+    `func` must live in a bpy-free module of this package."""
+    payloads = list(payloads)
+    workers = default_workers() if workers <= 0 else workers
+    workers = min(workers, len(payloads))
+
+    if total_verts is None:
+        total_verts = sum(len(p["positions"]) for p in payloads)
+
+    if workers <= 1 or total_verts < MIN_PARALLEL_VERTS:
+        yield from _run_serial(func, payloads)
+        return
+
+    log.info("Preparing %d mesh(es) across %d worker processes", len(payloads), workers)
+
+    context = multiprocessing.get_context("spawn")
+    bootstrap = _BOOTSTRAP.replace("PACKAGES", repr(_package_chain()))
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=exec, initargs=(bootstrap, {})) as pool:
+        with _main_module_hidden():
+            futures = {pool.submit(func, payload): index for index, payload in enumerate(payloads)}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
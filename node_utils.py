@@ -1,7 +1,18 @@
+# Set on specialised Koda group variants (see shader_variants.py) to the
+# name of the group they were pruned from
+BASE_PROPERTY = "auto_koda_base"
+
+
+def group_base_name(group_tree):
+    """The group's name, or for a specialised variant the name of the Koda
+    group it was made from, so variants match wherever the original does."""
+    return group_tree.get(BASE_PROPERTY) or group_tree.name
+
+
 def find_group_node(node_tree, exact_name=None, suffix=None):
     for node in node_tree.nodes:
         if node.type == 'GROUP' and node.node_tree:
-            name = node.node_tree.name
+            name = group_base_name(node.node_tree)
             if exact_name and name == exact_name:
                 return node
             if suffix and name.endswith(suffix):
@@ -19,4 +30,13 @@ def get_group_output_node(group_tree):
 def find_koda_group_node(node_tree, koda_shader_name):
     """Locate the Koda group node by exact node_tree name. Shared by both
     the Hero Gravitas and HeroEngine conversion paths."""
-    return find_group_node(node_tree, exact_name=koda_shader_name)
\ No newline at end of file
+    return find_group_node(node_tree, exact_name=koda_shader_name)
+
+
+def uses_koda_group(node_tree, koda_shader_names):
+    """Whether the node tree contains a group node for any of the given
+    Koda shader group names."""
+    return any(
+        node.type == 'GROUP' and node.node_tree and group_base_name(node.node_tree) in koda_shader_names
+        for node in node_tree.nodes
+    )
\ No newline at end of file
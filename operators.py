@@ -1,6 +1,6 @@
 import bpy # type: ignore
-from . import helpers
-from bpy.props import StringProperty # type: ignore
+from . import config, datablock_stats, helpers, log, material_index, profiling
+from bpy.props import StringProperty, BoolProperty, EnumProperty, IntProperty, FloatVectorProperty # type: ignore
 from bpy.types import AddonPreferences # type: ignore
 
 class Auto_Koda_Selected(bpy.types.Operator):
@@ -9,16 +9,26 @@ class Auto_Koda_Selected(bpy.types.Operator):
     bl_description = "Convert the shader of the selected object to a Koda shader"
     bl_options = {'REGISTER', 'UNDO'}
 
+    specialise: BoolProperty(
+        name="Specialise Shaders",
+        description="Afterwards, point each Koda node at a copy of its group with the branches of missing textures pruned",
+        default=False,
+    ) # type: ignore
+
     def execute(self, context):
         shadersBlend = helpers.get_shaders_blend_path()
         if not shadersBlend:
             self.report({'ERROR'}, "Shaders Blend file path not set in preferences!")
             return {'CANCELLED'}
 
-        for obj in bpy.context.selected_objects:
-            if obj.type == 'MESH':
-                helpers.process_object(obj)
+        with profiling.session("Auto Koda"), datablock_stats.measure("Auto Koda"):
+            objects, meshes = helpers.process_objects(bpy.context.selected_objects)
+            if self.specialise:
+                with profiling.phase("specialisation"):
+                    helpers.specialise_materials(helpers.materials_of(bpy.context.selected_objects))
 
+        log.flush_counters("Auto Koda")
+        self.report({'INFO'}, f"Processed {objects} object(s), {meshes} unique mesh(es)")
         return {'FINISHED'}
                 
 class Auto_Koda_Crunch_Selected(bpy.types.Operator):
@@ -33,12 +43,173 @@ class Auto_Koda_Crunch_Selected(bpy.types.Operator):
             self.report({'ERROR'}, "Shaders Blend file path not set in preferences!")
             return {'CANCELLED'}
         
-        for obj in bpy.context.selected_objects:
-            if obj.type == 'MESH':
-                bpy.ops.zgswtor.process_named_mats(use_selection_only=True, use_overwrite_bool=False, use_collect_colliders_bool=True)
-                bpy.ops.zgswtor.customize_swtor_shaders(use_selection_only=True)
-                helpers.process_object(obj)
+        with profiling.session("Auto Crunch"), datablock_stats.measure("Auto Crunch"):
+            if any(obj.type == 'MESH' for obj in bpy.context.selected_objects):
+                # Both operate on the whole selection, so once is enough
+                with profiling.phase("zgswtor operators"):
+                    bpy.ops.zgswtor.process_named_mats(use_selection_only=True, use_overwrite_bool=False, use_collect_colliders_bool=True)
+                    bpy.ops.zgswtor.customize_swtor_shaders(use_selection_only=True)
+                # They rewrite materials in place and no depsgraph update
+                # runs before conversion, so the cached categories are stale
+                material_index.invalidate()
+
+            objects, meshes = helpers.process_objects(bpy.context.selected_objects)
         
+        log.flush_counters("Auto Crunch")
+        self.report({'INFO'}, f"Processed {objects} object(s), {meshes} unique mesh(es)")
+        return {'FINISHED'}
+
+class Auto_Koda_OT_ConvertChunked(bpy.types.Operator):
+    bl_idname = "autokoda.convert_chunked"
+    bl_label = "Auto Koda (Chunked)"
+    bl_description = "Convert materials one collection or batch of objects at a time, freeing what each chunk leaves unused before the next. Undo is off for the run"
+    # No UNDO: an undo step over the whole run would keep every chunk's leftovers alive
+    bl_options = {'REGISTER'}
+
+    scope: EnumProperty(
+        name="Scope",
+        items=[
+            ('SELECTED', "Selected", "Convert the selected objects"),
+            ('SCENE', "Scene", "Convert every object in the scene"),
+        ],
+        default='SCENE',
+    ) # type: ignore
+
+    mode: EnumProperty(
+        name="Chunks",
+        items=[
+            ('COLLECTION', "By Collection", "One chunk per collection"),
+            ('BATCH', "Fixed Batches", "Chunks of a fixed number of objects"),
+        ],
+        default='COLLECTION',
+    ) # type: ignore
+
+    batch_size: IntProperty(
+        name="Batch Size",
+        description="Objects per chunk in Fixed Batches mode",
+        default=config.CHUNK_BATCH_SIZE,
+        min=1,
+    ) # type: ignore
+
+    checkpoint: BoolProperty(
+        name="Save Checkpoints",
+        description="Save a copy of the file every few chunks. The open file is not changed",
+        default=False,
+    ) # type: ignore
+
+    checkpoint_every: IntProperty(
+        name="Chunks per Checkpoint",
+        default=config.CHUNK_CHECKPOINT_EVERY,
+        min=1,
+    ) # type: ignore
+
+    checkpoint_path: StringProperty(
+        name="Checkpoint File",
+        description="Where checkpoints are saved. Empty saves next to the open file",
+        subtype='FILE_PATH',
+        default="",
+    ) # type: ignore
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        shadersBlend = helpers.get_shaders_blend_path()
+        if not shadersBlend:
+            self.report({'ERROR'}, "Shaders Blend file path not set in preferences!")
+            return {'CANCELLED'}
+
+        checkpoint = None
+        if self.checkpoint:
+            checkpoint = helpers.checkpoint_path(self.checkpoint_path)
+            if checkpoint is None:
+                self.report({'ERROR'}, "Save the file or set a checkpoint file first")
+                return {'CANCELLED'}
+
+        objects = context.selected_objects if self.scope == 'SELECTED' else context.scene.objects
+        with profiling.session("Auto Koda (Chunked)"), datablock_stats.measure("Auto Koda (Chunked)"):
+            chunks, object_count, mesh_count = helpers.convert_in_chunks(
+                context, list(objects), self.mode, self.batch_size, checkpoint, self.checkpoint_every
+            )
+
+        log.flush_counters("Auto Koda (Chunked)")
+        self.report({'INFO'}, f"Processed {object_count} object(s), {mesh_count} unique mesh(es) in {chunks} chunk(s)")
+        return {'FINISHED'}
+
+class Auto_Koda_OT_SpecialiseShaders(bpy.types.Operator):
+    bl_idname = "autokoda.specialise_shaders"
+    bl_label = "Specialise Koda Shaders"
+    bl_description = "Point selected objects' Koda nodes at copies of their groups with the branches of missing textures pruned, one copy per texture usage"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    restore: BoolProperty(
+        name="Restore Full Groups",
+        description="Point specialised Koda nodes back at the full groups instead",
+        default=False,
+    ) # type: ignore
+
+    def execute(self, context):
+        materials = helpers.materials_of(context.selected_objects)
+        if self.restore:
+            restored = helpers.restore_base_groups(materials)
+            log.flush_counters("Restore Koda Shaders")
+            self.report({'INFO'}, f"Restored {restored} Koda node(s)")
+            return {'FINISHED'}
+
+        with profiling.session("Specialise Koda Shaders"):
+            specialised, built = helpers.specialise_materials(materials)
+        log.flush_counters("Specialise Koda Shaders")
+        self.report({'INFO'}, f"Specialised {specialised} Koda node(s), built {built} variant(s)")
+        return {'FINISHED'}
+
+class Auto_Koda_OT_UpgradeTemplates(bpy.types.Operator):
+    bl_idname = "autokoda.upgrade_templates"
+    bl_label = "Upgrade Koda Templates"
+    bl_description = "Reload Shaders.blend and rebuild the converted materials whose template changed, keeping their Koda values and textures"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    scope: EnumProperty(
+        name="Scope",
+        items=[
+            ('SELECTED', "Selected", "Materials of the selected objects"),
+            ('FILE', "Whole File", "Every material in the file"),
+        ],
+        default='FILE',
+    ) # type: ignore
+
+    check_only: BoolProperty(
+        name="Check Only",
+        description="Only count and log the out of date materials",
+        default=False,
+    ) # type: ignore
+
+    include_unversioned: BoolProperty(
+        name="Include Unversioned",
+        description="Also rebuild Koda materials without a template stamp that don't match their template, such as ones converted before stamping existed",
+        default=False,
+    ) # type: ignore
+
+    def execute(self, context):
+        shadersBlend = helpers.get_shaders_blend_path()
+        if not shadersBlend:
+            self.report({'ERROR'}, "Shaders Blend file path not set in preferences!")
+            return {'CANCELLED'}
+
+        if self.scope == 'SELECTED':
+            materials = helpers.materials_of(context.selected_objects)
+        else:
+            materials = list(bpy.data.materials)
+
+        with profiling.session("Upgrade Koda Templates"), datablock_stats.measure("Upgrade Koda Templates"):
+            outdated, upgraded, stamped = helpers.upgrade_materials(
+                materials, self.check_only, self.include_unversioned
+            )
+
+        log.flush_counters("Upgrade Koda Templates")
+        if self.check_only:
+            self.report({'INFO'}, f"{outdated} material(s) out of date, {stamped} stamped")
+        else:
+            self.report({'INFO'}, f"Upgraded {upgraded} of {outdated} out of date material(s), {stamped} stamped")
         return {'FINISHED'}
 
 class Auto_Koda_OT_SyncOverride(bpy.types.Operator):
@@ -48,7 +219,9 @@ class Auto_Koda_OT_SyncOverride(bpy.types.Operator):
     bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
-        helpers.run_override_sync(do_sync_values=True, do_link_override=False)
+        with profiling.session("Sync Override"):
+            helpers.run_override_sync(do_sync_values=True, do_link_override=False)
+        log.flush_counters("Sync Override")
         self.report({'INFO'}, "Sync Override executed")
         return {'FINISHED'}
 
@@ -59,7 +232,9 @@ class Auto_Koda_OT_LinkOverride(bpy.types.Operator):
     bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
-        helpers.run_override_sync(do_sync_values=False, do_link_override=True)
+        with profiling.session("Link Override"):
+            helpers.run_override_sync(do_sync_values=False, do_link_override=True)
+        log.flush_counters("Link Override")
         self.report({'INFO'}, "Link Override executed")
         return {'FINISHED'}
 
@@ -70,7 +245,9 @@ class Auto_Koda_OT_SyncLinkOverride(bpy.types.Operator):
     bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
-        helpers.run_override_sync(do_sync_values=True, do_link_override=True)
+        with profiling.session("Sync/Link Override"):
+            helpers.run_override_sync(do_sync_values=True, do_link_override=True)
+        log.flush_counters("Sync/Link Override")
         self.report({'INFO'}, "Sync/Link Override executed")
         return {'FINISHED'}
     
@@ -94,20 +271,206 @@ class Auto_Koda_OT_ToggleSubsurfViewport(bpy.types.Operator):
         self.report({'INFO'}, f"Toggled {count} Subdivision Surface modifier(s)")
         return {'FINISHED'}
 
+class Auto_Koda_OT_PerformanceMode(bpy.types.Operator):
+    bl_idname = "autokoda.performance_mode"
+    bl_label = "Performance Mode"
+    bl_description = ("Turn off subsurf, simplify the scene and lighten Koda materials on selected objects. "
+                      "Materials also used by other objects are left alone. The previous state is saved in the file for Restore")
+    bl_options = {'REGISTER', 'UNDO'}
+
+    limit_textures: BoolProperty(
+        name="Limit Texture Size",
+        description=("Also lower the GPU texture size limit. This is a user preference: it applies to every file "
+                     "and isn't undone by Undo, only by Restore"),
+        default=False,
+    ) # type: ignore
+
+    def execute(self, context):
+        objects = context.selected_objects
+        if not objects:
+            self.report({'WARNING'}, "No objects selected")
+            return {'CANCELLED'}
+
+        changed = helpers.enable_performance_mode(context.scene, objects, limit_textures=self.limit_textures)
+        log.flush_counters("Performance Mode")
+        self.report({'INFO'}, f"Performance mode on, {changed} modifier(s) and material(s) lightened")
+        return {'FINISHED'}
+
+class Auto_Koda_OT_RestorePerformanceMode(bpy.types.Operator):
+    bl_idname = "autokoda.restore_performance_mode"
+    bl_label = "Restore Viewport Settings"
+    bl_description = "Put back every setting changed by Performance Mode"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return helpers.performance_mode_active(context.scene)
+
+    def execute(self, context):
+        restored = helpers.disable_performance_mode(context.scene)
+        if restored is None:
+            self.report({'WARNING'}, "Performance mode is not on")
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, f"Restored {restored} modifier(s) and material(s)")
+        return {'FINISHED'}
+
 class Auto_Koda_OT_PrepareMeshes(bpy.types.Operator):
     bl_idname = "autokoda.prepare_meshes"
     bl_label = "Mesh Preparation"
     bl_description = "Merge by distance, convert tris to quads, and clear custom split normals on selected meshes"
     bl_options = {'REGISTER', 'UNDO'}
 
+    use_smooth_modifier: BoolProperty(
+        name="Smooth by Angle Modifier",
+        description="Add a Smooth by Angle modifier like Shade Auto Smooth does, instead of writing sharp edges into the mesh",
+        default=True,
+    ) # type: ignore
+
+    merge_method: EnumProperty(
+        name="Merge Method",
+        description="How vertices are merged by distance",
+        items=config.MERGE_METHODS,
+        default='BMESH',
+    ) # type: ignore
+
+    workers: IntProperty(
+        name="Worker Processes",
+        description="Processes sharing the Arrays geometry work. 0 uses one per spare CPU core, 1 runs everything here",
+        default=0,
+        min=0,
+    ) # type: ignore
+
+    mark_splits: BoolProperty(
+        name="Mark Welded Splits",
+        description="Spatial Hash and Arrays only: mark UV splits that merging welds as seams, "
+                    "and custom normal splits as sharp edges. Off leaves them unmarked, like BMesh",
+        default=False,
+    ) # type: ignore
+
+    def execute(self, context):
+        objects = [o for o in context.selected_objects if o.type == 'MESH']
+        if not objects:
+            self.report({'WARNING'}, "No mesh objects selected")
+            return {'CANCELLED'}
+
+        with profiling.session("Mesh Preparation"), datablock_stats.measure("Mesh Preparation"):
+            object_count, mesh_count = helpers.prepare_meshes(
+                objects,
+                use_smooth_modifier=self.use_smooth_modifier,
+                merge_method=self.merge_method,
+                workers=self.workers,
+                mark_splits=self.mark_splits,
+            )
+        log.flush_counters("Mesh Preparation")
+        self.report({'INFO'}, f"Prepared {mesh_count} unique mesh(es) on {object_count} object(s)")
+        return {'FINISHED'}
+
+class Auto_Koda_OT_InstanceDuplicateMeshes(bpy.types.Operator):
+    bl_idname = "autokoda.instance_duplicate_meshes"
+    bl_label = "Instance Duplicate Meshes"
+    bl_description = "Make selected objects with identical mesh data share one mesh, and remove the unused copies"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        objects = [o for o in context.selected_objects if o.type == 'MESH']
+        if not objects:
+            self.report({'WARNING'}, "No mesh objects selected")
+            return {'CANCELLED'}
+
+        relinked, removed, bytes_saved = helpers.instance_duplicate_meshes(objects)
+        log.flush_counters("Instance Duplicate Meshes")
+        if relinked == 0:
+            self.report({'INFO'}, "No duplicate meshes found")
+            return {'FINISHED'}
+
+        self.report(
+            {'INFO'},
+            f"Relinked {relinked} object(s), removed {removed} duplicate mesh(es), "
+            f"saved ~{bytes_saved / (1024 * 1024):.1f} MB"
+        )
+        return {'FINISHED'}
+
+class Auto_Koda_OT_GenerateLODs(bpy.types.Operator):
+    bl_idname = "autokoda.generate_lods"
+    bl_label = "Generate LODs"
+    bl_description = "Store decimated variants of each selected mesh on the object, for switching with Set LOD"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    ratios: FloatVectorProperty(
+        name="Ratios",
+        description="Decimate ratio of LOD 1, 2 and 3. A ratio of 1 skips that level",
+        size=3,
+        default=config.LOD_RATIOS,
+        min=0.01,
+        max=1.0,
+    ) # type: ignore
+
+    def execute(self, context):
+        objects = [o for o in context.selected_objects if o.type == 'MESH']
+        if not objects:
+            self.report({'WARNING'}, "No mesh objects selected")
+            return {'CANCELLED'}
+
+        ratios = [ratio for ratio in self.ratios if ratio < 1.0]
+        levels = helpers.generate_lods(objects, ratios)
+        log.flush_counters("Generate LODs")
+        self.report({'INFO'}, f"Generated {levels} LOD mesh(es) on {len(objects)} object(s)")
+        return {'FINISHED'}
+
+class Auto_Koda_OT_SetLOD(bpy.types.Operator):
+    bl_idname = "autokoda.set_lod"
+    bl_label = "Set LOD"
+    bl_description = "Switch selected objects to one of their generated LODs"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    mode: EnumProperty(
+        name="Mode",
+        items=[
+            ('LEVEL', "Level", "Use the same level for every selected object"),
+            ('DISTANCE', "By Distance", "Pick each object's level from its size as seen from the viewport or active camera"),
+        ],
+        default='LEVEL',
+    ) # type: ignore
+
+    level: IntProperty(
+        name="Level",
+        description="0 is the full resolution mesh",
+        default=0,
+        min=0,
+        max=len(config.LOD_RATIOS),
+    ) # type: ignore
+
     def execute(self, context):
         objects = [o for o in context.selected_objects if o.type == 'MESH']
         if not objects:
             self.report({'WARNING'}, "No mesh objects selected")
             return {'CANCELLED'}
 
-        count = helpers.prepare_meshes(objects)
-        self.report({'INFO'}, f"Prepared {count} mesh(es)")
+        if self.mode == 'DISTANCE':
+            viewpoint = helpers.find_viewpoint(context, context.scene)
+            if viewpoint is None:
+                self.report({'WARNING'}, "No viewport or active camera to measure distance from")
+                return {'CANCELLED'}
+            switched = helpers.set_lods_by_distance(objects, viewpoint)
+        else:
+            switched = helpers.set_lods(objects, self.level)
+
+        log.flush_counters("Set LOD")
+        self.report({'INFO'}, f"Switched {switched} object(s)")
+        return {'FINISHED'}
+
+class Auto_Koda_OT_RemoveLODs(bpy.types.Operator):
+    bl_idname = "autokoda.remove_lods"
+    bl_label = "Remove LODs"
+    bl_description = "Switch selected objects back to full resolution and delete their generated LODs"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        objects = [o for o in context.selected_objects if o.type == 'MESH']
+        for obj in objects:
+            helpers.remove_lods(obj)
+        self.report({'INFO'}, f"Removed LODs from {len(objects)} object(s)")
         return {'FINISHED'}
 
 class Auto_Koda_OT_GarmentHuePrimary(bpy.types.Operator):
@@ -129,9 +492,12 @@ class Auto_Koda_OT_GarmentHuePrimary(bpy.types.Operator):
             self.report({'WARNING'}, "No mesh objects selected")
             return {'CANCELLED'}
 
-        files_applied, nodes_updated = garment_hue_xml.apply_garment_hue_to_objects(
-            objects, filename, slot=1
-        )
+        with profiling.session("Garment Hue (Primary)"), datablock_stats.measure("Garment Hue (Primary)"):
+            files_applied, nodes_updated = garment_hue_xml.apply_garment_hue_to_objects(
+                objects, filename, slot=1,
+                shared=context.scene.auto_koda_garment_hue_shared,
+            )
+        log.flush_counters("Garment Hue (Primary)")
 
         if not files_applied:
             self.report({'ERROR'}, f"Could not read '{filename}' - check console")
@@ -160,9 +526,12 @@ class Auto_Koda_OT_GarmentHueSecondary(bpy.types.Operator):
             self.report({'WARNING'}, "No mesh objects selected")
             return {'CANCELLED'}
 
-        files_applied, nodes_updated = garment_hue_xml.apply_garment_hue_to_objects(
-            objects, filename, slot=2
-        )
+        with profiling.session("Garment Hue (Secondary)"), datablock_stats.measure("Garment Hue (Secondary)"):
+            files_applied, nodes_updated = garment_hue_xml.apply_garment_hue_to_objects(
+                objects, filename, slot=2,
+                shared=context.scene.auto_koda_garment_hue_shared,
+            )
+        log.flush_counters("Garment Hue (Secondary)")
 
         if not files_applied:
             self.report({'ERROR'}, f"Could not read '{filename}' - check console")
@@ -171,6 +540,265 @@ class Auto_Koda_OT_GarmentHueSecondary(bpy.types.Operator):
         self.report({'INFO'}, f"Applied '{filename}' (Secondary) to {nodes_updated} node(s)")
         return {'FINISHED'}
 
+class Auto_Koda_OT_SavePreset(bpy.types.Operator):
+    bl_idname = "autokoda.save_preset"
+    bl_label = "Save Koda Preset"
+    bl_description = "Store the input values of the active material's Koda node as a named preset"
+    bl_options = {'REGISTER'}
+
+    name: StringProperty(
+        name="Name",
+        description="Preset name. An existing preset with this name is replaced",
+        default="",
+    ) # type: ignore
+
+    def invoke(self, context, event):
+        if not self.name:
+            self.name = context.scene.auto_koda_preset_selection
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        name = self.name.strip()
+        if not name:
+            self.report({'WARNING'}, "No preset name given")
+            return {'CANCELLED'}
+
+        koda_node = helpers.active_koda_node(context.object)
+        if koda_node is None:
+            self.report({'WARNING'}, "The active material has no Koda node")
+            return {'CANCELLED'}
+
+        try:
+            values = helpers.save_preset(name, koda_node)
+        except OSError as e:
+            self.report({'ERROR'}, f"Could not write the preset library: {e}")
+            return {'CANCELLED'}
+
+        context.scene.auto_koda_preset_selection = name
+        self.report({'INFO'}, f"Saved preset '{name}' ({values} value(s))")
+        return {'FINISHED'}
+
+
+class Auto_Koda_OT_ApplyPreset(bpy.types.Operator):
+    bl_idname = "autokoda.apply_preset"
+    bl_label = "Apply Koda Preset"
+    bl_description = "Set the selected preset's values on every matching Koda node"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    target: EnumProperty(
+        name="Target",
+        items=[
+            ('SELECTED', "Selected Objects", "Materials of the selected objects"),
+            ('COLLECTION', "Active Collection", "Materials of every object in the active collection and its children"),
+        ],
+        default='SELECTED',
+    ) # type: ignore
+
+    def execute(self, context):
+        name = context.scene.auto_koda_preset_selection
+        if not name:
+            self.report({'WARNING'}, "No preset selected")
+            return {'CANCELLED'}
+
+        if self.target == 'COLLECTION':
+            objects = context.collection.all_objects
+        else:
+            objects = context.selected_objects
+
+        with profiling.session("Apply Preset"):
+            nodes_updated, values_set = helpers.apply_preset(name, helpers.materials_of(objects))
+        log.flush_counters("Apply Preset")
+        self.report({'INFO'}, f"Applied '{name}' to {nodes_updated} node(s), {values_set} value(s)")
+        return {'FINISHED'}
+
+
+class Auto_Koda_OT_DeletePreset(bpy.types.Operator):
+    bl_idname = "autokoda.delete_preset"
+    bl_label = "Delete Koda Preset"
+    bl_description = "Remove the selected preset from the preset library"
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        name = context.scene.auto_koda_preset_selection
+        try:
+            deleted = helpers.delete_preset(name)
+        except OSError as e:
+            self.report({'ERROR'}, f"Could not write the preset library: {e}")
+            return {'CANCELLED'}
+        if not deleted:
+            self.report({'WARNING'}, f"No preset named '{name}'")
+            return {'CANCELLED'}
+
+        context.scene.auto_koda_preset_selection = ""
+        self.report({'INFO'}, f"Deleted preset '{name}'")
+        return {'FINISHED'}
+
+
+class Auto_Koda_OT_RefreshResourcesIndex(bpy.types.Operator):
+    bl_idname = "autokoda.refresh_resources_index"
+    bl_label = "Refresh Resources Index"
+    bl_description = "Update the file name index of the resources folder, re-scanning only folders that changed"
+    bl_options = {'REGISTER'}
+
+    full: BoolProperty(
+        name="Full Rebuild",
+        description="Re-scan every folder instead of only the changed ones",
+        default=False,
+    ) # type: ignore
+
+    def execute(self, context):
+        with profiling.session("Resources Index"):
+            result = helpers.refresh_resources_index(full=self.full)
+        if result is None:
+            self.report({'ERROR'}, "Resources folder not configured")
+            return {'CANCELLED'}
+
+        folders, rescanned = result
+        self.report({'INFO'}, f"Indexed {folders} folder(s), {rescanned} re-scanned")
+        return {'FINISHED'}
+
+
+class Auto_Koda_OT_RelinkMissingImages(bpy.types.Operator):
+    bl_idname = "autokoda.relink_missing_images"
+    bl_label = "Relink Missing Textures"
+    bl_description = "Find the files of missing images on Koda materials in the resources folder and relink them"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        with profiling.session("Relink Missing Textures"):
+            relinked, unresolved = helpers.relink_missing_images()
+        log.flush_counters("Relink Missing Textures")
+
+        if not relinked and not unresolved:
+            self.report({'INFO'}, "No missing textures on Koda materials")
+        elif unresolved:
+            self.report({'WARNING'}, f"Relinked {relinked} image(s), {len(unresolved)} not found - check the log")
+        else:
+            self.report({'INFO'}, f"Relinked {relinked} image(s)")
+        return {'FINISHED'}
+
+
+class Auto_Koda_OT_BakePalette(bpy.types.Operator):
+    bl_idname = "autokoda.bake_palette"
+    bl_label = "Bake Palette"
+    bl_description = "Bake the palette-recoloured diffuse and specular of selected objects' Koda materials with Cycles, and build lightweight baked materials"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        objects = [o for o in context.selected_objects if o.type == 'MESH']
+        if not objects:
+            self.report({'WARNING'}, "No mesh objects selected")
+            return {'CANCELLED'}
+
+        with profiling.session("Bake Palette"), datablock_stats.measure("Bake Palette"):
+            baked, cached = helpers.bake_objects(context, objects)
+        log.flush_counters("Bake Palette")
+        self.report({'INFO'}, f"Baked {baked} material(s), reused {cached} cached bake(s)")
+        return {'FINISHED'}
+
+
+class Auto_Koda_OT_SwapBaked(bpy.types.Operator):
+    bl_idname = "autokoda.swap_baked"
+    bl_label = "Swap Baked Materials"
+    bl_description = "Switch selected objects between their Koda materials and the baked ones"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    use_baked: BoolProperty(
+        name="Use Baked",
+        description="Swap to the baked materials, or back to the Koda ones",
+        default=True,
+    ) # type: ignore
+
+    def execute(self, context):
+        swapped = helpers.swap_baked(context.selected_objects, use_baked=self.use_baked)
+        log.flush_counters("Swap Baked Materials")
+        self.report({'INFO'}, f"Swapped {swapped} slot(s)")
+        return {'FINISHED'}
+
+class Auto_Koda_OT_ExportCharacters(bpy.types.Operator):
+    bl_idname = "autokoda.export_characters"
+    bl_label = "Export Character Library"
+    bl_description = "Write the collections of the selected objects to a library .blend, with an index, for shot files to link"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filepath: StringProperty(subtype='FILE_PATH') # type: ignore
+    filter_glob: StringProperty(default="*.blend", options={'HIDDEN'}) # type: ignore
+
+    dedupe: BoolProperty(
+        name="Deduplicate",
+        description="First merge duplicate images, node groups and materials used by the characters. This also changes the open file",
+        default=True,
+    ) # type: ignore
+
+    def invoke(self, context, event):
+        if not self.filepath:
+            base = bpy.path.display_name_from_filepath(bpy.data.filepath) or "characters"
+            self.filepath = f"{base}_library.blend"
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        collections = helpers.character_collections(context.selected_objects, context.scene)
+        if not collections:
+            self.report({'ERROR'}, "Select objects inside the collections to export")
+            return {'CANCELLED'}
+
+        path = bpy.path.ensure_ext(bpy.path.abspath(self.filepath), ".blend")
+        with profiling.session("Export Character Library"), datablock_stats.measure("Export Character Library"):
+            try:
+                characters, merged = helpers.export_characters(collections, path, dedupe=self.dedupe)
+            except OSError as e:
+                self.report({'ERROR'}, f"Could not write '{path}': {e}")
+                return {'CANCELLED'}
+
+        log.flush_counters("Export Character Library")
+        self.report({'INFO'}, f"Exported {characters} character(s), {merged} duplicate(s) merged")
+        return {'FINISHED'}
+
+class Auto_Koda_OT_ImportCharacters(bpy.types.Operator):
+    bl_idname = "autokoda.import_characters"
+    bl_label = "Import Character Library"
+    bl_description = "Link characters from an Auto Koda character library into the active collection"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filepath: StringProperty(subtype='FILE_PATH') # type: ignore
+    filter_glob: StringProperty(default="*.blend", options={'HIDDEN'}) # type: ignore
+
+    characters: StringProperty(
+        name="Characters",
+        description="Comma-separated character names. Empty imports every character in the library's index",
+        default="",
+    ) # type: ignore
+
+    override: BoolProperty(
+        name="Library Override",
+        description="Create editable library overrides instead of plain collection instances",
+        default=False,
+    ) # type: ignore
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        path = bpy.path.abspath(self.filepath)
+        names = [name.strip() for name in self.characters.split(",") if name.strip()] or None
+
+        with profiling.session("Import Character Library"), datablock_stats.measure("Import Character Library"):
+            try:
+                imported = helpers.import_characters(context, path, names, override=self.override)
+            except OSError as e:
+                self.report({'ERROR'}, f"Could not read '{path}': {e}")
+                return {'CANCELLED'}
+
+        log.flush_counters("Import Character Library")
+        if not imported:
+            self.report({'WARNING'}, "No characters imported")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Imported {imported} character(s)")
+        return {'FINISHED'}
+
+
 class Auto_Koda_OT_RefreshGarmentHueList(bpy.types.Operator):
     bl_idname = "autokoda.refresh_garment_hue_list"
     bl_label = "Refresh Garment Hue List"
@@ -179,5 +807,59 @@ class Auto_Koda_OT_RefreshGarmentHueList(bpy.types.Operator):
 
     def execute(self, context):
         from . import garment_hue
-        garment_hue.refresh_garment_hue_collection(context.scene)
+        garment_hue.refresh_catalogue(force=True)
+        self.report({'INFO'}, f"{len(garment_hue.get_catalogue())} garment hue file(s)")
+        return {'FINISHED'}
+
+class Auto_Koda_OT_ClearLog(bpy.types.Operator):
+    bl_idname = "autokoda.clear_log"
+    bl_label = "Clear Log"
+    bl_description = "Clear the messages shown in the Auto Koda log panel"
+    bl_options = {'INTERNAL'}
+
+    def execute(self, context):
+        log.clear()
+        return {'FINISHED'}
+
+class Auto_Koda_OT_ExportProfile(bpy.types.Operator):
+    bl_idname = "autokoda.export_profile"
+    bl_label = "Export Profile"
+    bl_description = "Save the last profiled operator run as JSON phase timings or a cProfile pstats file"
+    bl_options = {'INTERNAL'}
+
+    format: EnumProperty(
+        name="Format",
+        items=[
+            ('JSON', "JSON", "Phase timings and the slowest functions"),
+            ('PSTATS', "pstats", "Full cProfile data, for pstats or snakeviz"),
+        ],
+        default='JSON',
+    ) # type: ignore
+
+    filepath: StringProperty(subtype='FILE_PATH') # type: ignore
+
+    def _extension(self):
+        return ".prof" if self.format == 'PSTATS' else ".json"
+
+    def invoke(self, context, event):
+        if not self.filepath:
+            base = bpy.path.display_name_from_filepath(bpy.data.filepath) or "autokoda"
+            self.filepath = f"{base}_profile{self._extension()}"
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        path = bpy.path.ensure_ext(bpy.path.abspath(self.filepath), self._extension())
+        export = profiling.export_pstats if self.format == 'PSTATS' else profiling.export_json
+        try:
+            written = export(path)
+        except OSError as e:
+            self.report({'ERROR'}, f"Could not write '{path}': {e}")
+            return {'CANCELLED'}
+
+        if not written:
+            self.report({'WARNING'}, "Nothing to export - run an operator with profiling (and cProfile capture) on first")
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, f"Profile written to {path}")
         return {'FINISHED'}
\ No newline at end of file
@@ -1,8 +1,10 @@
 import bpy # type: ignore
-from . import config
+from . import config, log, material_index
+from .profiling import timed
 from .node_utils import find_group_node, get_group_output_node
 
 
+@timed("override value sync")
 def sync_master_inputs_to_override(master_node, override_tree):
     override_output = get_group_output_node(override_tree)
     if not override_output:
@@ -20,16 +22,19 @@ def sync_master_inputs_to_override(master_node, override_tree):
         try:
             override_input.default_value = master_input.default_value
             copied += 1
-            print(f"[COPY] {master_input.name} = {master_input.default_value}")
+            if log.is_debug():
+                log.debug("[COPY] %s = %s", master_input.name, master_input.default_value)
         except Exception:
-            print(f"[SKIP] {master_input.name} (non-writable)")
+            log.debug("[SKIP] %s (non-writable)", master_input.name)
+            log.count("Override values skipped")
 
     return copied
 
 
+@timed("override linking")
 def link_override_to_master(material, master_node, override_node):
     if not material.use_nodes:
-        print(f"[ERROR] Material '{material.name}' has no node tree.")
+        log.error("Material '%s' has no node tree.", material.name)
         return 0
 
     nt = material.node_tree
@@ -40,10 +45,11 @@ def link_override_to_master(material, master_node, override_node):
         if override_output:
             try:
                 nt.links.new(override_output, master_input)
-                print(f"[LINK] {master_input.name}")
+                log.debug("[LINK] %s", master_input.name)
                 linked_count += 1
             except RuntimeError:
-                print(f"[FAIL LINK] {master_input.name} - incompatible socket type")
+                log.debug("[FAIL LINK] %s - incompatible socket type", master_input.name)
+                log.count("Override links failed")
 
     return linked_count
 
@@ -51,17 +57,18 @@ def link_override_to_master(material, master_node, override_node):
 def run_override_sync(do_sync_values=True, do_link_override=False):
     obj = bpy.context.object
     if not obj:
-        print("❌ No active object selected")
+        log.warning("No active object selected")
         return
 
-    print(f"▶ Processing object: {obj.name}")
+    log.info("Processing object: %s", obj.name)
 
     total_copied = 0
     total_links = 0
 
     for slot in obj.material_slots:
         mat = slot.material
-        if not mat or not mat.use_nodes:
+        # Masters are Koda groups, so only Koda materials can have a pair
+        if not mat or material_index.category(mat) != material_index.KODA:
             continue
         nt = mat.node_tree
 
@@ -72,22 +79,22 @@ def run_override_sync(do_sync_values=True, do_link_override=False):
             if not master_node or not override_node:
                 continue
 
-            print(f"\n● Material: {mat.name}")
-            print(f"  Master:   {master_node.node_tree.name}")
-            print(f"  Override: {override_node.node_tree.name}")
+            log.debug(
+                "Material: %s (master '%s', override '%s')",
+                mat.name, master_node.node_tree.name, override_node.node_tree.name
+            )
 
             if do_sync_values:
                 copied = sync_master_inputs_to_override(master_node, override_node.node_tree)
                 total_copied += copied
-                print(f"  → {copied} value(s) copied")
+                log.debug("  %d value(s) copied", copied)
 
             if do_link_override:
                 links = link_override_to_master(mat, master_node, override_node)
                 total_links += links
-                print(f"  → {links} link(s) created")
+                log.debug("  %d link(s) created", links)
 
-    print("\n✔ Done")
     if do_sync_values:
-        print(f"✔ Total values copied: {total_copied}")
+        log.info("Total values copied: %d", total_copied)
     if do_link_override:
-        print(f"✔ Total links created: {total_links}")
\ No newline at end of file
+        log.info("Total links created: %d", total_links)
\ No newline at end of file
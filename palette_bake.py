@@ -0,0 +1,340 @@
+"""Bakes palette-recoloured Koda materials to flat textures.
+
+The Garment and Skin groups recolour PaletteMap / PaletteMaskMap from the
+palette sockets at shading time. For characters whose colours never
+change, bake_objects() renders the result once with CPU Cycles. Each pass
+in config.PALETTE_BAKE_PASSES becomes an image: the diffuse colour and
+the specular colour.
+
+For every baked material it builds a slim "<name>_Baked" material: a
+Principled BSDF reading those images. The two materials reference each
+other through ID custom properties, so swap_baked() can move slots back
+and forth.
+
+Bakes are cached on disk under a hash of:
+- the Koda group's name and contents (template_versions.template_digest),
+  so an updated Shaders.blend group doesn't reuse old bakes;
+- every input value on the Koda node; for a linked input, the value it
+  reads (see _upstream);
+- the source images (path, size and file mtime);
+- the bake resolution.
+Materials with the same digest reuse the same files, so identical outfits
+bake once, in this file or any other.
+
+Cycles bakes every material of an object at once, into each material's
+active Image Texture node. Every material of a baked object therefore gets
+a temporary node. Materials not being baked this time point theirs at a
+shared scratch image, which is discarded afterwards.
+"""
+
+import hashlib
+import os
+
+import bpy # type: ignore
+from . import config, log, material_index
+from .node_utils import get_group_output_node, group_base_name
+from .template_versions import template_digest
+
+BAKED_PROPERTY = "auto_koda_baked"
+SOURCE_PROPERTY = "auto_koda_baked_from"
+DIGEST_PROPERTY = "auto_koda_bake_digest"
+
+# Bumped when the baked output for the same inputs changes
+BAKE_VERSION = 3
+
+_TEMP_NODE = "_auto_koda_bake_target"
+_SCRATCH_IMAGE = "_auto_koda_bake_scratch"
+
+
+def cache_folder():
+    return bpy.utils.extension_path_user(__package__, path="palette_bakes", create=True)
+
+
+def palette_koda_node(mat):
+    """The Koda group node of a material whose group has palette inputs,
+    or None."""
+    if material_index.category(mat) != material_index.KODA:
+        return None
+    palette_input = config.HERO_ENGINE_PROP_TO_KODA_INPUT["palette1_hue"]
+    koda_names = config.KODA_NODE_NAMES.values()
+    for node in mat.node_tree.nodes:
+        if (
+            node.type == 'GROUP'
+            and node.node_tree
+            and group_base_name(node.node_tree) in koda_names
+            and node.inputs.get(palette_input) is not None
+        ):
+            return node
+    return None
+
+
+def _resolution(mat):
+    """Size of the material's PaletteMap (or DiffuseMap) image, else the
+    configured default."""
+    nodes = mat.node_tree.nodes
+    for hero_name in ("_h PaletteMap", "_d DiffuseMap"):
+        node = nodes.get(config.HERO_GRAVITAS_TEX_NAMES[hero_name])
+        if node is not None and node.type == 'TEX_IMAGE' and node.image is not None:
+            width, height = node.image.size
+            if width and height:
+                return width, height
+    return config.PALETTE_BAKE_RESOLUTION, config.PALETTE_BAKE_RESOLUTION
+
+
+def _value(socket):
+    value = socket.default_value
+    return value if isinstance(value, (int, float, bool)) else tuple(round(v, 6) for v in value)
+
+
+def _upstream(socket, depth=0):
+    """What a linked input reads. Override groups and shared palette
+    groups (see palette_groups.py) hold their values on their Group
+    Output, so for a group node that's the tree and the output's value
+    there, followed further if it's linked inside the group. For other
+    nodes it's their type and unlinked input values."""
+    link = socket.links[0]
+    node = link.from_node
+    output = link.from_socket
+    if node.type == 'GROUP' and node.node_tree:
+        group_output = get_group_output_node(node.node_tree)
+        target = group_output.inputs.get(output.name) if group_output else None
+        if target is not None and target.is_linked and depth < 8:
+            return node.node_tree.name, output.name, _upstream(target, depth + 1)
+        if target is not None and hasattr(target, "default_value"):
+            return node.node_tree.name, output.name, _value(target)
+    values = tuple(
+        (source.identifier, _value(source)) for source in node.inputs
+        if not source.is_linked and hasattr(source, "default_value")
+    )
+    tree_name = node.node_tree.name if node.type == 'GROUP' and node.node_tree else ""
+    return node.bl_idname, tree_name, output.identifier, values
+
+
+def bake_digest(mat, koda_node):
+    """Hex digest of everything the baked images depend on."""
+    hasher = hashlib.blake2b(digest_size=16)
+    group = koda_node.node_tree
+    hasher.update(f"v{BAKE_VERSION}:{group.name}:{template_digest(group)}:{_resolution(mat)}".encode())
+
+    for socket in koda_node.inputs:
+        if socket.is_linked:
+            hasher.update(f"{socket.name}<{_upstream(socket)!r};".encode())
+        elif hasattr(socket, "default_value"):
+            hasher.update(f"{socket.name}={_value(socket)!r};".encode())
+
+    for node in sorted(mat.node_tree.nodes, key=lambda n: n.name):
+        if node.type != 'TEX_IMAGE' or node.image is None or node.name == _TEMP_NODE:
+            continue
+        image = node.image
+        path = bpy.path.abspath(image.filepath, library=image.library)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = image.packed_file.size if image.packed_file else None
+        hasher.update(f"{node.name}:{path}:{tuple(image.size)}:{mtime};".encode())
+
+    return hasher.hexdigest()
+
+
+def _cache_paths(digest):
+    folder = cache_folder()
+    return {name: os.path.join(folder, f"{digest}_{name}.png") for name in config.PALETTE_BAKE_PASSES}
+
+
+def _cached(digest):
+    paths = _cache_paths(digest)
+    if all(os.path.isfile(path) for path in paths.values()):
+        return paths
+    return None
+
+
+def _scene_settings(scene):
+    return {
+        "engine": scene.render.engine,
+        "device": scene.cycles.device,
+        "samples": scene.cycles.samples,
+    }
+
+
+def _apply_scene_settings(scene, settings):
+    scene.render.engine = settings["engine"]
+    scene.cycles.device = settings["device"]
+    scene.cycles.samples = settings["samples"]
+
+
+def _add_target_node(mat, image):
+    nodes = mat.node_tree.nodes
+    node = nodes.get(_TEMP_NODE)
+    if node is None:
+        node = nodes.new('ShaderNodeTexImage')
+        node.name = _TEMP_NODE
+    node.image = image
+    node.select = True
+    nodes.active = node
+    return node
+
+
+def _remove_target_nodes(materials):
+    for mat in materials:
+        node = mat.node_tree.nodes.get(_TEMP_NODE)
+        if node is not None:
+            mat.node_tree.nodes.remove(node)
+
+
+def _bake_object(context, obj, targets):
+    """One Cycles bake per pass over obj. targets: {material: digest}.
+    Saves each target's images into the cache."""
+    scratch = bpy.data.images.new(_SCRATCH_IMAGE, 8, 8)
+    slot_materials = {slot.material for slot in obj.material_slots if slot.material and slot.material.use_nodes}
+    images = {}
+    try:
+        for pass_name, (bake_type, pass_filter) in config.PALETTE_BAKE_PASSES.items():
+            for mat in slot_materials:
+                if mat in targets:
+                    width, height = _resolution(mat)
+                    image = bpy.data.images.new(f"{mat.name}_{pass_name}", width, height, alpha=False)
+                    images[mat, pass_name] = image
+                else:
+                    image = scratch
+                _add_target_node(mat, image)
+
+            with context.temp_override(
+                selected_objects=[obj], selected_editable_objects=[obj], active_object=obj, object=obj
+            ):
+                bpy.ops.object.bake(
+                    type=bake_type,
+                    pass_filter=pass_filter,
+                    margin=config.PALETTE_BAKE_MARGIN,
+                    use_clear=True,
+                )
+
+        for (mat, pass_name), image in images.items():
+            path = _cache_paths(targets[mat])[pass_name]
+            image.filepath_raw = path
+            image.file_format = 'PNG'
+            image.save()
+            log.count("Palette passes baked")
+    finally:
+        _remove_target_nodes(slot_materials)
+        bpy.data.images.remove(scratch)
+        for image in images.values():
+            bpy.data.images.remove(image)
+
+
+def _load_image(path):
+    image = bpy.data.images.load(path, check_existing=True)
+    image.colorspace_settings.name = 'sRGB'
+    return image
+
+
+def build_baked_material(mat, paths, digest):
+    """The slim stand-in for mat: a Principled BSDF with the baked diffuse
+    as base colour and the baked specular as specular tint. Reused if the
+    material already has one baked from the same digest."""
+    baked = mat.get(BAKED_PROPERTY)
+    if baked is not None and baked.get(DIGEST_PROPERTY) == digest:
+        return baked
+
+    if baked is None:
+        baked = bpy.data.materials.new(f"{mat.name}_Baked")
+    baked.use_nodes = True
+    nodes = baked.node_tree.nodes
+    links = baked.node_tree.links
+    nodes.clear()
+
+    output = nodes.new('ShaderNodeOutputMaterial')
+    output.location = (300, 0)
+    bsdf = nodes.new('ShaderNodeBsdfPrincipled')
+    bsdf.inputs["Roughness"].default_value = config.PALETTE_BAKE_ROUGHNESS
+    links.new(bsdf.outputs["BSDF"], output.inputs["Surface"])
+
+    for index, (pass_name, socket_name) in enumerate((("diffuse", "Base Color"), ("specular", "Specular Tint"))):
+        tex = nodes.new('ShaderNodeTexImage')
+        tex.name = f"Baked {pass_name}"
+        tex.location = (-400, -300 * index)
+        tex.image = _load_image(paths[pass_name])
+        links.new(tex.outputs["Color"], bsdf.inputs[socket_name])
+
+    baked[SOURCE_PROPERTY] = mat
+    baked[DIGEST_PROPERTY] = digest
+    mat[BAKED_PROPERTY] = baked
+    return baked
+
+
+def bake_objects(context, objects):
+    """Bakes every palette Koda material on the objects that has no cached
+    bake yet, and builds the baked materials. Returns (baked, cached)
+    material counts."""
+    pending = {}   # obj -> {material: digest}
+    ready = {}     # material -> digest
+    planned = set()
+
+    for obj in objects:
+        if obj.type != 'MESH' or not obj.data.uv_layers:
+            continue
+        for slot in obj.material_slots:
+            mat = slot.material
+            if mat is None or mat in planned or mat.get(SOURCE_PROPERTY) is not None:
+                continue
+            koda_node = palette_koda_node(mat)
+            if koda_node is None:
+                continue
+            planned.add(mat)
+            digest = bake_digest(mat, koda_node)
+            if _cached(digest):
+                ready[mat] = digest
+            else:
+                pending.setdefault(obj, {})[mat] = digest
+
+    cached_count = len(ready)
+    baked_count = 0
+    if pending:
+        scene = context.scene
+        settings = _scene_settings(scene)
+        try:
+            scene.render.engine = 'CYCLES'
+            scene.cycles.device = 'CPU'
+            scene.cycles.samples = config.PALETTE_BAKE_SAMPLES
+            for obj, targets in pending.items():
+                # Materials sharing a digest bake once
+                targets = {mat: digest for mat, digest in targets.items() if not _cached(digest)}
+                if targets:
+                    try:
+                        _bake_object(context, obj, targets)
+                    except RuntimeError as e:
+                        log.error("Bake failed on '%s': %s", obj.name, e)
+                        continue
+                    baked_count += len(targets)
+                for mat, digest in pending[obj].items():
+                    ready[mat] = digest
+        finally:
+            _apply_scene_settings(scene, settings)
+
+    for mat, digest in ready.items():
+        paths = _cached(digest)
+        if paths is None:
+            continue
+        build_baked_material(mat, paths, digest)
+        log.count("Baked materials built")
+
+    return baked_count, cached_count
+
+
+def swap_baked(objects, use_baked=True):
+    """Points the objects' slots at their baked materials (use_baked) or
+    back at the Koda originals. Returns the number of slots changed."""
+    swapped = 0
+    for obj in objects:
+        if obj.type != 'MESH':
+            continue
+        for slot in obj.material_slots:
+            mat = slot.material
+            if mat is None:
+                continue
+            other = mat.get(BAKED_PROPERTY) if use_baked else mat.get(SOURCE_PROPERTY)
+            if other is None:
+                continue
+            slot.material = other
+            swapped += 1
+    log.count("Slots swapped", swapped)
+    return swapped
@@ -0,0 +1,118 @@
+"""Shared palette node groups for garment hue application.
+
+Instead of writing a garmenthue file's values into every Koda node, the
+shared mode keeps them in one small node group per (file, palette slot).
+The group has no nodes besides its Group Output. The values sit on that
+node's unlinked inputs, the same way override groups hold theirs (see
+overrides.py).
+
+Each material gets one group node per palette slot, named PALETTE_NODE,
+whose outputs are linked into the Koda node's palette inputs. Editing the
+group, or re-applying the file, is a single write seen by every material
+that uses it. Materials already linked to the group aren't touched when
+it is applied again. palette_bake.bake_digest() follows these links to
+the group's values, so shared-palette materials with different groups
+(or an edited group) don't share cached bakes.
+"""
+
+import os
+
+import bpy # type: ignore
+from . import log
+from .node_utils import get_group_output_node
+from .socket_utils import coerce_value_for_socket
+
+GROUP_PREFIX = "AutoKoda Palette"
+PALETTE_NODE = "AutoKoda Palette {slot}"
+
+# Socket type of a Koda input -> interface socket type to mirror it with
+_INTERFACE_TYPES = {
+    'VALUE'   : 'NodeSocketFloat',
+    'INT'     : 'NodeSocketInt',
+    'BOOLEAN' : 'NodeSocketBool',
+    'VECTOR'  : 'NodeSocketVector',
+    'RGBA'    : 'NodeSocketColor',
+}
+
+
+def group_name(filename, slot):
+    return f"{GROUP_PREFIX}{slot} {os.path.splitext(filename)[0]}"
+
+
+def _output_names(tree):
+    return {
+        item.name for item in tree.interface.items_tree
+        if item.item_type == 'SOCKET' and item.in_out == 'OUTPUT'
+    }
+
+
+def ensure_palette_group(name, palette_inputs):
+    """Creates or updates the group `name` so it has an output per
+    (koda_input, value) in palette_inputs, holding that value. Returns the
+    group."""
+    tree = bpy.data.node_groups.get(name)
+    if tree is None:
+        tree = bpy.data.node_groups.new(name, 'ShaderNodeTree')
+        tree.nodes.new('NodeGroupOutput')
+        log.count("Palette groups created")
+
+    existing = _output_names(tree)
+    for koda_input, _value in palette_inputs:
+        if koda_input.name in existing:
+            continue
+        socket_type = _INTERFACE_TYPES.get(koda_input.type)
+        if socket_type is None:
+            continue
+        tree.interface.new_socket(koda_input.name, in_out='OUTPUT', socket_type=socket_type)
+        existing.add(koda_input.name)
+
+    output = get_group_output_node(tree)
+    for koda_input, value in palette_inputs:
+        socket = output.inputs.get(koda_input.name)
+        if socket is None or not coerce_value_for_socket(value, socket):
+            log.debug("Could not store '%s' in palette group '%s'", koda_input.name, name)
+            log.count("Palette values skipped")
+    return tree
+
+
+def link_palette_group(material, koda_node, tree, slot):
+    """Feeds koda_node's palette inputs from `tree` through the material's
+    palette node for `slot`. Returns whether anything in the material
+    changed."""
+    nodes = material.node_tree.nodes
+    links = material.node_tree.links
+    node_name = PALETTE_NODE.format(slot=slot)
+    palette_node = nodes.get(node_name)
+    changed = False
+
+    if palette_node is None:
+        palette_node = nodes.new('ShaderNodeGroup')
+        palette_node.name = node_name
+        palette_node.label = node_name
+        palette_node.location = (koda_node.location.x - 300, koda_node.location.y - 250 * (slot - 1))
+        changed = True
+    if palette_node.node_tree is not tree:
+        palette_node.node_tree = tree
+        changed = True
+
+    for output in palette_node.outputs:
+        koda_input = koda_node.inputs.get(output.name)
+        if koda_input is None:
+            continue
+        if koda_input.is_linked and koda_input.links[0].from_socket == output:
+            continue
+        links.new(output, koda_input)
+        changed = True
+
+    if changed:
+        log.count("Materials linked to palette groups")
+    return changed
+
+
+def unlink_palette_group(material, slot):
+    """Removes the material's palette node for `slot`, so values written
+    straight into the Koda node's sockets take effect again."""
+    nodes = material.node_tree.nodes
+    palette_node = nodes.get(PALETTE_NODE.format(slot=slot))
+    if palette_node is not None:
+        nodes.remove(palette_node)
@@ -0,0 +1,169 @@
+"""Viewport performance mode: switches off the expensive viewport settings
+for the selection in one go, and remembers exactly what they were so they
+can be put back.
+
+The snapshot is kept as JSON in a scene custom property, so it is saved with
+the .blend and a restore still works after reopening the file. Applying again
+while the mode is on only adds objects and materials that are not already in
+the snapshot; their first recorded state is what gets restored.
+
+Koda materials also used by objects outside the selection are left alone.
+Scene simplify (subdivision level 0) is the one scene-wide change: it
+applies to every object in the scene, selected or not. The GPU texture
+limit is a user preference, not file or undo state, so it is only lowered
+on request."""
+
+import json
+import bpy  # type: ignore
+from . import config, log
+from .node_utils import uses_koda_group
+
+SNAPSHOT_PROPERTY = "auto_koda_performance_snapshot"
+
+
+def _empty_snapshot():
+    return {"modifiers": {}, "materials": {}, "scene": {}, "preferences": {}}
+
+
+def read_snapshot(scene):
+    raw = scene.get(SNAPSHOT_PROPERTY)
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        log.warning("Ignoring unreadable performance snapshot on scene '%s'", scene.name)
+        return None
+
+
+def performance_mode_active(scene):
+    return bool(scene.get(SNAPSHOT_PROPERTY))
+
+
+def _koda_materials(objects):
+    koda_names = set(config.KODA_NODE_NAMES.values())
+    seen = set()
+    for obj in objects:
+        for slot in getattr(obj, "material_slots", ()):
+            mat = slot.material
+            if mat is None or mat in seen or not mat.use_nodes or mat.node_tree is None:
+                continue
+            seen.add(mat)
+            if uses_koda_group(mat.node_tree, koda_names):
+                yield mat
+
+
+def _materials_used_outside(objects):
+    """Names of the materials in the slots of objects not in `objects`."""
+    selected = {obj.name for obj in objects}
+    used = set()
+    for obj in bpy.data.objects:
+        if obj.name in selected:
+            continue
+        for slot in getattr(obj, "material_slots", ()):
+            if slot.material is not None:
+                used.add(slot.material.name)
+    return used
+
+
+def enable_performance_mode(scene, objects, limit_textures=False):
+    """Records and then lightens: Subdivision Surface viewport display on
+    the given objects, the settings in config.PERFORMANCE_MATERIAL_SETTINGS
+    on their Koda materials that no other object uses, scene simplify, and
+    with limit_textures the GPU texture limit (a user preference). Returns
+    the number of modifiers and materials changed."""
+    snapshot = read_snapshot(scene) or _empty_snapshot()
+    changed = 0
+
+    for obj in objects:
+        if obj.type != 'MESH':
+            continue
+        saved = snapshot["modifiers"].setdefault(obj.name, {})
+        for mod in obj.modifiers:
+            if mod.type != 'SUBSURF':
+                continue
+            saved.setdefault(mod.name, mod.show_viewport)
+            if mod.show_viewport:
+                mod.show_viewport = False
+                changed += 1
+        if not saved:
+            del snapshot["modifiers"][obj.name]
+
+    shared = _materials_used_outside(objects)
+    for mat in _koda_materials(objects):
+        if mat.name in shared:
+            log.debug("Performance mode: '%s' is also used outside the selection", mat.name)
+            log.count("Performance mode materials skipped (shared)")
+            continue
+        saved = snapshot["materials"].setdefault(mat.name, {})
+        lightened = False
+        for attr, value in config.PERFORMANCE_MATERIAL_SETTINGS.items():
+            if not hasattr(mat, attr):
+                continue
+            saved.setdefault(attr, getattr(mat, attr))
+            if getattr(mat, attr) != value:
+                setattr(mat, attr, value)
+                lightened = True
+        if lightened:
+            changed += 1
+            log.count("Performance mode materials")
+
+    render = scene.render
+    for attr, value in config.PERFORMANCE_SCENE_SETTINGS.items():
+        snapshot["scene"].setdefault(attr, getattr(render, attr))
+        setattr(render, attr, value)
+
+    if limit_textures:
+        system = bpy.context.preferences.system
+        snapshot["preferences"].setdefault("gl_texture_limit", system.gl_texture_limit)
+        system.gl_texture_limit = config.PERFORMANCE_TEXTURE_LIMIT
+
+    scene[SNAPSHOT_PROPERTY] = json.dumps(snapshot)
+    log.info("Performance mode on: %d modifier(s) and material(s) changed", changed)
+    return changed
+
+
+def disable_performance_mode(scene):
+    """Puts back everything recorded by enable_performance_mode() and drops the snapshot.
+    Objects or materials renamed or deleted since are skipped. Returns the
+    number of modifiers and materials restored, or None if performance mode
+    wasn't on."""
+    snapshot = read_snapshot(scene)
+    if snapshot is None:
+        return None
+    restored = 0
+
+    for obj_name, modifiers in snapshot["modifiers"].items():
+        obj = bpy.data.objects.get(obj_name)
+        if obj is None:
+            log.debug("Performance mode: object '%s' no longer exists", obj_name)
+            continue
+        for mod_name, show_viewport in modifiers.items():
+            mod = obj.modifiers.get(mod_name)
+            if mod is not None:
+                mod.show_viewport = show_viewport
+                restored += 1
+
+    for mat_name, settings in snapshot["materials"].items():
+        mat = bpy.data.materials.get(mat_name)
+        if mat is None:
+            log.debug("Performance mode: material '%s' no longer exists", mat_name)
+            continue
+        for attr, value in settings.items():
+            try:
+                setattr(mat, attr, value)
+            except (AttributeError, TypeError) as e:
+                log.warning("Could not restore %s on material '%s': %s", attr, mat_name, e)
+        restored += 1
+
+    render = scene.render
+    for attr, value in snapshot["scene"].items():
+        setattr(render, attr, value)
+
+    system = bpy.context.preferences.system
+    if "gl_texture_limit" in snapshot["preferences"]:
+        system.gl_texture_limit = snapshot["preferences"]["gl_texture_limit"]
+
+    del scene[SNAPSHOT_PROPERTY]
+    log.info("Performance mode off: %d modifier(s) and material(s) restored", restored)
+    return restored
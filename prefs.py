@@ -1,6 +1,6 @@
 import bpy #type: ignore
 import os
-from . import config
+from . import config, log
 
 # Module name of the other addon that also exposes a SWTOR resources folder
 # preference, and the property name it stores the path under.
@@ -15,7 +15,7 @@ def get_shaders_blend_path():
         if override_path and override_path.lower().endswith(".blend"):
             return override_path
     except Exception as e:
-        print(f"Could not retrieve shaders path from preferences: {e}")
+        log.warning("Could not retrieve shaders path from preferences: %s", e)
 
     return config.DEFAULT_SHADERS
 
@@ -35,14 +35,13 @@ def _get_external_resources_path():
 
         return path
     except Exception as e:
-        print(f"[Auto Koda] Could not read external resources path: {e}")
+        log.warning("Could not read external resources path: %s", e)
         return None
 
 
-def get_resources_folder_path():
-    """Returns the TOR resources extraction folder to use, preferring the
-    value set in zg_swtor_tools (if installed and set), and falling back
-    to this addon's own resourcesPath preference."""
+def _resolve_resources_folder():
+    """Returns (path, problem): the resources folder to use, or None and a
+    description of why there isn't one."""
     path = _get_external_resources_path()
     source = "zg_swtor_tools"
 
@@ -52,16 +51,74 @@ def get_resources_folder_path():
             path = getattr(prefs, "resourcesPath", "").strip()
             source = "Auto Koda preferences"
         except Exception as e:
-            print(f"[Auto Koda] Could not retrieve resources path from preferences: {e}")
-            return None
+            return None, f"Could not retrieve resources path from preferences: {e}"
 
     if not path:
-        return None
+        return None, None
 
     path = bpy.path.abspath(path)
 
     if not os.path.isdir(path):
-        print(f"[Auto Koda] Configured resources folder ({source}) does not exist: {path}")
-        return None
+        return None, f"Configured resources folder ({source}) does not exist: {path}"
+
+    return path, None
+
+
+# Last resolved paths, so panels can draw them without touching the
+# filesystem. None until the first refresh_path_status().
+_path_status = None
+
+
+def _redraw_sidebars():
+    window_manager = getattr(bpy.context, "window_manager", None)
+    if window_manager is None:
+        return
+    for window in window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
 
-    return path
\ No newline at end of file
+def refresh_path_status():
+    """Re-resolves both paths and updates the cache read by
+    get_path_status(). A problem is logged only when the status changes,
+    not on every check. Returns the new status."""
+    global _path_status
+    resources_path, problem = _resolve_resources_folder()
+    status = {
+        "shaders_path"      : get_shaders_blend_path(),
+        "resources_path"    : resources_path,
+        "resources_problem" : problem,
+    }
+
+    if status != _path_status:
+        if problem:
+            log.warning(problem)
+        elif _path_status is not None:
+            log.info("Resources folder: %s", resources_path or "not set")
+        _path_status = status
+        _redraw_sidebars()
+    return status
+
+
+def get_path_status():
+    """The cached path status (see refresh_path_status), or None if it
+    hasn't been computed yet. Does no I/O, so it is safe to call from draw()."""
+    return _path_status
+
+
+def path_status_timer():
+    """Low-frequency refresh for changes no update callback sees, like the
+    zg_swtor_tools preference or the folder being created or removed."""
+    try:
+        refresh_path_status()
+    except Exception as e:
+        log.debug("Path status refresh skipped: %s", e)
+    return config.PATH_STATUS_REFRESH_INTERVAL
+
+
+def get_resources_folder_path():
+    """Returns the TOR resources extraction folder to use, preferring the
+    value set in zg_swtor_tools (if installed and set), and falling back
+    to this addon's own resourcesPath preference."""
+    return refresh_path_status()["resources_path"]
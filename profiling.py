@@ -0,0 +1,147 @@
+"""Opt-in per-phase timing for operator runs.
+
+Operators wrap their work in session(label). Inside it, functions marked
+with @timed("phase") and blocks in `with phase("phase"):` add their wall
+time and call count to that phase. Phases are inclusive, so a phase nested
+inside another is counted in both. With capture on, the whole session also
+runs under cProfile.
+
+While profiling is off, session() and phase() hand back a shared no-op
+context manager and @timed wrappers call straight through after checking
+one flag. The report of the latest session stays in `last_report` for the
+Diagnostics panel and the exports."""
+
+import cProfile
+import functools
+import io
+import json
+import pstats
+import time
+from contextlib import contextmanager, nullcontext
+
+_enabled = False
+_capture = False
+
+_NULL = nullcontext()
+
+# name -> [seconds, calls] for the session in progress
+_phases = {}
+_session_active = False
+
+last_report = None
+
+
+def configure(enabled, capture=False):
+    global _enabled, _capture
+    _enabled = enabled
+    _capture = capture
+
+
+def is_enabled():
+    return _enabled
+
+
+class _Phase:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        entry = _phases.get(self.name)
+        if entry is None:
+            entry = _phases[self.name] = [0.0, 0]
+        entry[0] += time.perf_counter() - self.start
+        entry[1] += 1
+        return False
+
+
+def phase(name):
+    if not _session_active:
+        return _NULL
+    return _Phase(name)
+
+
+def timed(name):
+    """Decorator: counts every call of the function towards phase `name`."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _session_active:
+                return func(*args, **kwargs)
+            with _Phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def _session(label):
+    global _session_active, last_report
+    _phases.clear()
+    _session_active = True
+    profile = cProfile.Profile() if _capture else None
+    start = time.perf_counter()
+    if profile is not None:
+        profile.enable()
+    try:
+        yield
+    finally:
+        if profile is not None:
+            profile.disable()
+        total = time.perf_counter() - start
+        _session_active = False
+        last_report = {
+            "label": label,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "total_s": total,
+            "phases": {
+                name: {"seconds": seconds, "calls": calls}
+                for name, (seconds, calls) in sorted(_phases.items(), key=lambda item: -item[1][0])
+            },
+            "profile": profile,
+        }
+        _phases.clear()
+
+
+def session(label):
+    """Collects phases for one operator run. A no-op unless profiling is
+    enabled; nested sessions just join the outer one."""
+    if not _enabled or _session_active:
+        return _NULL
+    return _session(label)
+
+
+def top_functions(limit=15):
+    """Text of the slowest functions by cumulative time in the last
+    captured profile, or None without one."""
+    profile = last_report and last_report["profile"]
+    if profile is None:
+        return None
+    stream = io.StringIO()
+    pstats.Stats(profile, stream=stream).sort_stats("cumulative").print_stats(limit)
+    return stream.getvalue()
+
+
+def export_json(path):
+    if last_report is None:
+        return False
+    report = {key: value for key, value in last_report.items() if key != "profile"}
+    report["profile_top"] = top_functions()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return True
+
+
+def export_pstats(path):
+    """Writes the last cProfile capture in pstats format (open it with
+    pstats.Stats or snakeviz). False if the last session wasn't captured."""
+    profile = last_report and last_report["profile"]
+    if profile is None:
+        return False
+    profile.dump_stats(path)
+    return True
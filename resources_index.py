@@ -0,0 +1,246 @@
+"""Filename index of the TOR resources folder, for finding textures.
+
+The index stores, per directory under the resources folder:
+- its mtime;
+- its file names;
+- its subdirectory names.
+
+It is saved as JSON in the extension's user directory, so it survives
+restarts. Building it scans directories with os.scandir in a thread pool,
+one tree level at a time (scandir releases the GIL, so the threads overlap
+the filesystem waits).
+
+A directory's mtime changes only when entries are added to or removed
+from it. A refresh therefore stats every known directory and re-scans
+only those whose mtime moved, including any new subdirectories they
+gained. Unchanged directories keep their stored listing.
+
+relink_missing_images() resolves images on Koda Image Texture nodes whose
+file no longer exists against the index.
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import bpy # type: ignore
+from . import config, log, material_index
+from .prefs import get_resources_folder_path
+
+INDEX_VERSION = 1
+INDEX_FILENAME = "resources_index.json"
+
+# Loaded index: {"version", "root", "dirs": {relative dir: [mtime_ns, files, subdirs]}}
+_index = None
+
+# Lowercase file name -> [relative paths], built from _index on demand
+_by_name = None
+
+
+def index_path():
+    return os.path.join(bpy.utils.extension_path_user(__package__, create=True), INDEX_FILENAME)
+
+
+def _scan(root, rel):
+    """(rel, mtime_ns, files, subdirs) of one directory, or None if it
+    can't be read."""
+    path = os.path.join(root, rel) if rel else root
+    files = []
+    subdirs = []
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                else:
+                    files.append(entry.name)
+    except OSError as e:
+        log.debug("Skipping '%s': %s", path, e)
+        return None
+    return rel, mtime, files, subdirs
+
+
+def _mtime(root, rel):
+    try:
+        return os.stat(os.path.join(root, rel) if rel else root).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _walk(root, previous, pool):
+    """Scans the tree under root level by level. Directories in `previous`
+    whose mtime is unchanged reuse their stored listing. Returns
+    (dirs, scanned)."""
+    dirs = {}
+    scanned = 0
+    level = [""]
+    while level:
+        mtimes = list(pool.map(lambda rel: _mtime(root, rel), level))
+        to_scan = []
+        for rel, mtime in zip(level, mtimes):
+            if mtime is None:
+                continue
+            known = previous.get(rel)
+            if known is not None and known[0] == mtime:
+                dirs[rel] = known
+            else:
+                to_scan.append(rel)
+
+        for result in pool.map(lambda rel: _scan(root, rel), to_scan):
+            if result is not None:
+                rel, mtime, files, subdirs = result
+                dirs[rel] = [mtime, files, subdirs]
+                scanned += 1
+
+        level = [
+            os.path.join(rel, name) if rel else name
+            for rel in level if rel in dirs
+            for name in dirs[rel][2]
+        ]
+    return dirs, scanned
+
+
+def _load():
+    global _index
+    if _index is not None:
+        return _index
+    try:
+        with open(index_path(), encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("version") == INDEX_VERSION:
+            _index = index
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        log.warning("Could not read resources index, it will be rebuilt: %s", e)
+    return _index
+
+
+def _save(index):
+    path = index_path()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def refresh_resources_index(full=False):
+    """Brings the index up to date with the resources folder, re-scanning
+    only changed directories unless `full`. Returns (directories,
+    rescanned), or None without a resources folder."""
+    global _index, _by_name
+    root = get_resources_folder_path()
+    if not root:
+        log.error("Resources folder not configured.")
+        return None
+
+    previous = _load()
+    if full or previous is None or previous["root"] != root:
+        previous = {"dirs": {}}
+
+    with ThreadPoolExecutor(max_workers=config.RESOURCES_INDEX_WORKERS) as pool:
+        dirs, scanned = _walk(root, previous["dirs"], pool)
+
+    _index = {"version": INDEX_VERSION, "root": root, "dirs": dirs}
+    _by_name = None
+    if scanned:
+        try:
+            _save(_index)
+        except OSError as e:
+            log.warning("Could not save resources index: %s", e)
+    log.info("Resources index: %d folder(s), %d re-scanned", len(dirs), scanned)
+    return len(dirs), scanned
+
+
+def _names():
+    global _by_name
+    if _by_name is None:
+        _by_name = {}
+        for rel, (_mtime, files, _subdirs) in _index["dirs"].items():
+            for name in files:
+                _by_name.setdefault(name.lower(), []).append(os.path.join(rel, name))
+    return _by_name
+
+
+def _common_tail(a, b):
+    parts_a = a.replace("\\", "/").lower().split("/")
+    parts_b = b.replace("\\", "/").lower().split("/")
+    count = 0
+    for part_a, part_b in zip(reversed(parts_a), reversed(parts_b)):
+        if part_a != part_b:
+            break
+        count += 1
+    return count
+
+
+def find(filepath):
+    """Absolute path of the indexed file best matching `filepath`: same
+    file name (case-insensitive), else same stem with one of the image
+    extensions. Among several matches, the one sharing the most trailing
+    folders with `filepath` wins. None if nothing matches."""
+    if _index is None:
+        return None
+    names = _names()
+    basename = os.path.basename(filepath.replace("\\", "/")).lower()
+    candidates = names.get(basename)
+    if not candidates:
+        stem = os.path.splitext(basename)[0]
+        candidates = [
+            path for ext in config.RESOURCES_IMAGE_EXTENSIONS
+            for path in names.get(stem + ext, ())
+        ]
+    if not candidates:
+        return None
+    best = max(candidates, key=lambda rel: _common_tail(rel, filepath))
+    return os.path.join(_index["root"], best)
+
+
+def _is_missing(image):
+    if image.source not in {'FILE', 'SEQUENCE', 'TILED'} or image.packed_file is not None:
+        return False
+    if image.library is not None:
+        return False
+    return not os.path.isfile(bpy.path.abspath(image.filepath))
+
+
+def missing_koda_images():
+    """Images used by Image Texture nodes in Koda materials whose file
+    doesn't exist."""
+    images = {}
+    for mat in bpy.data.materials:
+        if material_index.category(mat) != material_index.KODA:
+            continue
+        for node in mat.node_tree.nodes:
+            image = node.image if node.type == 'TEX_IMAGE' else None
+            if image is not None and image.session_uid not in images and _is_missing(image):
+                images[image.session_uid] = image
+    return list(images.values())
+
+
+def relink_missing_images():
+    """Points every missing Koda image at its match in the resources
+    index. Returns (relinked, unresolved names)."""
+    missing = missing_koda_images()
+    if not missing:
+        return 0, []
+    if refresh_resources_index() is None:
+        return 0, [image.name for image in missing]
+
+    relinked = 0
+    unresolved = []
+    for image in missing:
+        path = find(image.filepath or image.name)
+        if path is None:
+            unresolved.append(image.name)
+            log.debug("No match for missing image '%s' (%s)", image.name, image.filepath)
+            continue
+        image.filepath = path
+        image.reload()
+        relinked += 1
+        log.count("Images relinked")
+        log.debug("Relinked '%s' -> %s", image.name, path)
+
+    for name in unresolved:
+        log.warning("Missing image not found in resources: %s", name)
+    return relinked, unresolved
@@ -0,0 +1,333 @@
+"""Specialised Koda group variants with unused branches pruned.
+
+A converted material usually feeds only some of the Koda group's texture
+inputs (no FacepaintMap, AgeMap, ComplexionMap...), yet EEVEE compiles the
+whole group for it. specialise_materials() looks at which Koda Image
+Texture nodes actually have an image and builds a copy of the group for
+that usage signature:
+
+1. Group inputs fed only by empty texture nodes are treated as constant
+   zero. Their links inside the group are removed and the sockets they fed
+   are set to zero.
+2. Mix nodes whose factor has become a constant 0 or 1 are bypassed,
+   repeatedly, since bypassing one can make the next one constant. This
+   covers texture-masked branches, and palette branches when PaletteMap /
+   PaletteMaskMap are missing.
+3. Nodes no longer reachable from the Group Output are removed.
+
+Variants are shared: one per (base group, signature). Each records a
+digest of the base group it was pruned from (see
+template_versions.template_digest); when a Shaders.blend update changes
+the base, the next specialise_materials() rebuilds the variant and moves
+its users over. Each keeps the base group's name in
+node_utils.BASE_PROPERTY, so every lookup by Koda group name
+(classification, overrides, garment hue, presets...) still matches it. Its interface is an exact copy of the base's, so swapping the
+group node's tree keeps every link and value in the material.
+restore_base_groups() swaps back.
+
+Palette inputs are pruned only through their textures. A palette left at
+its values can't be told apart from one in use.
+"""
+
+import hashlib
+
+import bpy # type: ignore
+from . import config, log, material_index
+from .node_utils import BASE_PROPERTY, group_base_name
+from .template_versions import template_digest
+
+SIGNATURE_PROPERTY = "auto_koda_signature"
+BASE_DIGEST_PROPERTY = "auto_koda_base_digest"
+
+_MIX_TYPES = {'MIX', 'MIX_RGB', 'MIX_SHADER'}
+
+
+def _koda_nodes(mat):
+    koda_names = config.KODA_NODE_NAMES.values()
+    return [
+        node for node in mat.node_tree.nodes
+        if node.type == 'GROUP' and node.node_tree and group_base_name(node.node_tree) in koda_names
+    ]
+
+
+def unused_inputs(mat, koda_node):
+    """Names of koda_node's inputs fed only by Image Texture nodes without
+    an image."""
+    empty = set()
+    used = set()
+    for link in mat.node_tree.links:
+        if link.to_node != koda_node:
+            continue
+        from_node = link.from_node
+        if from_node.type == 'TEX_IMAGE' and from_node.image is None:
+            empty.add(link.to_socket.name)
+        else:
+            used.add(link.to_socket.name)
+    return frozenset(empty - used)
+
+
+def signature(unused):
+    return hashlib.blake2b("\n".join(sorted(unused)).encode(), digest_size=6).hexdigest()
+
+
+def _zero(socket):
+    value = socket.default_value
+    if isinstance(value, (int, float, bool)):
+        socket.default_value = type(value)(0)
+    else:
+        socket.default_value = [0.0] * len(value)
+
+
+def _enabled(sockets):
+    return [socket for socket in sockets if socket.enabled]
+
+
+def _constant_factor(node):
+    """0 or 1 if the mix node's result is just its A or B input, because
+    the factor is an unlinked constant at that end, else None. A factor of
+    1 only picks B for the plain Mix blend."""
+    factor = _enabled(node.inputs)[0]
+    if factor.is_linked:
+        return None
+    value = factor.default_value
+    if not isinstance(value, float):
+        return None
+    if value <= 0.0:
+        return 0
+    if value >= 1.0 and getattr(node, "blend_type", 'MIX') == 'MIX':
+        return 1
+    return None
+
+
+# Blender's default scene-linear luminance weights (Rec. 709), used when a
+# colour value feeds a float socket
+_LUMINANCE = (0.2126, 0.7152, 0.0722)
+
+
+def _converted(value, source, target):
+    """`value` from socket `source` as a value for socket `target`, the way
+    Blender converts across a link between them. None if it can't be."""
+    current = getattr(target, "default_value", None)
+    if current is None or isinstance(value, str) or isinstance(current, str):
+        return value if isinstance(value, str) and isinstance(current, str) else None
+    if isinstance(value, (int, float, bool)):
+        if isinstance(current, (int, float, bool)):
+            return type(current)(value)
+        components = [float(value)] * len(current)
+        if target.type == 'RGBA':
+            components[3:] = [1.0] * (len(current) - 3)
+        return components
+    value = tuple(value)
+    if isinstance(current, (int, float, bool)):
+        if source.type == 'RGBA':
+            scalar = sum(weight * component for weight, component in zip(_LUMINANCE, value))
+        else:
+            scalar = sum(value) / len(value)
+        return type(current)(scalar)
+    components = list(value[:len(current)])
+    components += [1.0] * (len(current) - len(components))
+    return components
+
+
+def _bypass(tree, node, pick):
+    """Reconnects the consumers of the mix node's result to its A (pick 0)
+    or B (pick 1) input. Returns whether the node was bypassed."""
+    inputs = _enabled(node.inputs)[1:]
+    outputs = _enabled(node.outputs)
+    if len(inputs) != 2 or not outputs:
+        return False
+    source = inputs[pick]
+    result = outputs[0]
+    consumers = [link.to_socket for link in tree.links if link.from_socket == result]
+
+    if source.is_linked:
+        upstream = source.links[0].from_socket
+        for socket in consumers:
+            tree.links.new(upstream, socket)
+    else:
+        if not hasattr(source, "default_value"):
+            return False
+        links = [link for link in tree.links if link.from_socket == result]
+        # Every value is converted before any link goes, so a consumer that
+        # can't take it keeps the mix node
+        values = []
+        for link in links:
+            target = link.to_socket
+            try:
+                value = _converted(source.default_value, source, target)
+            except (TypeError, ValueError, AttributeError):
+                value = None
+            if value is None:
+                log.debug("Could not carry '%s' into '%s', keeping the mix", source.name, target.name)
+                return False
+            values.append(value)
+        for link, value in zip(links, values):
+            target = link.to_socket
+            tree.links.remove(link)
+            target.default_value = value
+    return True
+
+
+def _fold_mixes(tree):
+    folded = 0
+    changed = True
+    while changed:
+        changed = False
+        for node in list(tree.nodes):
+            if node.type not in _MIX_TYPES:
+                continue
+            pick = _constant_factor(node)
+            if pick is None or not any(link.from_node == node for link in tree.links):
+                continue
+            if _bypass(tree, node, pick):
+                folded += 1
+                changed = True
+    return folded
+
+
+def _prune_unreachable(tree):
+    outputs = [node for node in tree.nodes if node.type == 'GROUP_OUTPUT']
+    feeding = {}
+    for link in tree.links:
+        feeding.setdefault(link.to_node, []).append(link.from_node)
+
+    reachable = set()
+    stack = list(outputs)
+    while stack:
+        node = stack.pop()
+        if node in reachable:
+            continue
+        reachable.add(node)
+        stack.extend(feeding.get(node, ()))
+
+    removed = 0
+    for node in list(tree.nodes):
+        if node in reachable or node.type in {'GROUP_INPUT', 'FRAME'}:
+            continue
+        tree.nodes.remove(node)
+        removed += 1
+    return removed
+
+
+def build_variant(base, unused, base_digest=None):
+    """A pruned copy of the Koda group `base` for materials that leave the
+    `unused` inputs empty."""
+    variant = base.copy()
+    variant.name = f"{base.name} [{signature(unused)}]"
+    variant[BASE_PROPERTY] = base.name
+    variant[SIGNATURE_PROPERTY] = signature(unused)
+    variant[BASE_DIGEST_PROPERTY] = base_digest or template_digest(base)
+
+    for group_input in [node for node in variant.nodes if node.type == 'GROUP_INPUT']:
+        for output in group_input.outputs:
+            if output.name not in unused:
+                continue
+            for link in list(output.links):
+                target = link.to_socket
+                variant.links.remove(link)
+                if hasattr(target, "default_value"):
+                    _zero(target)
+
+    folded = _fold_mixes(variant)
+    removed = _prune_unreachable(variant)
+    log.debug(
+        "Variant '%s': %d input(s) zeroed, %d mix node(s) bypassed, %d node(s) removed",
+        variant.name, len(unused), folded, removed
+    )
+    log.count("Shader variants built")
+    return variant
+
+
+def find_variant(base, unused):
+    """The variant of `base` for `unused`, whether or not it is up to date
+    with base (compare its BASE_DIGEST_PROPERTY), or None."""
+    sig = signature(unused)
+    for tree in bpy.data.node_groups:
+        if tree.get(BASE_PROPERTY) == base.name and tree.get(SIGNATURE_PROPERTY) == sig:
+            return tree
+    return None
+
+
+def _rebuild_variant(stale, base, unused, base_digest):
+    """Replaces a variant pruned from an older version of base everywhere
+    it is used."""
+    name = stale.name
+    variant = build_variant(base, unused, base_digest)
+    stale.user_remap(variant)
+    bpy.data.node_groups.remove(stale)
+    variant.name = name
+    log.count("Stale shader variants rebuilt")
+    return variant
+
+
+def _base_tree(tree):
+    name = tree.get(BASE_PROPERTY)
+    if not name:
+        return tree
+    # The base is linked from Shaders.blend, so look past local name clashes
+    for candidate in bpy.data.node_groups:
+        if candidate.name == name and not candidate.get(BASE_PROPERTY):
+            return candidate
+    return None
+
+
+def specialise_materials(materials):
+    """Points each Koda node in the materials at the variant for its usage
+    signature. Returns (nodes specialised, variants built)."""
+    variants = {}
+    digests = {}
+    specialised = 0
+    built = 0
+
+    for mat in materials:
+        if material_index.category(mat) != material_index.KODA:
+            continue
+        for node in _koda_nodes(mat):
+            base = _base_tree(node.node_tree)
+            if base is None:
+                continue
+            unused = unused_inputs(mat, node)
+            if not unused:
+                if node.node_tree is not base:
+                    node.node_tree = base
+                continue
+
+            key = (base.name, unused)
+            variant = variants.get(key)
+            if variant is None:
+                base_digest = digests.get(base.session_uid)
+                if base_digest is None:
+                    base_digest = digests[base.session_uid] = template_digest(base)
+                variant = find_variant(base, unused)
+                if variant is None:
+                    variant = build_variant(base, unused, base_digest)
+                    built += 1
+                elif variant.get(BASE_DIGEST_PROPERTY) != base_digest:
+                    variant = _rebuild_variant(variant, base, unused, base_digest)
+                    built += 1
+                variants[key] = variant
+
+            if node.node_tree is not variant:
+                node.node_tree = variant
+                specialised += 1
+                log.count("Koda nodes specialised")
+
+    return specialised, built
+
+
+def restore_base_groups(materials):
+    """Points specialised Koda nodes back at their full base group.
+    Returns the number of nodes restored."""
+    restored = 0
+    for mat in materials:
+        if material_index.category(mat) != material_index.KODA:
+            continue
+        for node in _koda_nodes(mat):
+            if not node.node_tree.get(BASE_PROPERTY):
+                continue
+            base = _base_tree(node.node_tree)
+            if base is not None:
+                node.node_tree = base
+                restored += 1
+    log.count("Koda nodes restored", restored)
+    return restored
@@ -0,0 +1,335 @@
+"""Template versions of converted materials, and bulk re-templating.
+
+A converted material is a copy of a template material from Shaders.blend
+(see material_io.link_material_with_koda_group). The Koda groups stay
+linked, so they follow library updates (specialised variants of them
+catch up the next time they are specialised, see shader_variants.py).
+The copied node tree doesn't.
+Each copy is stamped with its template's name and a digest of the
+template's node tree, made of:
+- node names and types;
+- group names (Koda groups by base name, see node_utils);
+- links;
+- unlinked input values of the nodes conversion never writes, which
+  means everything except the Koda nodes and image textures.
+
+upgrade_materials() reloads Shaders.blend and rebuilds every material
+whose stamp no longer matches its template. Each rebuild is a fresh
+template copy that carries over:
+- the Koda input values;
+- the images of same-named texture nodes;
+- group nodes added after conversion (palette groups, overrides) and
+  their links;
+- custom properties.
+The Koda-input part of the transfer is compiled once per template and
+old node layout (names resolved to socket indices), then reused for every
+material that shares them. The rebuilt material takes over the old one's
+users and name.
+
+Unstamped Koda materials (converted before stamping existed, or built by
+hand) are checked against their Koda group's template by digest, and
+stamped if they match. Those that don't match are left alone unless
+include_unversioned is set, since nothing says they came from a template.
+Specialised Koda nodes (see shader_variants.py)
+come back on the full group.
+"""
+
+import hashlib
+import os
+
+import bpy # type: ignore
+from . import config, log, material_index
+from .node_utils import group_base_name
+from .prefs import get_shaders_blend_path
+from .socket_utils import copy_socket_to_socket
+
+TEMPLATE_PROPERTY = "auto_koda_template"
+TEMPLATE_HASH_PROPERTY = "auto_koda_template_hash"
+
+# Template session_uid -> digest. Dropped when Shaders.blend is reloaded
+_digests = {}
+
+# (template, template digest, old Koda nodes, old texture nodes) ->
+# ([(old node, new node, [(old input index, new input index)])], [texture node])
+_plans = {}
+
+
+def _value(socket):
+    value = socket.default_value
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, (int, bool, str)):
+        return value
+    return tuple(round(component, 6) for component in value)
+
+
+def _is_koda(node):
+    return (
+        node.type == 'GROUP' and node.node_tree is not None
+        and group_base_name(node.node_tree) in config.KODA_NODE_NAMES.values()
+    )
+
+
+def template_digest(tree, only=None):
+    """Digest of a material node tree's template structure, restricted to
+    the nodes named in `only` if given."""
+    entries = []
+    for node in tree.nodes:
+        if only is not None and node.name not in only:
+            continue
+        group = group_base_name(node.node_tree) if node.type == 'GROUP' and node.node_tree else ""
+        if _is_koda(node) or node.type == 'TEX_IMAGE':
+            values = ()
+        else:
+            values = tuple(
+                (socket.identifier, _value(socket)) for socket in node.inputs
+                if not socket.is_linked and hasattr(socket, "default_value")
+            )
+        entries.append(("node", node.name, node.bl_idname, group, values))
+
+    for link in tree.links:
+        if only is not None and (link.from_node.name not in only or link.to_node.name not in only):
+            continue
+        entries.append((
+            "link", link.from_node.name, link.from_socket.identifier,
+            link.to_node.name, link.to_socket.identifier,
+        ))
+
+    entries.sort(key=repr)
+    return hashlib.blake2b(repr(entries).encode(), digest_size=8).hexdigest()
+
+
+def _digest(template):
+    digest = _digests.get(template.session_uid)
+    if digest is None:
+        digest = _digests[template.session_uid] = template_digest(template.node_tree)
+    return digest
+
+
+def stamp(mat, template):
+    """Records `template` and its current digest on the converted copy."""
+    mat[TEMPLATE_PROPERTY] = template.name
+    mat[TEMPLATE_HASH_PROPERTY] = _digest(template)
+
+
+def _normalized(path, library=None):
+    return os.path.normcase(os.path.normpath(bpy.path.abspath(path, library=library)))
+
+
+def is_library_at(library, path):
+    """Whether `library` is the .blend at `path`, either of them possibly
+    relative ('//...') to the open file."""
+    return library is not None and _normalized(library.filepath) == _normalized(path)
+
+
+def load_templates(reload=False):
+    """Links Shaders.blend's materials, reloading the library first if
+    asked. Returns ({template name: material}, {Koda group name: first
+    template using it})."""
+    path = get_shaders_blend_path()
+    if not path:
+        log.error("Shaders.blend path invalid or not set.")
+        return {}, {}
+
+    if reload:
+        for library in bpy.data.libraries:
+            if is_library_at(library, path):
+                library.reload()
+        _digests.clear()
+        _plans.clear()
+
+    with bpy.data.libraries.load(path, link=True) as (data_from, data_to):
+        data_to.materials = data_from.materials
+
+    by_name = {}
+    by_group = {}
+    for mat in bpy.data.materials:
+        if not is_library_at(mat.library, path) or not mat.use_nodes:
+            continue
+        by_name[mat.name] = mat
+        for node in mat.node_tree.nodes:
+            if node.type == 'GROUP' and node.node_tree:
+                by_group.setdefault(node.node_tree.name, mat)
+    if not by_name:
+        log.error("No template materials linked from '%s'", path)
+    return by_name, by_group
+
+
+def _template_of(mat, templates):
+    by_name, by_group = templates
+    name = mat.get(TEMPLATE_PROPERTY)
+    if name:
+        return by_name.get(name)
+    for node in mat.node_tree.nodes:
+        if _is_koda(node):
+            return by_group.get(group_base_name(node.node_tree))
+    return None
+
+
+def outdated_materials(materials, templates, include_unversioned=False):
+    """[(material, template)] for the local Koda materials whose template
+    changed since they were converted. Unstamped materials that still
+    match their template are stamped on the way; the others are included
+    only with include_unversioned. Returns (outdated, stamped)."""
+    outdated = []
+    stamped = 0
+    for mat in materials:
+        if mat.library is not None or material_index.category(mat) != material_index.KODA:
+            continue
+        template = _template_of(mat, templates)
+        if template is None:
+            log.warning("No template found for '%s'", mat.name)
+            log.count("Materials without template")
+            continue
+
+        recorded = mat.get(TEMPLATE_HASH_PROPERTY)
+        if recorded is None:
+            names = {node.name for node in template.node_tree.nodes}
+            if template_digest(mat.node_tree, only=names) == _digest(template):
+                stamp(mat, template)
+                stamped += 1
+                log.count("Materials stamped")
+                continue
+            if not include_unversioned:
+                log.debug("'%s' has no template stamp and doesn't match '%s'", mat.name, template.name)
+                log.count("Unversioned materials skipped")
+                continue
+        elif recorded == _digest(template):
+            continue
+        outdated.append((mat, template))
+    return outdated, stamped
+
+
+def _compile(old_tree, new_tree, koda_nodes):
+    transfers = []
+    new_koda = [node for node in new_tree.nodes if _is_koda(node)]
+    for old_node in koda_nodes:
+        base = group_base_name(old_node.node_tree)
+        new_node = new_tree.nodes.get(old_node.name)
+        if new_node is None or not _is_koda(new_node) or group_base_name(new_node.node_tree) != base:
+            new_node = next((node for node in new_koda if group_base_name(node.node_tree) == base), None)
+        if new_node is None:
+            log.debug("No '%s' node in the new template for '%s'", base, old_node.name)
+            continue
+        new_inputs = {socket.name: index for index, socket in enumerate(new_node.inputs)}
+        pairs = [
+            (index, new_inputs[socket.name])
+            for index, socket in enumerate(old_node.inputs)
+            if socket.name in new_inputs and isinstance(socket, config.Allowed_Socket_Types)
+        ]
+        transfers.append((old_node.name, new_node.name, pairs))
+    return transfers
+
+
+def _carry_groups(old_tree, new_tree):
+    """Recreates the old tree's extra group nodes (not in the template) in
+    the new tree, with their links into nodes the new tree has."""
+    new_nodes = new_tree.nodes
+    carried = {}
+    for node in old_tree.nodes:
+        if node.type != 'GROUP' or node.node_tree is None or _is_koda(node):
+            continue
+        if new_nodes.get(node.name) is not None:
+            continue
+        copy = new_nodes.new('ShaderNodeGroup')
+        copy.name = node.name
+        copy.label = node.label
+        copy.location = node.location
+        copy.node_tree = node.node_tree
+        carried[node.name] = copy
+
+    for link in old_tree.links:
+        copy = carried.get(link.from_node.name)
+        target = new_nodes.get(link.to_node.name)
+        if copy is None or target is None:
+            continue
+        output = copy.outputs.get(link.from_socket.name)
+        socket = target.inputs.get(link.to_socket.name)
+        if output is not None and socket is not None:
+            new_tree.links.new(output, socket)
+    return len(carried)
+
+
+def _swap(old, new):
+    name = old.name
+    for key in old.keys():
+        if key not in (TEMPLATE_PROPERTY, TEMPLATE_HASH_PROPERTY):
+            new[key] = old[key]
+    old.user_remap(new)
+    old.name = f"{name}_OLD"
+    new.name = name
+    bpy.data.materials.remove(old)
+    material_index.update(new)
+
+
+def upgrade_material(mat, template):
+    """Rebuilds `mat` from a fresh copy of `template`. Returns the new
+    material, which has replaced `mat` everywhere."""
+    old_tree = mat.node_tree
+    koda_nodes = [node for node in old_tree.nodes if _is_koda(node)]
+    textures = tuple(node.name for node in old_tree.nodes if node.type == 'TEX_IMAGE')
+
+    new = template.copy()
+    stamp(new, template)
+    new_tree = new.node_tree
+
+    key = (
+        template.name, _digest(template),
+        tuple((node.name, node.node_tree.name) for node in koda_nodes), textures,
+    )
+    plan = _plans.get(key)
+    if plan is None:
+        new_textures = [
+            node.name for node in new_tree.nodes
+            if node.type == 'TEX_IMAGE' and node.name in textures
+        ]
+        plan = _plans[key] = (_compile(old_tree, new_tree, koda_nodes), new_textures)
+        log.count("Template transfer plans compiled")
+
+    transfers, texture_names = plan
+    old_nodes = old_tree.nodes
+    new_nodes = new_tree.nodes
+    for old_name, new_name, pairs in transfers:
+        old_inputs = old_nodes[old_name].inputs
+        new_inputs = new_nodes[new_name].inputs
+        for old_index, new_index in pairs:
+            source = old_inputs[old_index]
+            if source.is_linked:
+                continue
+            if not copy_socket_to_socket(source, new_inputs[new_index]):
+                log.debug("Skipping socket '%s' on '%s'", source.name, mat.name)
+                log.count("Sockets skipped")
+    for name in texture_names:
+        new_nodes[name].image = old_nodes[name].image
+
+    if _carry_groups(old_tree, new_tree):
+        log.count("Materials with group nodes carried over")
+
+    _swap(mat, new)
+    log.count("Materials re-templated")
+    return new
+
+
+def upgrade_materials(materials, check_only=False, include_unversioned=False):
+    """Reloads Shaders.blend and rebuilds the materials whose template
+    changed. With check_only, they are only listed in the log. Returns
+    (outdated, upgraded, stamped)."""
+    templates = load_templates(reload=True)
+    if not templates[0]:
+        return 0, 0, 0
+    outdated, stamped = outdated_materials(list(materials), templates, include_unversioned)
+    if check_only:
+        for mat, template in outdated:
+            log.info("'%s' is out of date with template '%s'", mat.name, template.name)
+        return len(outdated), 0, stamped
+
+    upgraded = 0
+    for mat, template in outdated:
+        name = mat.name
+        try:
+            upgrade_material(mat, template)
+        except Exception as e:
+            log.error("Failed to re-template '%s': %s", name, e)
+            continue
+        upgraded += 1
+    return len(outdated), upgraded, stamped
@@ -1,6 +1,6 @@
 import bpy # type: ignore
-from . import config, operators, helpers, garment_hue
-from bpy.props import StringProperty # type: ignore
+from . import config, operators, prefs, log, profiling, datablock_stats, material_index
+from bpy.props import StringProperty, EnumProperty, BoolProperty # type: ignore
 from bpy.types import AddonPreferences # type: ignore
 
 class Auto_Koda_PT_Settings(bpy.types.Panel):
@@ -13,9 +13,15 @@ class Auto_Koda_PT_Settings(bpy.types.Panel):
 
     def draw(self, context):
         layout = self.layout
+        # Cached, so redraws never touch the filesystem (see prefs.refresh_path_status)
+        status = prefs.get_path_status()
+        if status is None:
+            layout.label(text="Checking paths...", icon='TIME')
+            return
+
         status_box = layout.box()
 
-        shaders_blend_loc = helpers.get_shaders_blend_path()
+        shaders_blend_loc = status["shaders_path"]
 
         if not shaders_blend_loc or ".blend" not in shaders_blend_loc:
             status_box.alert = True
@@ -54,7 +60,7 @@ class Auto_Koda_PT_Settings(bpy.types.Panel):
             ).module = __package__
 
         resource_box = layout.box()
-        resources_path = helpers.get_resources_folder_path()
+        resources_path = status["resources_path"]
 
         if not resources_path:
             resource_box.alert = True
@@ -77,6 +83,17 @@ class Auto_Koda_PT_Settings(bpy.types.Panel):
                 text="Change Resources Folder",
                 icon='FILE_FOLDER'
             ).module = __package__
+            row = resource_box.row(align=True)
+            row.operator(
+                operators.Auto_Koda_OT_RelinkMissingImages.bl_idname,
+                text="Relink Missing Textures",
+                icon='LIBRARY_DATA_BROKEN'
+            )
+            row.operator(
+                operators.Auto_Koda_OT_RefreshResourcesIndex.bl_idname,
+                text="",
+                icon='FILE_REFRESH'
+            )
 
 class Auto_Koda_PT_Process_Materials(bpy.types.Panel):
     bl_label = "Process Materials"
@@ -89,6 +106,22 @@ class Auto_Koda_PT_Process_Materials(bpy.types.Panel):
         layout = self.layout
         layout.operator(operators.Auto_Koda_Selected.bl_idname,text="Auto Koda (Selected)",icon='RESTRICT_SELECT_OFF')
         layout.operator(operators.Auto_Koda_Crunch_Selected.bl_idname, text="Auto Crunch (Selected)", icon='MODIFIER')
+        layout.operator(operators.Auto_Koda_OT_ConvertChunked.bl_idname, text="Auto Koda (Chunked)", icon='SEQ_STRIP_DUPLICATE')
+        row = layout.row(align=True)
+        row.operator(operators.Auto_Koda_OT_SpecialiseShaders.bl_idname, text="Specialise Shaders", icon='NODETREE')
+        row.operator(operators.Auto_Koda_OT_SpecialiseShaders.bl_idname, text="", icon='LOOP_BACK').restore = True
+        row = layout.row(align=True)
+        row.operator(operators.Auto_Koda_OT_UpgradeTemplates.bl_idname, text="Upgrade Templates", icon='FILE_REFRESH')
+        row.operator(operators.Auto_Koda_OT_UpgradeTemplates.bl_idname, text="", icon='VIEWZOOM').check_only = True
+
+        counts = material_index.selection_counts(context)
+        unconverted = counts[material_index.HERO_GRAVITAS] + counts[material_index.HERO_ENGINE]
+        col = layout.column(align=True)
+        col.label(text=f"{unconverted} unconverted on selection", icon='MATERIAL')
+        col.label(text=(
+            f"Koda {counts[material_index.KODA]}, Hero Gravitas {counts[material_index.HERO_GRAVITAS]}, "
+            f"HeroEngine {counts[material_index.HERO_ENGINE]}, other {counts[material_index.OTHER]}"
+        ))
 
 class Auto_Koda_PT_Material_Overrides(bpy.types.Panel):
     bl_label = "Material Overrides"
@@ -108,18 +141,81 @@ class Auto_Koda_PT_Material_Overrides(bpy.types.Panel):
         layout.operator("autokoda.link_override", text="Link Override")
         layout.operator("autokoda.sync_link_override", text="Sync/Link Override")
 
+def _update_paths(self, context):
+    prefs.refresh_path_status()
+
+
+def _update_log_level(self, context):
+    log.set_level(self.logLevel)
+
+
+def _update_log_file(self, context):
+    log.set_log_file(bpy.path.abspath(self.logFilePath) if self.logFilePath else "")
+
+
+def _update_profiling(self, context):
+    profiling.configure(self.profilingEnabled, self.profilingCapture)
+
+
+def _update_accounting(self, context):
+    datablock_stats.configure(self.accountingEnabled)
+
+
 class Auto_Koda_Preferences(AddonPreferences):
     bl_idname = __package__
 
     shadersPath: StringProperty(
         name="",
-        subtype='FILE_PATH'
+        subtype='FILE_PATH',
+        update=_update_paths,
     ) # type: ignore
 
     resourcesPath: StringProperty(
         name="",
         description="Folder containing TOR-extracted resource files",
-        subtype='DIR_PATH'
+        subtype='DIR_PATH',
+        update=_update_paths,
+    ) # type: ignore
+
+    logLevel: EnumProperty(
+        name="Log Level",
+        description="Minimum level of messages written to the console, log panel and log file",
+        items=[
+            ('DEBUG', "Debug", "Per-item detail, slow on large batches"),
+            ('INFO', "Info", "Per-operator summaries"),
+            ('WARNING', "Warning", "Only problems"),
+            ('ERROR', "Error", "Only failures"),
+        ],
+        default='INFO',
+        update=_update_log_level,
+    ) # type: ignore
+
+    logFilePath: StringProperty(
+        name="",
+        description="Optional file that log output is also written to",
+        subtype='FILE_PATH',
+        update=_update_log_file,
+    ) # type: ignore
+
+    profilingEnabled: BoolProperty(
+        name="Profile Operators",
+        description="Time each phase of Auto Koda operators and show the results in the Diagnostics panel",
+        default=False,
+        update=_update_profiling,
+    ) # type: ignore
+
+    profilingCapture: BoolProperty(
+        name="cProfile Capture",
+        description="Also run each profiled operator under cProfile, for pstats export. Slows the operator down",
+        default=False,
+        update=_update_profiling,
+    ) # type: ignore
+
+    accountingEnabled: BoolProperty(
+        name="Datablock Accounting",
+        description="Count datablocks and estimate image and mesh memory before and after each batch operator, and report the difference",
+        default=False,
+        update=_update_accounting,
     ) # type: ignore
 
     def draw(self, context):
@@ -132,6 +228,19 @@ class Auto_Koda_Preferences(AddonPreferences):
         layout.label(text="Select your TOR resources extraction folder below")
         layout.prop(self, "resourcesPath", text="Resources Folder")
 
+        layout.separator()
+
+        layout.label(text="Logging")
+        layout.prop(self, "logLevel")
+        layout.prop(self, "logFilePath", text="Log File")
+
+        layout.separator()
+
+        layout.label(text="Diagnostics")
+        layout.prop(self, "profilingEnabled")
+        layout.prop(self, "profilingCapture")
+        layout.prop(self, "accountingEnabled")
+
 class Auto_Koda_PT_Utilities(bpy.types.Panel):
     bl_label = "Utilities"
     bl_idname = "VIEW3D_PT_auto_koda_utilities"
@@ -146,27 +255,157 @@ class Auto_Koda_PT_Utilities(bpy.types.Panel):
             text="Toggle Subsurf Viewport",
             icon='MOD_SUBSURF'
         )
+        layout.prop(context.scene, "auto_koda_adaptive_subsurf", icon='VIEW_CAMERA')
+        row = layout.row(align=True)
+        row.operator(operators.Auto_Koda_OT_PerformanceMode.bl_idname, text="Performance Mode", icon='MEMORY')
+        row.operator(operators.Auto_Koda_OT_RestorePerformanceMode.bl_idname, text="Restore", icon='LOOP_BACK')
         layout.separator()
         layout.operator(
             operators.Auto_Koda_OT_PrepareMeshes.bl_idname,
             text="Mesh Preparation",
             icon='MESH_DATA'
         )
+        layout.operator(
+            operators.Auto_Koda_OT_InstanceDuplicateMeshes.bl_idname,
+            text="Instance Duplicate Meshes",
+            icon='LINKED'
+        )
+        row = layout.row(align=True)
+        row.operator(operators.Auto_Koda_OT_GenerateLODs.bl_idname, text="Generate LODs", icon='MOD_DECIM')
+        row.operator(operators.Auto_Koda_OT_RemoveLODs.bl_idname, text="", icon='X')
+        row = layout.row(align=True)
+        for level in range(len(config.LOD_RATIOS) + 1):
+            op = row.operator(operators.Auto_Koda_OT_SetLOD.bl_idname, text=f"LOD{level}")
+            op.mode = 'LEVEL'
+            op.level = level
+        op = row.operator(operators.Auto_Koda_OT_SetLOD.bl_idname, text="", icon='VIEW_CAMERA')
+        op.mode = 'DISTANCE'
         layout.separator()
 
         layout.label(text="Garment Hue")
 
         row = layout.row(align=True)
-        row.prop_search(
-            context.scene, "auto_koda_garment_hue_selection",
-            context.scene, "auto_koda_garment_hue_files",
-            text="", icon='VIEWZOOM'
-        )
+        row.prop(context.scene, "auto_koda_garment_hue_selection", text="", icon='VIEWZOOM')
         row.operator(
             operators.Auto_Koda_OT_RefreshGarmentHueList.bl_idname,
             text="", icon='FILE_REFRESH'
         )
 
+        layout.prop(context.scene, "auto_koda_garment_hue_shared")
+
         row = layout.row(align=True)
         row.operator(operators.Auto_Koda_OT_GarmentHuePrimary.bl_idname, text="Primary")
-        row.operator(operators.Auto_Koda_OT_GarmentHueSecondary.bl_idname, text="Secondary")
\ No newline at end of file
+        row.operator(operators.Auto_Koda_OT_GarmentHueSecondary.bl_idname, text="Secondary")
+        row = layout.row(align=True)
+        row.operator(operators.Auto_Koda_OT_BakePalette.bl_idname, text="Bake Palette", icon='RENDER_STILL')
+        op = row.operator(operators.Auto_Koda_OT_SwapBaked.bl_idname, text="Baked", icon='MATERIAL')
+        op.use_baked = True
+        op = row.operator(operators.Auto_Koda_OT_SwapBaked.bl_idname, text="Koda", icon='NODE_MATERIAL')
+        op.use_baked = False
+        layout.separator()
+
+        layout.label(text="Character Library")
+        row = layout.row(align=True)
+        row.operator(operators.Auto_Koda_OT_ExportCharacters.bl_idname, text="Export", icon='EXPORT')
+        row.operator(operators.Auto_Koda_OT_ImportCharacters.bl_idname, text="Import", icon='LINK_BLEND')
+        layout.separator()
+
+        layout.label(text="Koda Presets")
+        row = layout.row(align=True)
+        row.prop(context.scene, "auto_koda_preset_selection", text="", icon='PRESET')
+        row.operator(operators.Auto_Koda_OT_SavePreset.bl_idname, text="", icon='ADD')
+        row.operator(operators.Auto_Koda_OT_DeletePreset.bl_idname, text="", icon='REMOVE')
+
+        row = layout.row(align=True)
+        op = row.operator(operators.Auto_Koda_OT_ApplyPreset.bl_idname, text="Apply to Selected")
+        op.target = 'SELECTED'
+        op = row.operator(operators.Auto_Koda_OT_ApplyPreset.bl_idname, text="Apply to Collection")
+        op.target = 'COLLECTION'
+
+
+class Auto_Koda_PT_Log(bpy.types.Panel):
+    bl_options = {'DEFAULT_CLOSED'}
+    bl_label = "Log"
+    bl_idname = "VIEW3D_PT_auto_koda_log"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "Auto Koda"
+
+    LINES_SHOWN = 20
+
+    def draw(self, context):
+        layout = self.layout
+        records = log.recent(self.LINES_SHOWN)
+
+        if not records:
+            layout.label(text="No messages", icon='INFO')
+        else:
+            col = layout.column(align=True)
+            for levelname, message in records:
+                icon = {'WARNING': 'ERROR', 'ERROR': 'CANCEL'}.get(levelname, 'DOT')
+                col.label(text=message, icon=icon)
+
+        layout.operator(operators.Auto_Koda_OT_ClearLog.bl_idname, text="Clear Log", icon='TRASH')
+
+
+
+class Auto_Koda_PT_Diagnostics(bpy.types.Panel):
+    bl_options = {'DEFAULT_CLOSED'}
+    bl_label = "Diagnostics"
+    bl_idname = "VIEW3D_PT_auto_koda_diagnostics"
+    bl_parent_id = "VIEW3D_PT_auto_koda_log"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "Auto Koda"
+
+    PHASES_SHOWN = 12
+
+    def draw_datablocks(self, layout):
+        accounting = datablock_stats.last_delta
+        if accounting is None:
+            return
+        layout.label(text=f"{accounting['label']}: datablocks", icon='FILE_BLEND')
+        col = layout.column(align=True)
+        before, after, delta = accounting["before"], accounting["after"], accounting["delta"]
+        for name in datablock_stats.COUNTED:
+            row = col.row()
+            row.label(text=name.replace("_", " ").title())
+            row.label(text=f"{before[name]} -> {after[name]} ({delta[name]:+d})")
+        for key, label in (("image_bytes", "Image Memory"), ("mesh_bytes", "Mesh Memory")):
+            row = col.row()
+            row.label(text=label)
+            row.label(text=datablock_stats.format_bytes(delta[key]))
+
+    def draw(self, context):
+        layout = self.layout
+        addon = context.preferences.addons.get(__package__)
+        if addon is not None:
+            row = layout.row(align=True)
+            row.prop(addon.preferences, "profilingEnabled", text="Profile", toggle=True)
+            row.prop(addon.preferences, "profilingCapture", text="cProfile", toggle=True)
+            row.prop(addon.preferences, "accountingEnabled", text="Datablocks", toggle=True)
+
+        self.draw_datablocks(layout)
+
+        report = profiling.last_report
+        if report is None:
+            layout.label(text="No profiled run yet", icon='INFO')
+            return
+
+        total = report["total_s"]
+        layout.label(text=f"{report['label']}: {total * 1000:.1f} ms", icon='TIME')
+
+        col = layout.column(align=True)
+        for name, entry in list(report["phases"].items())[:self.PHASES_SHOWN]:
+            share = entry["seconds"] / total * 100 if total else 0.0
+            row = col.row()
+            row.label(text=name)
+            row.label(text=f"{entry['seconds'] * 1000:.1f} ms  x{entry['calls']}  {share:.0f}%")
+
+        row = layout.row(align=True)
+        op = row.operator(operators.Auto_Koda_OT_ExportProfile.bl_idname, text="Export JSON", icon='EXPORT')
+        op.format = 'JSON'
+        sub = row.row(align=True)
+        sub.enabled = report["profile"] is not None
+        op = sub.operator(operators.Auto_Koda_OT_ExportProfile.bl_idname, text="Export pstats", icon='EXPORT')
+        op.format = 'PSTATS'